@@ -1,9 +1,23 @@
+import os
 from collections import defaultdict
-from itertools import chain
-from typing import Dict, Iterable, List, NewType, Tuple
+from functools import cached_property
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NewType,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import dawg
-from utils.cree_lev_dist import remove_cree_diacritics
+from utils.cree_lev_dist import CreeLevenshteinAutomaton, remove_cree_diacritics
+
+from .versioned_files import save_dawg
 
 # A simplified form intended to be used within the affix search trie.
 SimplifiedForm = NewType("SimplifiedForm", str)
@@ -12,47 +26,181 @@ SimplifiedForm = NewType("SimplifiedForm", str)
 class AffixSearcher:
     """
     Enables prefix and suffix searches given a list of words and their wordform IDs.
+
+    Searches return a bounded number of the best matches: words that are exactly the
+    affix, then the words with the best scores (e.g., the most frequent ones). Every
+    prefix (and suffix) in the tries keeps its own list of best matches, computed
+    when the searcher is built, so a search costs the same however many words match,
+    even for an affix that's one or two letters long.
+
+    Searchers can be saved to and loaded from files, which is much faster than
+    building them from scratch.
     """
 
     # TODO: "int" should be Wordform PK type
 
-    def __init__(self, words: Iterable[Tuple[str, int]]):
-        self.text_to_ids: Dict[str, List[int]] = defaultdict(list)
+    # Each key in the DAWGs -- every prefix (or reversed suffix) of every word -- is
+    # associated with (rank, wordform_id, is_exact) records of its best matches,
+    # packed as two unsigned 32-bit integers and a boolean. The rank orders all the
+    # (word, wordform) pairs from best to worst.
+    RECORD_FORMAT = "<II?"
+
+    # How many of the best matches are kept for each affix, by default
+    DEFAULT_MAX_RESULTS = 10
 
+    def __init__(
+        self,
+        words: Iterable[Tuple[str, int]],
+        scores: Optional[Mapping[int, Tuple[int, ...]]] = None,
+        max_results: int = DEFAULT_MAX_RESULTS,
+    ):
+        """
+        :param words: (text, wordform ID) pairs
+        :param scores: how good a match each wordform is, e.g., (whether it's a lemma,
+            how frequent it is), higher first; by default, all are equally good
+        :param max_results: how many matches to keep for each affix
+        """
+        scores = scores or {}
         words_marked_for_indexing = [
             (simplified_text, wordform_id)
             for raw_text, wordform_id in words
             if (simplified_text := self.to_simplified_form(raw_text))
         ]
+        # Best first; ties go to shorter words:
+        ranked = sorted(
+            set(words_marked_for_indexing),
+            key=lambda word: (
+                tuple(-score for score in scores.get(word[1], ())),
+                len(word[0]),
+                word,
+            ),
+        )
 
-        for text, wordform_id in words_marked_for_indexing:
-            self.text_to_ids[self.to_simplified_form(text)].append(wordform_id)
-
-        self._prefixes = dawg.CompletionDAWG(
-            [text for text, _ in words_marked_for_indexing]
+        self._prefixes = dawg.RecordDAWG(
+            self.RECORD_FORMAT, _best_matches(ranked, max_results)
         )
-        self._suffixes = dawg.CompletionDAWG(
-            [_reverse(text) for text, _ in words_marked_for_indexing]
+        self._suffixes = dawg.RecordDAWG(
+            self.RECORD_FORMAT,
+            _best_matches(
+                [(_reverse(text), wordform_id) for text, wordform_id in ranked],
+                max_results,
+            ),
         )
 
-    def search_by_prefix(self, prefix: str) -> Iterable[int]:
+    def search(self, affix: str, k: Optional[int] = None) -> List[int]:
         """
-        :return: an iterable of Wordform IDs that match the prefix
+        Searches both prefixes and suffixes.
+
+        :return: the IDs of (at most) the k best Wordforms that start or end with the
+            affix, best first. By default, all of the matches that were kept.
+        """
+        term = self.to_simplified_form(affix)
+        records = sorted(
+            {
+                *self._prefixes.get(term, ()),
+                *self._suffixes.get(_reverse(term), ()),
+            },
+            key=_by_rank,
+        )
+        return _first_ids(records, k)
+
+    def search_by_prefix(self, prefix: str, k: Optional[int] = None) -> List[int]:
+        """
+        :return: the IDs of (at most) the k best Wordforms that match the prefix
         """
         term = self.to_simplified_form(prefix)
-        matched_words = self._prefixes.keys(term)
-        return chain.from_iterable(self.text_to_ids[t] for t in matched_words)
+        return _first_ids(sorted(self._prefixes.get(term, ()), key=_by_rank), k)
 
-    def search_by_suffix(self, suffix: str) -> Iterable[int]:
+    def search_by_suffix(self, suffix: str, k: Optional[int] = None) -> List[int]:
         """
-        :return: an iterable of Wordform IDs that match the suffix
+        :return: the IDs of (at most) the k best Wordforms that match the suffix
         """
         term = self.to_simplified_form(suffix)
-        matched_reversed_words = self._suffixes.keys(_reverse(term))
-        return chain.from_iterable(
-            self.text_to_ids[_reverse(t)] for t in matched_reversed_words
+        records = self._suffixes.get(_reverse(term), ())
+        return _first_ids(sorted(records, key=_by_rank), k)
+
+    def search_nearest(self, query: str, k: int, max_distance: float) -> List[int]:
+        """
+        Finds the (at most) k words closest to the query by our Cree-specific edit
+        distance (see CreeLevenshteinAutomaton), as long as they're within
+        max_distance.
+
+        Walks the prefix trie, pruning every branch that can no longer get within the
+        budget; once k words are found, the budget shrinks to the distance of the
+        k-th closest word.
+
+        :return: the IDs of the Wordforms with those words, closest first
+        """
+        automaton = CreeLevenshteinAutomaton(self.to_simplified_form(query))
+        budget = max_distance
+        # (distance, word) of the closest words so far:
+        nearest: List[Tuple[float, str]] = []
+
+        # depth-first, from the empty prefix:
+        stack = [("", automaton.start())]
+        while stack:
+            prefix, state = stack.pop()
+
+            if automaton.distance(state) <= budget and self._is_word(prefix):
+                nearest.append((automaton.distance(state), prefix))
+                if len(nearest) >= k:
+                    nearest.sort()
+                    del nearest[k:]
+                    budget = nearest[-1][0]
+
+            previous_char = prefix[-1:]
+            for char in self._alphabet:
+                extended = prefix + char
+                if not self._prefixes.has_keys_with_prefix(extended):
+                    continue
+                next_state = automaton.step(state, char, previous_char)
+                if automaton.lower_bound(next_state) <= budget:
+                    stack.append((extended, next_state))
+
+        return [
+            wordform_id
+            for _, word in sorted(nearest)
+            for _, wordform_id, is_exact in sorted(self._prefixes[word], key=_by_rank)
+            if is_exact
+        ]
+
+    def _is_word(self, prefix: str) -> bool:
+        # (exact matches come first)
+        return prefix in self._prefixes and any(
+            is_exact for _, _, is_exact in self._prefixes[prefix]
         )
 
+    @cached_property
+    def _alphabet(self) -> str:
+        """
+        Every character that appears in the indexed words.
+        """
+        return "".join(
+            sorted({char for word in self._prefixes.iterkeys() for char in word})
+        )
+
+    def save(self, prefixes_path: Path, suffixes_path: Path) -> None:
+        """
+        Saves the searcher to two files. Each file is replaced atomically, so that
+        other processes never load a partially written file.
+        """
+        save_dawg(self._prefixes, prefixes_path)
+        save_dawg(self._suffixes, suffixes_path)
+
+    @classmethod
+    def load(cls, prefixes_path: Path, suffixes_path: Path) -> "AffixSearcher":
+        """
+        Loads a searcher previously written with save().
+        """
+        searcher = cls.__new__(cls)
+        searcher._prefixes = dawg.RecordDAWG(cls.RECORD_FORMAT).load(
+            os.fspath(prefixes_path)
+        )
+        searcher._suffixes = dawg.RecordDAWG(cls.RECORD_FORMAT).load(
+            os.fspath(suffixes_path)
+        )
+        return searcher
+
     @staticmethod
     def to_simplified_form(query: str) -> SimplifiedForm:
         """
@@ -65,5 +213,110 @@ class AffixSearcher:
         return SimplifiedForm(remove_cree_diacritics(query.lower()))
 
 
+def _best_matches(
+    ranked: Sequence[Tuple[str, int]], max_results: int
+) -> Iterator[Tuple[str, Tuple[int, int, bool]]]:
+    """
+    The (at most) max_results best matches of every prefix of the ranked words: words
+    that are exactly the prefix, then longer words, each best first.
+    """
+    # prefix -> {wordform ID: rank of its best word}
+    exact: Dict[str, Dict[int, int]] = defaultdict(dict)
+    longer: Dict[str, Dict[int, int]] = defaultdict(dict)
+    for rank, (text, wordform_id) in enumerate(ranked):
+        exact[text].setdefault(wordform_id, rank)
+        for length in range(1, len(text)):
+            matches = longer[text[:length]]
+            if len(matches) < max_results:
+                matches.setdefault(wordform_id, rank)
+
+    for key in exact.keys() | longer.keys():
+        best = [(rank, wordform_id, True) for wordform_id, rank in exact[key].items()]
+        best += [
+            (rank, wordform_id, False)
+            for wordform_id, rank in longer[key].items()
+            if wordform_id not in exact[key]
+        ]
+        for record in best[:max_results]:
+            yield key, record
+
+
+def _by_rank(record: Tuple[int, int, bool]) -> Tuple[bool, int]:
+    rank, _, is_exact = record
+    return not is_exact, rank
+
+
+def _first_ids(records: List[Tuple[int, int, bool]], k: Optional[int]) -> List[int]:
+    """
+    The distinct wordform IDs of the first k records.
+    """
+    ids: List[int] = []
+    for _, wordform_id, _ in records:
+        if k is not None and len(ids) >= k:
+            break
+        if wordform_id not in ids:
+            ids.append(wordform_id)
+    return ids
+
+
+class InfixSearcher:
+    """
+    Enables substring (infix) searches given a list of words and their wordform IDs,
+    e.g., "pimohtê" finds "kî-pimohtêw".
+
+    Every suffix of every (simplified) word is a key in a DAWG, so the words that
+    contain a substring are the keys that start with that substring: a prefix search.
+    Each key records which word it came from, where the suffix starts, and how long
+    the word is, so that matches can be ranked without going to the database.
+    """
+
+    # (wordform_id, offset of the suffix within the word, length of the word)
+    RECORD_FORMAT = "<IHH"
+
+    def __init__(self, words: Iterable[Tuple[str, int]]):
+        self._suffixes = dawg.RecordDAWG(
+            self.RECORD_FORMAT,
+            (
+                (simplified_text[offset:], (wordform_id, offset, len(simplified_text)))
+                for raw_text, wordform_id in words
+                if (simplified_text := AffixSearcher.to_simplified_form(raw_text))
+                for offset in range(len(simplified_text))
+            ),
+        )
+
+    def search_by_infix(self, infix: str) -> List[int]:
+        """
+        :return: the IDs of the Wordforms that contain the infix, best matches first.
+            Words that contain little else besides the infix come first; ties go to
+            the word where the infix appears earliest.
+        """
+        term = AffixSearcher.to_simplified_form(infix)
+        if not term:
+            return []
+
+        best_rank: Dict[int, Tuple[int, int]] = {}
+        for _, (wordform_id, offset, length) in self._suffixes.iteritems(term):
+            rank = (length - len(term), offset)
+            if wordform_id not in best_rank or rank < best_rank[wordform_id]:
+                best_rank[wordform_id] = rank
+
+        return sorted(best_rank, key=lambda wordform_id: best_rank[wordform_id])
+
+    def save(self, path: Path) -> None:
+        """
+        Saves the searcher to a file, which is replaced atomically.
+        """
+        save_dawg(self._suffixes, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "InfixSearcher":
+        """
+        Loads a searcher previously written with save().
+        """
+        searcher = cls.__new__(cls)
+        searcher._suffixes = dawg.RecordDAWG(cls.RECORD_FORMAT).load(os.fspath(path))
+        return searcher
+
+
 def _reverse(text: SimplifiedForm) -> SimplifiedForm:
     return SimplifiedForm(text[::-1])
@@ -1,27 +1,113 @@
 import logging
-from functools import cached_property
+from collections import defaultdict
+from contextvars import ContextVar
+from functools import cached_property, partial
 from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from django.apps import AppConfig, apps
-from django.db import OperationalError
+from django.conf import settings
 
 from utils import shared_res_dir
 from utils.cree_lev_dist import remove_cree_diacritics
-from .affix_search import AffixSearcher
+from .affix_search import AffixSearcher, InfixSearcher
+from .full_form_index import FullFormIndex
+from .generated_forms import GeneratedForms
+from .preverb_index import PreverbIndex
+from .query_classifier import QueryClassifier
+from .versioned_files import VersionedFiles
 
 logger = logging.getLogger(__name__)
 
 
-class APIConfig(AppConfig):
-    name = "API"
+class DictionaryResources:
+    """
+    Everything derived from one version of the dictionary. Each resource is loaded
+    (or built) on first use.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
 
     @cached_property
     def cree_affix_searcher(self) -> AffixSearcher:
-        return AffixSearcher(fetch_cree_lemmas_with_ids())
+        return AFFIX_SEARCHER_FILES["cree"].load_or_build(self.version)
 
     @cached_property
     def english_affix_searcher(self) -> AffixSearcher:
-        return AffixSearcher(fetch_english_keywords_with_ids())
+        return AFFIX_SEARCHER_FILES["english"].load_or_build(self.version)
+
+    @cached_property
+    def cree_infix_searcher(self) -> InfixSearcher:
+        return INFIX_SEARCHER_FILES["cree"].load_or_build(self.version)
+
+    @cached_property
+    def english_infix_searcher(self) -> InfixSearcher:
+        return INFIX_SEARCHER_FILES["english"].load_or_build(self.version)
+
+    @cached_property
+    def preverb_index(self) -> PreverbIndex:
+        return PreverbIndex(fetch_preverbs_with_ids(), self.version)
+
+    @cached_property
+    def full_form_index(self) -> FullFormIndex:
+        return FULL_FORM_INDEX_FILES.load_or_build(self.version)
+
+    @cached_property
+    def generated_forms(self) -> GeneratedForms:
+        return GENERATED_FORMS_FILES.load_or_build(self.version)
+
+    @cached_property
+    def query_classifier(self) -> QueryClassifier:
+        return QUERY_CLASSIFIER_FILES.load_or_build(self.version)
+
+
+# The resources of the version checked during the current request (empty until it's
+# checked), so that the version is read once per request; None outside of requests.
+# See dictionary_version_middleware().
+_request_resources: ContextVar[Optional[List[DictionaryResources]]] = ContextVar(
+    "request_resources", default=None
+)
+
+
+class APIConfig(AppConfig):
+    name = "API"
+
+    _dictionary_resources: Optional[DictionaryResources] = None
+
+    def dictionary_resources(self) -> DictionaryResources:
+        """
+        The resources derived from the dictionary, e.g., the preverb index.
+
+        This doesn't check whether a new dictionary has been imported since they were
+        loaded: searches call check_dictionary_version() once, before they start.
+        """
+        if self._dictionary_resources is None:
+            return self.check_dictionary_version()
+        return self._dictionary_resources
+
+    def check_dictionary_version(self) -> DictionaryResources:
+        """
+        Forgets the resources of the previous dictionary when a new one has been
+        imported, so that they're loaded again for the new one. Costs one database
+        query -- but only the first time during a request.
+        """
+        from .models import DictionaryVersion
+
+        checked = _request_resources.get()
+        if checked:
+            return checked[0]
+
+        version = DictionaryVersion.current()
+        resources = self._dictionary_resources
+        if resources is None or resources.version != version:
+            if resources is not None:
+                forget_previous_preverbs()
+            resources = self._dictionary_resources = DictionaryResources(version)
+
+        if checked is not None:
+            checked.append(resources)
+        return resources
 
     def ready(self) -> None:
         # FIXME don’t use this method, it gets called during startup of *every*
@@ -38,7 +124,6 @@ class APIConfig(AppConfig):
         """
         This function is called when you restart dev server or touch wsgi.py
         """
-        initialize_preverb_search()
         read_morpheme_rankings()
 
     @classmethod
@@ -51,32 +136,56 @@ class APIConfig(AppConfig):
         return apps.get_app_config(cls.name)
 
 
-def initialize_preverb_search():
+def dictionary_version_middleware(get_response):
+    """
+    Checks the dictionary version at most once per request: the search result cache,
+    the searches, and the paradigms of a request all use the same version.
+    """
+
+    def middleware(request):
+        token = _request_resources.set([])
+        try:
+            return get_response(request)
+        finally:
+            _request_resources.reset(token)
+
+    return middleware
+
+
+def fetch_preverbs_with_ids():
+    """
+    Return pairs of preverbs with their corresponding Wordform IDs.
+
+    Preverbs that are only defined by the MD dictionary are left out.
+    """
     from django.db.models import Q
 
-    from .models import Wordform
+    from .models import Definition
 
-    # Hashing to speed up exhaustive preverb matching
-    # so that we won't need to search from the database every time the user searches for a preverb or when the user
-    # query contains a preverb
     # An all inclusive filtering mechanism is inflectional_category=IPV OR pos="IPV". Don't rely on a single one
     # due to the inconsistent labelling in the source crkeng.xml.
     # e.g. for preverb "pe", the source gives pos=Ipc ic=IPV.
     # For "sa", the source gives pos=IPV ic="" (unspecified)
     # after https://github.com/UAlbertaALTLab/cree-intelligent-dictionary/pull/262
     # many preverbs are normalized so that both inflectional_category and pos are set to IPV.
-    try:
-        for preverb_wordform in Wordform.objects.filter(
-            Q(inflectional_category="IPV") | Q(pos="IPV")
-        ):
-            if not preverb_wordform.md_only:
-                Wordform.PREVERB_ASCII_LOOKUP[
-                    remove_cree_diacritics(preverb_wordform.text.strip("-"))
-                ].add(preverb_wordform)
-    except OperationalError:
-        # the ready function gets called during `$ manage-db import` when one builds the database from scratch
-        # At that time, while the migrations are not applied, Wordform tables does not exist.
-        pass
+    definitions = Definition.objects.filter(
+        Q(wordform__inflectional_category="IPV") | Q(wordform__pos="IPV")
+    ).values_list("wordform__text", "wordform__id", "raw_source_ids")
+
+    for text, wordform_id, raw_source_ids in definitions:
+        if set(Definition(raw_source_ids=raw_source_ids).source_ids) - {"MD"}:
+            yield text, wordform_id
+
+
+def forget_previous_preverbs():
+    """
+    Forgets the analysis breakdowns, which refer to the preverbs of the previous
+    dictionary.
+    """
+    from .search import breakdown_analysis, breakdown_tags
+
+    breakdown_analysis.cache_clear()
+    breakdown_tags.cache_clear()
 
 
 def read_morpheme_rankings():
@@ -109,3 +218,237 @@ def fetch_cree_lemmas_with_ids():
     from .models import Wordform
 
     return Wordform.objects.filter(is_lemma=True).values_list("text", "id")
+
+
+def fetch_affix_search_scores() -> Dict[int, Tuple[int, int]]:
+    """
+    How good a match each wordform is in affix searches, as (lemma status, corpus
+    frequency): lemmas that the FST can analyze come before the rest, and then, the
+    most frequent ones first. The corpus frequency of a lemma adds up the frequencies
+    of all of its inflections in attested-wordforms.txt.
+    """
+    from utils.paradigm_filler import import_frequency
+
+    from .models import Wordform
+
+    attested = import_frequency()
+    corpus_frequency: Dict[int, int] = defaultdict(int)
+    # (only lemmas are matched by affix searches)
+    lemma_status: Dict[int, int] = {}
+    for (
+        wordform_id,
+        lemma_id,
+        analysis,
+        is_lemma,
+        as_is,
+    ) in Wordform.objects.values_list(
+        "id", "lemma_id", "analysis", "is_lemma", "as_is"
+    ):
+        corpus_frequency[lemma_id] += attested.get(analysis, 0)
+        if is_lemma:
+            lemma_status[wordform_id] = 0 if as_is else 1
+
+    return {
+        wordform_id: (status, corpus_frequency[wordform_id])
+        for wordform_id, status in lemma_status.items()
+    }
+
+
+# How to fetch the (text, wordform ID) pairs for each affix searcher:
+_affix_searcher_words = {
+    "cree": fetch_cree_lemmas_with_ids,
+    "english": fetch_english_keywords_with_ids,
+}
+
+
+def build_affix_searcher(name: str) -> AffixSearcher:
+    return AffixSearcher(
+        _affix_searcher_words[name](),
+        fetch_affix_search_scores(),
+        settings.AFFIX_SEARCH_MAX_RESULTS,
+    )
+
+
+def build_infix_searcher(name: str) -> InfixSearcher:
+    return InfixSearcher(_affix_searcher_words[name]())
+
+
+def build_full_form_index() -> FullFormIndex:
+    """
+    Analyzes the text of every wordform in the database with the FST, and indexes
+    those whose analyses are all in the database.
+    """
+    from CreeDictionary import hfstol
+
+    from .models import Wordform
+
+    wordforms = list(
+        Wordform.objects.filter(as_is=False).values_list("id", "text", "analysis")
+    )
+    texts = set(Wordform.objects.values_list("text", flat=True))
+    fst_analyses = {
+        text: {a.concatenate() for a in analyses}
+        for text, analyses in hfstol.analyze_uncached(texts).items()
+    }
+    return FullFormIndex.build(wordforms, fst_analyses)
+
+
+def build_query_classifier() -> QueryClassifier:
+    """
+    Collects the characters that a Cree query can have -- the ones that the FST
+    accepts, and the ones in the wordforms of the dictionary -- and the English
+    keywords.
+    """
+    from CreeDictionary import hfstol
+
+    from .models import EnglishKeyword, Wordform
+
+    characters = "".join(
+        [
+            *hfstol.analyzer_input_symbols(),
+            *Wordform.objects.values_list("text", flat=True).distinct(),
+        ]
+    )
+    # (affix searches are case and diacritic insensitive)
+    cree_characters = set(characters) | set(remove_cree_diacritics(characters.lower()))
+
+    return QueryClassifier(
+        cree_characters,
+        EnglishKeyword.objects.values_list("text", flat=True).distinct(),
+    )
+
+
+def _top_results() -> str:
+    return f"top{settings.AFFIX_SEARCH_MAX_RESULTS}"
+
+
+def _analyzer_hash() -> Tuple[str]:
+    from CreeDictionary import hfstol
+
+    return (hfstol.analyzer_hash()[:16],)
+
+
+def _generator_hash() -> Tuple[str]:
+    from CreeDictionary import hfstol
+
+    return (hfstol.generator_hash()[:16],)
+
+
+# The files that each resource is saved to, e.g.,
+#
+#   db.cree-affixes.<version>.top10.prefixes.dawg
+#   db.cree-affixes.<version>.top10.suffixes.dawg
+#   db.cree-infixes.<version>.dawg
+#   db.full-forms.<version>.<analyzer FST hash>.dawg
+#   db.generated-forms.<version>.<generator FST hash>.dawg
+#   db.query-classifier.<version>.<analyzer FST hash>.cree-characters.dawg
+#   db.query-classifier.<version>.<analyzer FST hash>.english-keywords.dawg
+AFFIX_SEARCHER_FILES: Dict[str, VersionedFiles[AffixSearcher]] = {
+    name: VersionedFiles(
+        f"{name}-affixes",
+        build=partial(build_affix_searcher, name),
+        load=AffixSearcher.load,
+        save=AffixSearcher.save,
+        names=lambda: (f"{_top_results()}.prefixes", f"{_top_results()}.suffixes"),
+    )
+    for name in _affix_searcher_words
+}
+INFIX_SEARCHER_FILES: Dict[str, VersionedFiles[InfixSearcher]] = {
+    name: VersionedFiles(
+        f"{name}-infixes",
+        build=partial(build_infix_searcher, name),
+        load=InfixSearcher.load,
+        save=InfixSearcher.save,
+    )
+    for name in _affix_searcher_words
+}
+# Building the full form index analyzes every wordform in the database, which takes
+# far too long for a request: it's built at import (or by the savefullformindex
+# command). Until then, every query is analyzed by the FST.
+FULL_FORM_INDEX_FILES = VersionedFiles(
+    "full-forms",
+    build=build_full_form_index,
+    load=FullFormIndex.load,
+    save=FullFormIndex.save,
+    names=_analyzer_hash,
+    if_missing=lambda: FullFormIndex([]),
+)
+# The generated forms are only saved at import, when the generator whose hash names
+# the file has just generated them: the wordforms in the database may have been
+# generated by another version of the FST. Until they're saved, every form is
+# generated again.
+GENERATED_FORMS_FILES: VersionedFiles[GeneratedForms] = VersionedFiles(
+    "generated-forms",
+    build=None,
+    load=GeneratedForms.load,
+    save=GeneratedForms.save,
+    names=_generator_hash,
+    if_missing=lambda: GeneratedForms([]),
+)
+QUERY_CLASSIFIER_FILES = VersionedFiles(
+    "query-classifier",
+    build=build_query_classifier,
+    load=QueryClassifier.load,
+    save=QueryClassifier.save,
+    names=lambda: tuple(
+        f"{_analyzer_hash()[0]}.{name}"
+        for name in ("cree-characters", "english-keywords")
+    ),
+)
+
+
+def save_affix_searchers() -> None:
+    """
+    Builds and saves all of the affix and infix searchers for the current dictionary
+    version, so that they can be loaded instead of built. Called after importing a
+    dictionary.
+    """
+    from .models import DictionaryVersion
+
+    version = DictionaryVersion.current()
+    if AFFIX_SEARCHER_FILES["cree"].paths(version) is None:
+        return
+
+    scores = fetch_affix_search_scores()
+    for name, fetch_words in _affix_searcher_words.items():
+        words = list(fetch_words())
+        AFFIX_SEARCHER_FILES[name].save(
+            AffixSearcher(words, scores, settings.AFFIX_SEARCH_MAX_RESULTS), version
+        )
+        INFIX_SEARCHER_FILES[name].save(InfixSearcher(words), version)
+
+
+def save_full_form_index() -> None:
+    """
+    Builds and saves the full form index for the current dictionary version. Called
+    after importing a dictionary.
+    """
+    from .models import DictionaryVersion
+
+    FULL_FORM_INDEX_FILES.build_and_save(DictionaryVersion.current())
+
+
+def save_query_classifier() -> None:
+    """
+    Builds and saves the query classifier for the current dictionary version. Called
+    after importing a dictionary.
+    """
+    from .models import DictionaryVersion
+
+    QUERY_CLASSIFIER_FILES.build_and_save(DictionaryVersion.current())
+
+
+def save_generated_forms(forms: Iterable[Tuple[str, str]]) -> None:
+    """
+    Saves the generated forms for the current dictionary version. Called after
+    importing a dictionary.
+
+    :param forms: the (analysis, form) pairs generated during the import
+    """
+    from .models import DictionaryVersion
+
+    version = DictionaryVersion.current()
+    if GENERATED_FORMS_FILES.paths(version) is None:
+        return
+
+    GENERATED_FORMS_FILES.save(GeneratedForms(forms), version)
@@ -0,0 +1,107 @@
+import os
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+import dawg
+from utils.types import ConcatAnalysis
+
+from .versioned_files import save_dawg
+
+
+class FullFormIndex:
+    """
+    Maps the text of a wordform in the database to the analyses that the FST gives
+    it, and to the wordforms with those analyses -- but only when every one of those
+    analyses is in the database.
+
+    For such texts, a search gets exactly what analyzing the text with the FST and
+    matching the analyses in the database would get, without running the FST. Other
+    texts (e.g., with initial change, reduplication, or preverbs outside of the
+    paradigm tables) are not in the index.
+    """
+
+    # Each key is associated with (wordform_id, analysis) records; the ID is packed
+    # as an unsigned 32-bit integer, followed by the analysis in UTF-8:
+    ID_FORMAT = struct.Struct("<I")
+
+    def __init__(self, entries: Iterable[Tuple[str, int, ConcatAnalysis]]):
+        """
+        :param entries: (text, wordform ID, analysis) of every wordform with an
+            analysis of the text
+        """
+        self._forms = dawg.BytesDAWG(
+            (text, self.ID_FORMAT.pack(wordform_id) + analysis.encode("UTF-8"))
+            for text, wordform_id, analysis in entries
+        )
+
+    @classmethod
+    def build(
+        cls,
+        wordforms: Iterable[Tuple[int, str, str]],
+        fst_analyses: Mapping[str, Set[ConcatAnalysis]],
+    ) -> "FullFormIndex":
+        """
+        :param wordforms: (ID, text, analysis) of every wordform in the database that a
+            search can match by its analysis
+        :param fst_analyses: the analyses that the FST gives each text
+
+        >>> index = FullFormIndex.build(
+        ...     [(1, "nipâw", "nipâw+V+AI+Ind+3Sg"), (2, "nipâwak", "nipâw+V+AI+Ind+3Pl")],
+        ...     {"nipâw": {"nipâw+V+AI+Ind+3Sg"},
+        ...      "nipâwak": {"nipâw+V+AI+Ind+3Pl", "nipâw+V+AI+Imp+2Pl"}},
+        ... )
+        >>> index.get("nipâw")
+        [(1, 'nipâw+V+AI+Ind+3Sg')]
+        >>> index.get("nipâwak") is None  # the imperative isn't in the database
+        True
+        """
+        ids_by_analysis: Dict[str, List[int]] = defaultdict(list)
+        for wordform_id, _, analysis in wordforms:
+            ids_by_analysis[analysis].append(wordform_id)
+
+        def entries():
+            for text, analyses in fst_analyses.items():
+                if not analyses or any(a not in ids_by_analysis for a in analyses):
+                    continue
+                for analysis in analyses:
+                    for wordform_id in ids_by_analysis[analysis]:
+                        yield text, wordform_id, analysis
+
+        return cls(entries())
+
+    def get(self, text: str) -> Optional[List[Tuple[int, ConcatAnalysis]]]:
+        """
+        :return: the (wordform ID, analysis) pairs matching the text, or None when the
+            text has to be analyzed by the FST
+        """
+        if text not in self._forms:
+            return None
+
+        id_size = self.ID_FORMAT.size
+        return [
+            (
+                self.ID_FORMAT.unpack(record[:id_size])[0],
+                ConcatAnalysis(record[id_size:].decode("UTF-8")),
+            )
+            for record in self._forms[text]
+        ]
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._forms
+
+    def save(self, path: Path) -> None:
+        """
+        Saves the index to a file, atomically.
+        """
+        save_dawg(self._forms, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "FullFormIndex":
+        """
+        Loads an index previously written with save().
+        """
+        index = cls.__new__(cls)
+        index._forms = dawg.BytesDAWG().load(os.fspath(path))
+        return index
@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+from typing import FrozenSet, Iterable, Iterator, Mapping, Tuple
+
+import dawg
+from utils.types import ConcatAnalysis
+
+from .versioned_files import save_dawg
+
+
+class GeneratedForms(Mapping[ConcatAnalysis, FrozenSet[str]]):
+    """
+    The forms that the strict generator gave every analysis when the dictionary was
+    imported, so that they can be looked up instead of generated again.
+
+    Analyses that weren't generated at import (e.g., with initial change or preverbs
+    outside of the paradigm tables) are not in the mapping.
+
+    >>> forms = GeneratedForms([("nipâw+V+AI+Ind+3Sg", "nipâw")])
+    >>> forms["nipâw+V+AI+Ind+3Sg"]
+    frozenset({'nipâw'})
+    >>> forms.get("IC+nipâw+V+AI+Cnj+3Sg") is None
+    True
+    """
+
+    def __init__(self, forms: Iterable[Tuple[str, str]]):
+        """
+        :param forms: every (analysis, generated form) pair
+        """
+        self._forms = dawg.BytesDAWG(
+            (analysis, form.encode("UTF-8")) for analysis, form in forms
+        )
+
+    def __getitem__(self, analysis: ConcatAnalysis) -> FrozenSet[str]:
+        if analysis not in self._forms:
+            raise KeyError(analysis)
+        return frozenset(form.decode("UTF-8") for form in self._forms[analysis])
+
+    def __contains__(self, analysis: object) -> bool:
+        return isinstance(analysis, str) and analysis in self._forms
+
+    def __iter__(self) -> Iterator[ConcatAnalysis]:
+        # keys() repeats an analysis for each of its forms:
+        previous = None
+        for analysis in self._forms.iterkeys():
+            if analysis != previous:
+                yield ConcatAnalysis(analysis)
+            previous = analysis
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def save(self, path: Path) -> None:
+        """
+        Saves the forms to a file, atomically.
+        """
+        save_dawg(self._forms, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "GeneratedForms":
+        """
+        Loads forms previously written with save().
+        """
+        forms = cls.__new__(cls)
+        forms._forms = dawg.BytesDAWG().load(os.fspath(path))
+        return forms
@@ -1,4 +1,4 @@
-# Generated by Django 2.2.15 on 2020-10-07 02:43
+# Generated by Django 2.2.28 on 2026-10-18 19:00
 
 from django.db import migrations, models
 import django.db.models.deletion
@@ -24,6 +24,13 @@ class Migration(migrations.Migration):
                 ('city', models.CharField(blank=True, help_text='What is the city of the publisher?', max_length=64)),
             ],
         ),
+        migrations.CreateModel(
+            name='DictionaryVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stamp', models.CharField(max_length=64)),
+            ],
+        ),
         migrations.CreateModel(
             name='Wordform',
             fields=[
@@ -35,6 +42,12 @@ class Migration(migrations.Migration):
                 ('is_lemma', models.BooleanField(default=False, help_text="The wordform is chosen as lemma. This field defaults to true if according to fst the wordform is not analyzable or it's ambiguous")),
                 ('as_is', models.BooleanField(default=False, help_text='The lemma of this wordform is not determined during the importing process.is_lemma defaults to true and lemma field defaults to self')),
                 ('stem', models.CharField(blank=True, max_length=128)),
+                ('fst_lemma', models.CharField(blank=True, editable=False, help_text='The lemma in the analysis, e.g. nipâw', max_length=50)),
+                ('fst_word_class', models.CharField(blank=True, choices=[('NA', 'NA'), ('NAD', 'NAD'), ('NI', 'NI'), ('NID', 'NID'), ('VAI', 'VAI'), ('VII', 'VII'), ('VTA', 'VTA'), ('VTI', 'VTI'), ('IPC', 'IPC'), ('IPV', 'IPV'), ('PRON', 'PRON'), ('', '')], editable=False, help_text='The word class in the analysis, e.g. VAI', max_length=4)),
+                ('prefix_tags', models.CharField(blank=True, editable=False, help_text='The tags before the lemma, e.g. PV/e+IC', max_length=50)),
+                ('suffix_tags', models.CharField(blank=True, editable=False, help_text='The tags after the lemma, e.g. V+AI+Cnj+3Sg', max_length=50)),
+                ('homograph_disambiguator', models.CharField(blank=True, editable=False, help_text='The least strict field that tells this lemma apart from the other wordforms with the same text (pos, inflectional_category, analysis, or id); empty if the text is enough', max_length=21)),
+                ('lemma_url', models.CharField(blank=True, editable=False, help_text="The URL of the lemma's page, after the script prefix, e.g. word/nip%C3%A2w/?pos=V", max_length=512)),
                 ('lemma', models.ForeignKey(help_text='The identified lemma of this wordform. Defaults to self', on_delete=django.db.models.deletion.CASCADE, related_name='inflections', to='API.Wordform')),
             ],
         ),
@@ -51,6 +64,7 @@ class Migration(migrations.Migration):
             fields=[
                 ('id', models.PositiveIntegerField(primary_key=True, serialize=False)),
                 ('text', models.CharField(max_length=200)),
+                ('raw_source_ids', models.CharField(default='', help_text='Sorted abbreviations of the cited dictionary sources, separated by semicolons', max_length=64)),
                 ('citations', models.ManyToManyField(to='API.DictionarySource')),
                 ('wordform', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='definitions', to='API.Wordform')),
             ],
@@ -63,8 +77,20 @@ class Migration(migrations.Migration):
             model_name='wordform',
             index=models.Index(fields=['text'], name='API_wordfor_text_5ba76a_idx'),
         ),
+        migrations.AddIndex(
+            model_name='wordform',
+            index=models.Index(fields=['fst_lemma', 'fst_word_class'], name='API_wordfor_fst_lem_ddffa1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wordform',
+            index=models.Index(fields=['fst_word_class'], name='API_wordfor_fst_wor_32fa7c_idx'),
+        ),
         migrations.AddIndex(
             model_name='englishkeyword',
             index=models.Index(fields=['text'], name='API_english_text_16bd44_idx'),
         ),
+        migrations.AddIndex(
+            model_name='definition',
+            index=models.Index(fields=['raw_source_ids'], name='API_definit_raw_sou_68a182_idx'),
+        ),
     ]
@@ -1,15 +1,14 @@
 import logging
 import typing
-from collections import defaultdict
-from functools import lru_cache
-from typing import Dict, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
 from urllib.parse import quote
+from uuid import uuid4
 
 from django.db import models, transaction
 from django.db.models import Max
 from django.forms import model_to_dict
-from django.urls import reverse
-from django.utils.functional import cached_property
+from django.urls import get_script_prefix, reverse
 from paradigm import Layout
 from shared import expensive
 from sortedcontainers import SortedSet
@@ -19,9 +18,6 @@ from utils.types import FSTTag
 
 from .schema import SerializedDefinition, SerializedWordform
 
-# Don't start evicting cache entries until we've seen over this many unique definitions:
-MAX_SOURCE_ID_CACHE_ENTRIES = 4096
-
 # Avoid a runtime circular-dependency;
 # without this line,
 #  - model.py imports search.py; and,
@@ -32,14 +28,12 @@ if typing.TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# The fields, from least to most strict, that can tell a lemma apart from the other
+# wordforms with the same text (besides "id", which always does)
+HOMOGRAPH_DISAMBIGUATORS = ("pos", "inflectional_category", "analysis")
 
-class Wordform(models.Model):
-    # this is initialized upon app ready.
-    # this helps speed up preverb match
-    # will look like: {"pe": {...}, "e": {...}, "nitawi": {...}}
-    # pure MD content won't be included
-    PREVERB_ASCII_LOOKUP: Dict[str, Set["Wordform"]] = defaultdict(set)
 
+class Wordform(models.Model):
     # this is initialized upon app ready.
     MORPHEME_RANKINGS: Dict[str, float] = {}
 
@@ -50,13 +44,12 @@ class Wordform(models.Model):
          it's the least strict url that guarantees unique match in the database
         """
         assert self.is_lemma, "There is no page for non-lemmas"
-        lemma_url = reverse(
-            "cree-dictionary-index-with-lemma", kwargs={"lemma_text": self.text}
-        )
-        if self.homograph_disambiguator is not None:
-            lemma_url += f"?{self.homograph_disambiguator}={quote(str(getattr(self, self.homograph_disambiguator)))}"
-
-        return lemma_url
+        if not self.lemma_url:
+            # not imported:
+            Wordform.disambiguate_homographs(
+                [self, *Wordform.objects.filter(text=self.text).exclude(id=self.id)]
+            )
+        return get_script_prefix() + self.lemma_url
 
     def serialize(self) -> SerializedWordform:
         """
@@ -109,26 +102,52 @@ class Wordform(models.Model):
         tags = [FSTTag(t) for t in fst_tag_str.split("+")]
         return LABELS.emoji.get_longest(tags)
 
-    @cached_property
-    def homograph_disambiguator(self) -> Optional[str]:
+    @staticmethod
+    def disambiguate_homographs(wordforms: Iterable["Wordform"]) -> None:
         """
-        :return: the least strict field name that guarantees unique match together with the text field.
-            could be pos, inflectional_category, analysis, id or None when the text is enough to disambiguate
+        Fills in homograph_disambiguator and lemma_url of every lemma, in one pass.
+
+        wordforms must include every homograph of those lemmas, i.e., every wordform
+        with the same text.
         """
-        homographs = Wordform.objects.filter(text=self.text)
-        if homographs.count() == 1:
-            return None
-        for field in "pos", "inflectional_category", "analysis":
-            if homographs.filter(**{field: getattr(self, field)}).count() == 1:
-                return field
-        return "id"  # id always guarantees unique match
+        homographs: Dict[str, List[Wordform]] = defaultdict(list)
+        for wordform in wordforms:
+            homographs[wordform.text].append(wordform)
+
+        for text, same_text in homographs.items():
+            counts = {
+                field: Counter(getattr(wf, field) for wf in same_text)
+                for field in HOMOGRAPH_DISAMBIGUATORS
+            }
+            # the text alone is enough, unless there are homographs
+            lemma_url = reverse(
+                "cree-dictionary-index-with-lemma", kwargs={"lemma_text": text}
+            )[len(get_script_prefix()) :]
+
+            for wordform in same_text:
+                if not wordform.is_lemma:
+                    wordform.homograph_disambiguator = wordform.lemma_url = ""
+                    continue
+
+                disambiguator = ""
+                if len(same_text) > 1:
+                    disambiguator = "id"  # id always guarantees unique match
+                    for field in HOMOGRAPH_DISAMBIGUATORS:
+                        if counts[field][getattr(wordform, field)] == 1:
+                            disambiguator = field
+                            break
+
+                wordform.homograph_disambiguator = disambiguator
+                wordform.lemma_url = lemma_url
+                if disambiguator:
+                    value = quote(str(getattr(wordform, disambiguator)))
+                    wordform.lemma_url += f"?{disambiguator}={value}"
 
     # TODO: rename! it should not have an underscore!
     @property
     def word_class(self) -> Optional[WordClass]:
-        from_analysis = fst_analysis_parser.extract_word_class(self.analysis)
-        if from_analysis:
-            return from_analysis
+        if self.fst_word_class:
+            return WordClass(self.fst_word_class)
 
         # Can't get it from the analysis? Maybe its the (deprecated) part-of-speech?
         try:
@@ -142,9 +161,16 @@ class Wordform(models.Model):
         """
         :param size: How detail the paradigm table is
         """
-        wc = fst_analysis_parser.extract_word_class(self.analysis)
-        if wc is not None:
-            tables = expensive.paradigm_filler.fill_paradigm(self.text, wc, size)
+        from .apps import APIConfig
+
+        if self.fst_word_class:
+            resources = APIConfig.active_instance().check_dictionary_version()
+            tables = expensive.paradigm_filler.fill_paradigm(
+                self.text,
+                WordClass(self.fst_word_class),
+                size,
+                generated_forms=resources.generated_forms,
+            )
         else:
             tables = []
         return tables
@@ -212,12 +238,63 @@ class Wordform(models.Model):
         blank=True,
     )
 
+    # The analysis, parsed by parse_analysis() when the wordform is imported or saved.
+    # They are empty strings when the analysis can't be parsed.
+    # e.g. for the analysis PV/e+IC+nipâw+V+AI+Cnj+3Sg:
+    fst_lemma = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        help_text="The lemma in the analysis, e.g. nipâw",
+    )
+    WORD_CLASSES = [(wc.value,) * 2 for wc in WordClass] + [("", "")]
+    fst_word_class = models.CharField(
+        max_length=4,
+        blank=True,
+        editable=False,
+        choices=WORD_CLASSES,
+        help_text="The word class in the analysis, e.g. VAI",
+    )
+    prefix_tags = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        help_text="The tags before the lemma, e.g. PV/e+IC",
+    )
+    suffix_tags = models.CharField(
+        max_length=50,
+        blank=True,
+        editable=False,
+        help_text="The tags after the lemma, e.g. V+AI+Cnj+3Sg",
+    )
+
+    # Filled in by disambiguate_homographs() when the wordform is imported.
+    # They are empty strings for non-lemmas, and for wordforms saved after the import.
+    homograph_disambiguator = models.CharField(
+        max_length=21,
+        blank=True,
+        editable=False,
+        help_text="The least strict field that tells this lemma apart from the other "
+        "wordforms with the same text (pos, inflectional_category, analysis, or id); "
+        "empty if the text is enough",
+    )
+    lemma_url = models.CharField(
+        max_length=512,
+        blank=True,
+        editable=False,
+        help_text="The URL of the lemma's page, after the script prefix, "
+        "e.g. word/nip%C3%A2w/?pos=V",
+    )
+
     class Meta:
         indexes = [
             # analysis is for faster user query (see search.py)
             models.Index(fields=["analysis"]),
             # text index benefits fast wordform matching (see search.py)
             models.Index(fields=["text"]),
+            # for finding wordforms by their lemma and word class
+            models.Index(fields=["fst_lemma", "fst_word_class"]),
+            models.Index(fields=["fst_word_class"]),
         ]
 
     def __str__(self):
@@ -247,8 +324,39 @@ class Wordform(models.Model):
         if self.is_lemma:
             self.lemma_id = self.id
 
+        self.parse_analysis()
+
+        # Homographs are only disambiguated at import; get_absolute_url() works out
+        # the URL of anything saved otherwise.
+        self.homograph_disambiguator = self.lemma_url = ""
+
         super(Wordform, self).save(*args, **kwargs)
 
+    def parse_analysis(self) -> None:
+        """
+        Fills in the fields parsed from the analysis: fst_lemma, fst_word_class,
+        prefix_tags, and suffix_tags.
+
+        bulk_create() doesn't call save(), so the importer calls this itself.
+        """
+        try:
+            prefixes, lemma, suffixes = fst_analysis_parser.partition_analysis(
+                self.analysis
+            )
+        except ValueError:
+            self.fst_lemma = self.fst_word_class = ""
+            self.prefix_tags = self.suffix_tags = ""
+            return
+
+        word_class = fst_analysis_parser.extract_word_class(self.analysis)
+        if word_class is None:
+            logger.warning("unknown word class in analysis %s", self.analysis)
+
+        self.fst_lemma = lemma
+        self.fst_word_class = word_class.value if word_class is not None else ""
+        self.prefix_tags = "+".join(prefixes)
+        self.suffix_tags = "+".join(suffixes)
+
     @staticmethod
     def search_with_affixes(query: str) -> SortedSet["SearchResult"]:
         """
@@ -257,12 +365,24 @@ class Wordform(models.Model):
          - the definition keyword text
          - affixes of the wordform text
          - affixes of the definition keyword text
+         - the closest Cree lemmas, if the query can't be analyzed (e.g., misspelled)
         """
         from .search import WordformSearchWithAffixes
 
         search = WordformSearchWithAffixes(query)
         return search.perform()
 
+    @staticmethod
+    def search_with_infixes(query: str) -> SortedSet["SearchResult"]:
+        """
+        Same as search_with_affixes(), but also matches wordforms and definition
+        keywords that contain the query anywhere, e.g., "pimohtê" in "kî-pimohtêw".
+        """
+        from .search import WordformSearchWithInfixes
+
+        search = WordformSearchWithInfixes(query)
+        return search.perform()
+
     @staticmethod
     def simple_search(query: str) -> SortedSet["SearchResult"]:
         """
@@ -350,11 +470,29 @@ class Definition(models.Model):
     # A definition **cites** one or more dictionary sources.
     citations = models.ManyToManyField(DictionarySource)
 
+    # The abbreviations of the cited sources, sorted and joined with
+    # SOURCE_ID_SEPARATOR, e.g., "CW;MD". This duplicates `citations`, but it means
+    # that the sources are loaded with the definition itself -- no joins needed!
+    raw_source_ids = models.CharField(
+        max_length=64,
+        default="",
+        help_text="Sorted abbreviations of the cited dictionary sources, "
+        "separated by semicolons",
+    )
+
     # A definition defines a particular wordform
     wordform = models.ForeignKey(
         Wordform, on_delete=models.CASCADE, related_name="definitions"
     )
 
+    SOURCE_ID_SEPARATOR = ";"
+
+    class Meta:
+        indexes = [
+            # e.g., find the definitions that cite only "MD", without joins
+            models.Index(fields=["raw_source_ids"]),
+        ]
+
     # Why this property exists:
     # because DictionarySource should be its own model, but most code only
     # cares about the source IDs. So this removes the coupling to how sources
@@ -363,8 +501,25 @@ class Definition(models.Model):
     def source_ids(self) -> Tuple[str, ...]:
         """
         A tuple of the source IDs that this definition cites.
+
+        >>> Definition(raw_source_ids="CW;MD").source_ids
+        ('CW', 'MD')
+        >>> Definition(raw_source_ids="").source_ids
+        ()
         """
-        return get_all_source_ids_for_definition(self.id)
+        if not self.raw_source_ids:
+            return ()
+        return tuple(self.raw_source_ids.split(self.SOURCE_ID_SEPARATOR))
+
+    @classmethod
+    def join_source_ids(cls, source_ids: Iterable[str]) -> str:
+        """
+        Produces the value of raw_source_ids for the given source IDs.
+
+        >>> Definition.join_source_ids({"MD", "CW"})
+        'CW;MD'
+        """
+        return cls.SOURCE_ID_SEPARATOR.join(sorted(source_ids))
 
     def serialize(self) -> SerializedDefinition:
         """
@@ -380,6 +535,7 @@ class EnglishKeyword(models.Model):
     # override pk to allow use of bulk_create
     id = models.PositiveIntegerField(primary_key=True)
 
+    # Always lowercase, so that keywords can be matched exactly -- and with the index!
     text = models.CharField(max_length=20)
 
     # N.B., this says "lemma", but it can actually be ANY Wordform
@@ -395,16 +551,45 @@ class EnglishKeyword(models.Model):
         indexes = [models.Index(fields=["text"])]
 
 
-@lru_cache(maxsize=MAX_SOURCE_ID_CACHE_ENTRIES)
-def get_all_source_ids_for_definition(definition_id: int) -> Tuple[str, ...]:
+class DictionaryVersion(models.Model):
     """
-    Returns all of the dictionary source IDs (e.g., "MD", "CW").
-    This is cached so to reduce the amount of duplicate queries made to the database,
-    especially during serialization.
+    A stamp that changes every time a dictionary is imported.
+
+    Anything derived from the contents of the dictionary (e.g., cached search
+    results) should be namespaced by the current version, so that a re-import
+    invalidates it automatically.
 
-    See:
-     - https://github.com/UAlbertaALTLab/cree-intelligent-dictionary/pull/558
-     - https://github.com/UAlbertaALTLab/cree-intelligent-dictionary/issues/531
+    There is at most one row in this table.
     """
-    dfn = Definition.objects.get(pk=definition_id)
-    return tuple(sorted(source.abbrv for source in dfn.citations.all()))
+
+    stamp = models.CharField(max_length=64)
+
+    # The primary key of the one and only row:
+    SINGLETON_ID = 1
+
+    # The version of a dictionary imported before versions were stamped
+    UNVERSIONED = "unversioned"
+
+    @classmethod
+    def current(cls) -> str:
+        """
+        The stamp of the currently imported dictionary.
+        """
+        stamp = (
+            cls.objects.filter(id=cls.SINGLETON_ID)
+            .values_list("stamp", flat=True)
+            .first()
+        )
+        return stamp if stamp is not None else cls.UNVERSIONED
+
+    @classmethod
+    def stamp_new_version(cls) -> str:
+        """
+        Marks the dictionary as changed. Returns the new stamp.
+        """
+        stamp = uuid4().hex
+        cls.objects.update_or_create(id=cls.SINGLETON_ID, defaults={"stamp": stamp})
+        return stamp
+
+    def __str__(self):
+        return self.stamp
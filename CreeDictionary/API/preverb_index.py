@@ -0,0 +1,45 @@
+from typing import Dict, Iterable, List, Tuple
+
+from utils.cree_lev_dist import remove_cree_diacritics
+
+
+class PreverbIndex:
+    """
+    Finds preverbs by their text, without circumflexes and the trailing dash, e.g.,
+    "nitawi" finds "nitawi-", and "pe" finds "pê-".
+
+    Only the IDs and the texts of the preverb wordforms are kept, so that the index
+    is small, and it doesn't hold on to any model instances.
+    """
+
+    def __init__(self, preverbs: Iterable[Tuple[str, int]], version: str):
+        """
+        :param preverbs: the text and the wordform ID of every preverb
+        :param version: the dictionary version that the preverbs come from
+        """
+        self.version = version
+
+        index: Dict[str, List[Tuple[str, int]]] = {}
+        for text, wordform_id in sorted(set(preverbs)):
+            key = remove_cree_diacritics(text.strip("-"))
+            index.setdefault(key, []).append((text, wordform_id))
+        self._index = {key: tuple(matches) for key, matches in index.items()}
+
+    def search(self, query: str) -> Tuple[Tuple[str, int], ...]:
+        """
+        :return: the text and the wordform ID of every preverb matching the query
+
+        >>> index = PreverbIndex([("pê-", 1), ("pe-", 2), ("nitawi-", 3)], "v1")
+        >>> index.search("pe-")
+        (('pe-', 2), ('pê-', 1))
+        >>> index.search("nitâwi")
+        (('nitawi-', 3),)
+        >>> index.search("kî")
+        ()
+        """
+        if query.endswith("-"):
+            query = query[:-1]
+        return self._index.get(remove_cree_diacritics(query), ())
+
+    def __len__(self) -> int:
+        return sum(len(matches) for matches in self._index.values())
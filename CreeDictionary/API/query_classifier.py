@@ -0,0 +1,160 @@
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Union
+
+import dawg
+from utils.cree_lev_dist import remove_cree_diacritics
+from utils.english_keyword_extraction import stem_keywords
+
+from .versioned_files import save_dawg
+
+
+class QueryRoute(NamedTuple):
+    """
+    Which searches a query could possibly have results from.
+    """
+
+    # whether to search Cree: the FST, the preverbs, and the Cree affixes
+    cree: bool
+    # the stemmed keywords of the query that are English keywords in the dictionary
+    english_keywords: FrozenSet[str]
+
+    @property
+    def english(self) -> bool:
+        return bool(self.english_keywords)
+
+    @property
+    def name(self) -> str:
+        if self.cree and self.english:
+            return "both"
+        elif self.cree:
+            return "cree"
+        elif self.english:
+            return "english"
+        return "neither"
+
+
+class QueryClassifier:
+    """
+    Cheaply tells apart queries that can only be Cree from queries that can only be
+    English, so that searches skip the other (expensive) half, e.g., "walk" never
+    goes through the FST, and "nipâw" never looks for English keywords.
+
+    It only rules out a language when searching it can't possibly find anything:
+
+     - Cree, when the query has a character that neither the analyzer FST nor any
+       wordform in the dictionary has (e.g., there's no "l" in Plains Cree). Syllabics
+       are transliterated to SRO before queries get here, so they look like Cree.
+     - English, when none of the stemmed keywords of the query are English keywords in
+       the dictionary.
+
+    Queries with only Cree characters that are also English keywords (e.g., "sit")
+    are searched in both.
+
+    >>> classifier = QueryClassifier(
+    ...     cree_characters="acehikmnopstwyâêîô- ", english_keywords=["sit", "walk"]
+    ... )
+    >>> classifier.classify("walk").name
+    'english'
+    >>> classifier.classify("nipâw").name
+    'cree'
+    >>> classifier.classify("sit").name
+    'both'
+    >>> classifier.classify("xyz").name
+    'neither'
+
+    Classifiers can be saved to and loaded from files, which is much faster than
+    collecting the characters and the keywords from the database.
+    """
+
+    def __init__(self, cree_characters: Iterable[str], english_keywords: Iterable[str]):
+        """
+        :param cree_characters: every character that a Cree query can have
+        :param english_keywords: every (stemmed) English keyword in the dictionary
+        """
+        self.cree_characters = frozenset(cree_characters)
+        self.english_keywords = dawg.DAWG(
+            keyword for keyword in english_keywords if keyword
+        )
+
+    def classify(self, query: str) -> QueryRoute:
+        """
+        :param query: a query in the internal form, e.g., "nipâw" or "walk"
+        """
+        return QueryRoute(
+            cree=self.could_be_cree(query),
+            english_keywords=frozenset(
+                keyword
+                for keyword in stem_keywords(query)
+                if keyword in self.english_keywords
+            ),
+        )
+
+    def could_be_cree(self, query: str) -> bool:
+        # Preverbs are matched without diacritics, so those count, too:
+        return all(
+            char in self.cree_characters
+            or remove_cree_diacritics(char) in self.cree_characters
+            for char in query
+        )
+
+    def save(self, cree_characters_path: Path, english_keywords_path: Path) -> None:
+        """
+        Saves the classifier to two files, each replaced atomically.
+        """
+        save_dawg(dawg.CompletionDAWG(self.cree_characters), cree_characters_path)
+        save_dawg(self.english_keywords, english_keywords_path)
+
+    @classmethod
+    def load(
+        cls, cree_characters_path: Path, english_keywords_path: Path
+    ) -> "QueryClassifier":
+        """
+        Loads a classifier previously written with save().
+        """
+        cree_characters = dawg.CompletionDAWG().load(os.fspath(cree_characters_path))
+        classifier = cls(cree_characters.keys(), english_keywords=())
+        classifier.english_keywords = dawg.DAWG().load(os.fspath(english_keywords_path))
+        return classifier
+
+
+class QueryRoutes:
+    """
+    Counts how many queries were routed to each search, e.g., to tell how often
+    searches skip the FST.
+
+    >>> routes = QueryRoutes()
+    >>> routes.count(QueryRoute(cree=True, english_keywords=frozenset()))
+    >>> routes.count(QueryRoute(cree=False, english_keywords=frozenset({"walk"})))
+    >>> routes.stats()["skipped_english_rate"]
+    0.5
+    """
+
+    def __init__(self):
+        # route name -> how many queries were routed there
+        self._routes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, route: QueryRoute) -> None:
+        with self._lock:
+            self._routes[route.name] += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        How many queries skipped the Cree search, the English search, or both.
+        """
+        with self._lock:
+            routes = Counter(self._routes)
+        queries = sum(routes.values())
+        skipped_cree = routes["english"] + routes["neither"]
+        skipped_english = routes["cree"] + routes["neither"]
+        return {
+            "queries": queries,
+            **{name: routes[name] for name in ("cree", "english", "both", "neither")},
+            "skipped_cree": skipped_cree,
+            "skipped_english": skipped_english,
+            "skipped_cree_rate": skipped_cree / queries if queries else 0.0,
+            "skipped_english_rate": skipped_english / queries if queries else 0.0,
+        }
@@ -2,13 +2,16 @@
 # -*- coding: UTF-8 -*-
 import logging
 import unicodedata
-from functools import cmp_to_key, partial
+from collections import defaultdict
+from functools import cached_property, lru_cache
 from itertools import chain
 from typing import (
-    Any,
     Callable,
+    Collection,
+    Dict,
     Iterable,
     List,
+    Mapping,
     NamedTuple,
     NewType,
     Optional,
@@ -19,23 +22,30 @@ from typing import (
 )
 
 import attr
-from API.affix_search import AffixSearcher
+from API.affix_search import AffixSearcher, InfixSearcher
+from API.full_form_index import FullFormIndex
+from API.query_classifier import QueryClassifier, QueryRoute, QueryRoutes
 from attr import attrs
 from cree_sro_syllabics import syllabics2sro
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import F, Q, prefetch_related_objects
 from sortedcontainers import SortedSet
 from typing_extensions import Protocol
-from utils import Language, PartOfSpeech, fst_analysis_parser, get_modified_distance
-from utils.cree_lev_dist import remove_cree_diacritics
-from utils.english_keyword_extraction import stem_keywords
+from utils import (
+    Language,
+    PartOfSpeech,
+    WordClass,
+    fst_analysis_parser,
+    get_modified_distance,
+    get_modified_distances,
+)
 from utils.fst_analysis_parser import LABELS, partition_analysis
-from utils.types import ConcatAnalysis, FSTTag, Label
+from utils.types import ConcatAnalysis, FSTLemma, FSTTag, Label
 
-from CreeDictionary import hfstol
+from CreeDictionary import hfstol, timing
 
 from .apps import APIConfig
-from .models import Definition, EnglishKeyword, Wordform
+from .models import Definition, Wordform
 from .schema import SerializedLinguisticTag, SerializedSearchResult
 
 # it's a str when the preverb does not exist in the database
@@ -185,10 +195,69 @@ class SearchResult:
         In itwêwina, these tags are derived from the suffix features exclusively.
         We chunk based on the English relabelleings!
         """
-        return tuple(
-            linguistic_tag_from_fst_tags(fst_tags)
-            for fst_tags in LABELS.english.chunk(self.raw_suffix_tags)
-        )
+        return relevant_tags_from_suffix_tags(self.raw_suffix_tags)
+
+
+class AnalysisBreakdown(NamedTuple):
+    """
+    What a search result shows about its analysis. It only depends on the analysis
+    string, so it's computed once per analysis (see breakdown_analysis()).
+    """
+
+    # user friendly linguistic breakdowns
+    linguistic_breakdown_head: Tuple[Label, ...]
+    linguistic_breakdown_tail: Tuple[Label, ...]
+    # The suffix tags, straight from the FST
+    raw_suffix_tags: Tuple[FSTTag, ...]
+    preverbs: Tuple[Preverb, ...]
+
+
+@lru_cache(maxsize=settings.ANALYSIS_BREAKDOWN_CACHE_SIZE)
+def breakdown_analysis(analysis: ConcatAnalysis) -> AnalysisBreakdown:
+    """
+    Relabels the tags of the analysis, and finds its preverbs.
+
+    The results are remembered for the most recent analyses. Wordforms in the
+    database have their tags parsed already; see breakdown_wordform().
+    """
+    head, tail = safe_partition_analysis(analysis)
+    return breakdown_tags("+".join(head), "+".join(tail))
+
+
+def breakdown_wordform(wordform: Wordform) -> AnalysisBreakdown:
+    """
+    Like breakdown_analysis(), but with the tags parsed when the wordform was imported.
+    """
+    return breakdown_tags(wordform.prefix_tags, wordform.suffix_tags)
+
+
+@lru_cache(maxsize=settings.ANALYSIS_BREAKDOWN_CACHE_SIZE)
+def breakdown_tags(prefix_tags: str, suffix_tags: str) -> AnalysisBreakdown:
+    """
+    :param prefix_tags: the tags before the lemma, joined by "+", e.g. "PV/e+IC"
+    :param suffix_tags: the tags after the lemma, joined by "+", e.g. "V+AI+Cnj+3Sg"
+    """
+    head = [FSTTag(tag) for tag in prefix_tags.split("+")] if prefix_tags else []
+    tail = [FSTTag(tag) for tag in suffix_tags.split("+")] if suffix_tags else []
+    return AnalysisBreakdown(
+        linguistic_breakdown_head=tuple(replace_user_friendly_tags(head)),
+        linguistic_breakdown_tail=tuple(replace_user_friendly_tags(tail)),
+        raw_suffix_tags=tuple(tail),
+        preverbs=get_preverbs_from_head_breakdown(head),
+    )
+
+
+@lru_cache(maxsize=settings.ANALYSIS_BREAKDOWN_CACHE_SIZE)
+def relevant_tags_from_suffix_tags(
+    raw_suffix_tags: Tuple[FSTTag, ...]
+) -> Tuple[LinguisticTag, ...]:
+    """
+    The suffix tags, chunked by their English relabellings.
+    """
+    return tuple(
+        linguistic_tag_from_fst_tags(fst_tags)
+        for fst_tags in LABELS.english.chunk(raw_suffix_tags)
+    )
 
 
 class CreeResult(NamedTuple):
@@ -255,16 +324,38 @@ class _BaseWordformSearch:
     def __init__(self, query: str):
         self.cleaned_query = to_internal_form(clean_query_text(query))
 
+    @cached_property
+    def route(self) -> QueryRoute:
+        """
+        Whether the query could be Cree, English, or both.
+        """
+        return classify_query(self.cleaned_query)
+
     def perform(self) -> SortedSet[SearchResult]:
         """
         Do the search
         :return: sorted search results
         """
+        APIConfig.active_instance().check_dictionary_version()
+
+        with timing.span("fetch"):
+            res = self.fetch_bilingual_results()
+        with timing.span("prefetch"):
+            prefetch_definitions(res)
+        with timing.span("sort"):
+            return self.sort_results(res)
 
-        res = self.fetch_bilingual_results()
-        results = SortedSet(key=sort_by_user_query(self.cleaned_query))
-        results |= self.prepare_cree_results(res.cree_results)
-        results |= self.prepare_english_results(res.english_results)
+    def sort_results(self, res: CreeAndEnglish) -> SortedSet[SearchResult]:
+        """
+        Creates the search results, sorted by how well they match the query.
+        """
+        cree_results = list(self.prepare_cree_results(res.cree_results))
+        english_results = list(self.prepare_english_results(res.english_results))
+        results = SortedSet(
+            key=sort_by_user_query(self.cleaned_query, ranked=cree_results)
+        )
+        results |= cree_results
+        results |= english_results
         return results
 
     def fetch_bilingual_results(self) -> CreeAndEnglish:
@@ -286,25 +377,21 @@ class _BaseWordformSearch:
                 is_lemma = False
                 definitions = ()
 
-            (
-                linguistic_breakdown_head,
-                linguistic_breakdown_tail,
-            ) = safe_partition_analysis(cree_result.analysis)
+            if isinstance(cree_result.normatized_cree, Wordform):
+                breakdown = breakdown_wordform(cree_result.normatized_cree)
+            else:
+                breakdown = breakdown_analysis(cree_result.analysis)
 
             # todo: tags
             yield SearchResult(
                 matched_cree=matched_cree,
                 is_lemma=is_lemma,
                 matched_by=Language.CREE,
-                linguistic_breakdown_head=tuple(
-                    replace_user_friendly_tags(linguistic_breakdown_head)
-                ),
-                linguistic_breakdown_tail=tuple(
-                    replace_user_friendly_tags(linguistic_breakdown_tail)
-                ),
-                raw_suffix_tags=tuple(linguistic_breakdown_tail),
+                linguistic_breakdown_head=breakdown.linguistic_breakdown_head,
+                linguistic_breakdown_tail=breakdown.linguistic_breakdown_tail,
+                raw_suffix_tags=breakdown.raw_suffix_tags,
                 lemma_wordform=cree_result.lemma,
-                preverbs=get_preverbs_from_head_breakdown(linguistic_breakdown_head),
+                preverbs=breakdown.preverbs,
                 reduplication_tags=(),
                 initial_change_tags=(),
                 definitions=definitions,
@@ -314,26 +401,19 @@ class _BaseWordformSearch:
         self, english_results: Set[EnglishResult]
     ) -> Iterable[SearchResult]:
         for result in english_results:
-            (
-                linguistic_breakdown_head,
-                linguistic_breakdown_tail,
-            ) = safe_partition_analysis(result.lemma.analysis)
+            breakdown = breakdown_wordform(result.lemma)
 
             yield SearchResult(
                 matched_cree=result.matched_cree.text,
                 is_lemma=result.matched_cree.is_lemma,
                 matched_by=Language.ENGLISH,
                 lemma_wordform=result.matched_cree.lemma,
-                preverbs=get_preverbs_from_head_breakdown(linguistic_breakdown_head),
+                preverbs=breakdown.preverbs,
                 reduplication_tags=(),
                 initial_change_tags=(),
-                linguistic_breakdown_head=tuple(
-                    replace_user_friendly_tags(linguistic_breakdown_head)
-                ),
-                linguistic_breakdown_tail=tuple(
-                    replace_user_friendly_tags(linguistic_breakdown_tail)
-                ),
-                raw_suffix_tags=tuple(linguistic_breakdown_tail),
+                linguistic_breakdown_head=breakdown.linguistic_breakdown_head,
+                linguistic_breakdown_tail=breakdown.linguistic_breakdown_tail,
+                raw_suffix_tags=breakdown.raw_suffix_tags,
                 definitions=tuple(result.matched_cree.definitions.all()),
                 # todo: current EnglishKeyword is bound to
                 #       lemmas, whose definitions are guaranteed in the database.
@@ -342,22 +422,108 @@ class _BaseWordformSearch:
             )
 
 
+def prefetch_definitions(*cree_and_english: CreeAndEnglish) -> None:
+    """
+    Loads the definitions of every Wordform that the search results will touch, in a
+    single query.
+
+    Without this, each result issues its own query for `definitions.all()`.
+    """
+    wordforms: List[Wordform] = []
+    for res in cree_and_english:
+        for cree_result in res.cree_results:
+            if isinstance(cree_result.normatized_cree, Wordform):
+                wordforms.append(cree_result.normatized_cree)
+            wordforms.append(cree_result.lemma)
+        for english_result in res.english_results:
+            wordforms.append(english_result.matched_cree)
+            wordforms.append(english_result.matched_cree.lemma)
+
+    # Some wordforms (e.g., CW as-is entries) have already been prefetched; Django
+    # gets confused if we mix prefetched and unprefetched instances:
+    prefetch_related_objects(
+        [
+            wf
+            for wf in wordforms
+            if "definitions" not in getattr(wf, "_prefetched_objects_cache", {})
+        ],
+        "definitions",
+    )
+
+
 class WordformSearchWithExactMatch(_BaseWordformSearch):
     """
     Searches for exact matches in both the wordforms and EnglishKeyword tables.
     """
 
     def fetch_bilingual_results(self) -> CreeAndEnglish:
-        return fetch_cree_and_english_results(self.cleaned_query, affix_search=False)
+        return fetch_cree_and_english_results(
+            self.cleaned_query, affix_search=False, route=self.route
+        )
+
+
+def search_many_with_exact_match(
+    queries: Iterable[str],
+) -> Dict[InternalForm, SortedSet[SearchResult]]:
+    """
+    Like WordformSearchWithExactMatch(query).perform() for every query (e.g., every
+    word in a passage), but the number of database queries does not grow with the
+    number of queries.
+
+    :return: the results of each distinct query, keyed by its internal form
+    """
+    APIConfig.active_instance().check_dictionary_version()
+
+    searches: Dict[InternalForm, WordformSearchWithExactMatch] = {}
+    for query in queries:
+        search = WordformSearchWithExactMatch(query)
+        searches.setdefault(search.cleaned_query, search)
+
+    with timing.span("fetch"):
+        fetched = _fetch_results_for_queries(
+            list(searches),
+            routes={
+                cleaned_query: search.route
+                for cleaned_query, search in searches.items()
+            },
+        )
+    with timing.span("prefetch"):
+        prefetch_definitions(*fetched.values())
+
+    with timing.span("sort"):
+        results = {
+            cleaned_query: search.sort_results(fetched[cleaned_query])
+            for cleaned_query, search in searches.items()
+        }
+    return results
 
 
 class WordformSearchWithAffixes(_BaseWordformSearch):
     """
     Same as WordformSearchWithExactMatch, but augments results with searches on affixes.
+    Falls back to the closest lemmas when the query can't be analyzed.
     """
 
     def fetch_bilingual_results(self) -> CreeAndEnglish:
-        return fetch_cree_and_english_results(self.cleaned_query, affix_search=True)
+        return fetch_cree_and_english_results(
+            self.cleaned_query, affix_search=True, fuzzy_search=True, route=self.route
+        )
+
+
+class WordformSearchWithInfixes(_BaseWordformSearch):
+    """
+    Same as WordformSearchWithAffixes, but also matches substrings anywhere within the
+    wordforms and keywords.
+    """
+
+    def fetch_bilingual_results(self) -> CreeAndEnglish:
+        return fetch_cree_and_english_results(
+            self.cleaned_query,
+            affix_search=True,
+            infix_search=True,
+            fuzzy_search=True,
+            route=self.route,
+        )
 
 
 def filter_cw_wordforms(q: Iterable[Wordform]) -> Iterable[Wordform]:
@@ -392,13 +558,12 @@ def get_preverbs_from_head_breakdown(
 
                 # find the one that looks the most similar
                 if preverb_results:
-                    preverb_result = min(
-                        preverb_results,
-                        key=lambda pr: get_modified_distance(
-                            normative_preverb_text,
-                            pr.text.strip("-"),
-                        ),
+                    candidates = list(preverb_results)
+                    distances = get_modified_distances(
+                        normative_preverb_text,
+                        [pr.text.strip("-") for pr in candidates],
                     )
+                    preverb_result = candidates[distances.index(min(distances))]
 
                 else:  # can't find a match for the preverb in the database
                     preverb_result = normative_preverb_text
@@ -415,16 +580,39 @@ def fetch_preverbs(user_query: str) -> Set[Wordform]:
 
     :param user_query: unicode normalized, to_lower-ed
     """
+    return fetch_preverbs_for_queries([user_query])[user_query]
 
-    if user_query.endswith("-"):
-        user_query = user_query[:-1]
-    user_query = remove_cree_diacritics(user_query)
 
-    return Wordform.PREVERB_ASCII_LOOKUP[user_query]
+def fetch_preverbs_for_queries(user_queries: Iterable[str]) -> Dict[str, Set[Wordform]]:
+    """
+    Like fetch_preverbs() for every query, but the matching preverbs, and their
+    definitions, are loaded all at once.
+    """
+    index = APIConfig.active_instance().dictionary_resources().preverb_index
+    matches = {user_query: index.search(user_query) for user_query in user_queries}
+
+    ids = {wordform_id for preverbs in matches.values() for _, wordform_id in preverbs}
+    wordforms: Dict[int, Wordform] = {}
+    if ids:
+        wordforms = {
+            wordform.id: wordform
+            for wordform in Wordform.objects.filter(id__in=ids).prefetch_related(
+                "definitions"
+            )
+        }
+
+    return {
+        user_query: {wordforms[wordform_id] for _, wordform_id in preverbs}
+        for user_query, preverbs in matches.items()
+    }
 
 
 def fetch_cree_and_english_results(
-    user_query: InternalForm, affix_search: bool = True
+    user_query: InternalForm,
+    affix_search: bool = True,
+    infix_search: bool = False,
+    fuzzy_search: bool = False,
+    route: Optional[QueryRoute] = None,
 ) -> CreeAndEnglish:
     """
     HERE BE DRAGONS!
@@ -450,7 +638,13 @@ def fetch_cree_and_english_results(
     Give a list of matched lemmas
 
     :param affix_search: whether to perform affix search or not (both English and Cree)
+    :param infix_search: whether to match the query anywhere within words (both English
+                         and Cree)
+    :param fuzzy_search: whether to fall back to the closest Cree lemmas when the query
+                         can't be analyzed
     :param user_query: can be English or Cree (syllabics or not)
+    :param route: whether the query could be Cree, English, or both; by default, the
+                  query is classified here
     """
 
     # build up result_lemmas in 2 ways
@@ -458,15 +652,37 @@ def fetch_cree_and_english_results(
     # 2. spell relax in descriptive fst
     # 2. definition containment of the query word
 
+    if route is None:
+        route = classify_query(user_query)
+
     cree_results: Set[CreeResult] = set()
     english_results: Set[EnglishResult] = set()
 
-    # there will be too many matches for some shorter queries
-    if affix_search and not query_would_return_too_many_results(user_query):
-        do_cree_affix_seach(user_query, cree_results)
-        do_english_affix_search(user_query, english_results)
-
-    _fetch_results(user_query, cree_results, english_results)
+    # (affix searches find a bounded number of the best matches, however short the
+    # query)
+    #
+    # The English affix and infix searches run whatever the route: the route only
+    # knows the whole keywords of the query, and a prefix or a part of a keyword
+    # (e.g., "sle" of "sleep") usually isn't a keyword itself.
+    if affix_search:
+        with timing.span("affix"):
+            if route.cree:
+                do_cree_affix_seach(user_query, cree_results)
+            do_english_affix_search(user_query, english_results)
+
+    if infix_search and not query_would_return_too_many_results(user_query):
+        with timing.span("infix"):
+            if route.cree:
+                do_cree_infix_search(user_query, cree_results)
+            do_english_infix_search(user_query, english_results)
+
+    _fetch_results(
+        user_query,
+        cree_results,
+        english_results,
+        fuzzy_search=fuzzy_search,
+        route=route,
+    )
 
     return CreeAndEnglish(cree_results, english_results)
 
@@ -475,33 +691,97 @@ def _fetch_results(
     user_query: InternalForm,
     cree_results: Set[CreeResult],
     english_results: Set[EnglishResult],
+    fuzzy_search: bool = False,
+    route: Optional[QueryRoute] = None,
 ):
+    """
+    Adds the results of the FST, CW, preverb, and English keyword searches for the user
+    query to the given sets. See _fetch_results_for_queries().
+    """
+    routes = {user_query: route} if route is not None else None
+    results = _fetch_results_for_queries([user_query], fuzzy_search, routes)[user_query]
+    cree_results |= results.cree_results
+    english_results |= results.english_results
+    return CreeAndEnglish(cree_results, english_results)
+
+
+def _fetch_results_for_queries(
+    user_queries: Collection[InternalForm],
+    fuzzy_search: bool = False,
+    routes: Optional[Mapping[InternalForm, QueryRoute]] = None,
+) -> Dict[InternalForm, CreeAndEnglish]:
     """
     The rest of this method is code Eddie has NOT refactored, so I don't really
     understand what's going on here:
+
+    (It searches for many user queries at once -- e.g., every word in a passage --
+    using the same number of database queries as for a single user query.)
+
+    :param routes: whether each query could be Cree, English, or both (see
+                   QueryClassifier); queries without a route are classified here
     """
+    results = {user_query: CreeAndEnglish(set(), set()) for user_query in user_queries}
+
+    # Only search Cree for the queries that could be Cree, and English for the ones
+    # that could be English:
+    routes = {
+        user_query: (routes or {}).get(user_query) or classify_query(user_query)
+        for user_query in user_queries
+    }
+    cree_queries = [q for q in user_queries if routes[q].cree]
+    timing.annotate(
+        skipped_cree=len(user_queries) - len(cree_queries),
+        skipped_english=sum(not route.english for route in routes.values()),
+    )
+
+    # Queries that are wordforms in the database usually don't need the FST: the full
+    # form index knows their analyses, and the wordforms with those analyses.
+    full_forms = full_form_index()
+    fst_analyses: Dict[InternalForm, Set[ConcatAnalysis]] = {
+        user_query: set() for user_query in user_queries
+    }
+    full_form_ids: Set[int] = set()
+    for user_query in cree_queries:
+        indexed = full_forms.get(user_query)
+        if indexed is not None:
+            fst_analyses[user_query] = {analysis for _, analysis in indexed}
+            full_form_ids.update(wordform_id for wordform_id, _ in indexed)
+
     # Use the spelling relaxation to try to decipher the query
     #   e.g., "atchakosuk" becomes "acâhkos+N+A+Pl" --
     #         thus, we can match "acâhkos" in the dictionary!
-    fst_analyses: Set[ConcatAnalysis] = set(
-        a.concatenate() for a in hfstol.analyze(user_query)
+    with timing.span("fst"):
+        analyzed = [q for q in cree_queries if q not in full_forms]
+        for query, analyses in hfstol.analyze_many(analyzed).items():
+            fst_analyses[InternalForm(query)] = {a.concatenate() for a in analyses}
+
+    # All of the wordforms that exactly match one of the analyses, in one query:
+    exactly_matched_wordforms: Dict[ConcatAnalysis, List[Wordform]] = defaultdict(list)
+    analyzed_analyses = set(
+        chain.from_iterable(fst_analyses[user_query] for user_query in analyzed)
     )
+    if analyzed_analyses or full_form_ids:
+        for wf in Wordform.objects.filter(
+            Q(analysis__in=analyzed_analyses, as_is=False) | Q(id__in=full_form_ids)
+        ).select_related("lemma"):
+            exactly_matched_wordforms[ConcatAnalysis(wf.analysis)].append(wf)
+
+    all_standard_forms: Dict[InternalForm, List[str]] = {}
+    # The analyses without exact matches -> (normatized form, lemma, word class)
+    unmatched_analyses: Dict[
+        InternalForm, Dict[ConcatAnalysis, Tuple[str, FSTLemma, WordClass]]
+    ] = {}
+
+    for user_query in user_queries:
+        standard_forms = all_standard_forms[user_query] = []
+        unmatched = unmatched_analyses[user_query] = {}
+
+        for analysis in fst_analyses[user_query]:
+            # todo: test
+
+            if analysis in exactly_matched_wordforms:
+                continue
 
-    all_standard_forms = []
-
-    for analysis in fst_analyses:
-        # todo: test
-
-        exactly_matched_wordforms = Wordform.objects.filter(
-            analysis=analysis, as_is=False
-        )
-
-        if exactly_matched_wordforms.exists():
-            for wf in exactly_matched_wordforms:
-                cree_results.add(
-                    CreeResult(ConcatAnalysis(wf.analysis), wf, Lemma(wf.lemma))
-                )
-        else:
             # When the user query is outside of paradigm tables
             # e.g. mad preverb and reduplication: ê-mâh-misi-nâh-nôcihikocik
             # e.g. Initial change: nêpât: {'IC+nipâw+V+AI+Cnj+3Sg'}
@@ -514,9 +794,10 @@ def _fetch_results(
                 continue
 
             # now we generate the standardized form of the user query for display purpose
-            normatized_form_for_analysis = list(hfstol.generate(analysis))
-            all_standard_forms.extend(normatized_form_for_analysis)
-            if len(all_standard_forms) == 0:
+            with timing.span("fst"):
+                normatized_form_for_analysis = list(hfstol.generate(analysis))
+            standard_forms.extend(normatized_form_for_analysis)
+            if len(standard_forms) == 0:
                 logger.error(
                     f"can not generate standardized form for analysis {analysis}"
                 )
@@ -526,7 +807,37 @@ def _fetch_results(
             )
 
             lemma, word_class = lemma_wc
-            matched_lemma_wordforms = Wordform.objects.filter(text=lemma, is_lemma=True)
+            unmatched[analysis] = (normatized_user_query, lemma, word_class)
+
+    # The lemmas of all of the unmatched analyses, in one query:
+    matched_lemma_wordforms: Dict[str, List[Wordform]] = defaultdict(list)
+    all_lemmas = {
+        lemma
+        for unmatched in unmatched_analyses.values()
+        for _, lemma, _ in unmatched.values()
+    }
+    if all_lemmas:
+        for lemma_wordform in Wordform.objects.filter(
+            text__in=all_lemmas, is_lemma=True
+        ):
+            matched_lemma_wordforms[lemma_wordform.text].append(lemma_wordform)
+
+    # Add the results, in the order of the analyses:
+    for user_query in user_queries:
+        cree_results = results[user_query].cree_results
+        unmatched = unmatched_analyses[user_query]
+
+        for analysis in fst_analyses[user_query]:
+            if analysis in exactly_matched_wordforms:
+                for wf in exactly_matched_wordforms[analysis]:
+                    cree_results.add(
+                        CreeResult(ConcatAnalysis(wf.analysis), wf, Lemma(wf.lemma))
+                    )
+                continue
+
+            if analysis not in unmatched:
+                continue
+            normatized_user_query, lemma, word_class = unmatched[analysis]
 
             # now we get wordform objects from database
             # Note:
@@ -545,57 +856,68 @@ def _fetch_results(
                 # it's ambiguous which one is the lemma in the importing process thus it's labeled "as_is"
 
                 # a more permanent fix requires every pronouns lemma to be listed and specified
-                for lemma_wordform in matched_lemma_wordforms:
-                    cree_results.add(
-                        CreeResult(
-                            ConcatAnalysis(analysis),
-                            normatized_user_query,
-                            Lemma(lemma_wordform),
-                        )
-                    )
+                lemma_wordforms = matched_lemma_wordforms[lemma]
             else:
-                for lemma_wordform in matched_lemma_wordforms.filter(
-                    as_is=False, pos=word_class.pos.name
-                ):
-                    cree_results.add(
-                        CreeResult(
-                            ConcatAnalysis(analysis),
-                            normatized_user_query,
-                            Lemma(lemma_wordform),
-                        )
+                lemma_wordforms = [
+                    wf
+                    for wf in matched_lemma_wordforms[lemma]
+                    if not wf.as_is and wf.pos == word_class.pos.name
+                ]
+
+            for lemma_wordform in lemma_wordforms:
+                cree_results.add(
+                    CreeResult(
+                        ConcatAnalysis(analysis),
+                        normatized_user_query,
+                        Lemma(lemma_wordform),
                     )
+                )
 
     # we choose to trust CW and show those matches with definition from CW.
     # text__in = all_standard_forms help match those lemmas that are labeled as_is but trust-worthy nonetheless
     # because they come from CW
     # text__in = [user_query] help matching entries with spaces in it, which fst can't analyze.
-    for cw_as_is_wordform in filter_cw_wordforms(
-        Wordform.objects.filter(
-            text__in=all_standard_forms + [user_query],
-            as_is=True,
-            is_lemma=True,
-        )
-    ):
-        cree_results.add(
-            CreeResult(
-                ConcatAnalysis(cw_as_is_wordform.analysis),
-                cw_as_is_wordform,
-                Lemma(cw_as_is_wordform),
+    texts_by_query = {
+        user_query: {*all_standard_forms[user_query], user_query}
+        for user_query in cree_queries
+    }
+    cw_as_is_wordforms: List[Wordform] = []
+    if cree_queries:
+        cw_as_is_wordforms = list(
+            filter_cw_wordforms(
+                Wordform.objects.filter(
+                    text__in=set().union(*texts_by_query.values()),
+                    as_is=True,
+                    is_lemma=True,
+                ).prefetch_related("definitions")
             )
         )
+    for user_query in cree_queries:
+        for cw_as_is_wordform in cw_as_is_wordforms:
+            if cw_as_is_wordform.text not in texts_by_query[user_query]:
+                continue
+            results[user_query].cree_results.add(
+                CreeResult(
+                    ConcatAnalysis(cw_as_is_wordform.analysis),
+                    cw_as_is_wordform,
+                    Lemma(cw_as_is_wordform),
+                )
+            )
 
     # as per https://github.com/UAlbertaALTLab/cree-intelligent-dictionary/issues/161
     # preverbs should be presented
     # exhaustively search preverbs here (since we can't use fst on preverbs.)
 
-    for preverb_wf in fetch_preverbs(user_query):
-        cree_results.add(
-            CreeResult(
-                ConcatAnalysis(preverb_wf.analysis),
-                preverb_wf,
-                Lemma(preverb_wf),
+    preverbs = fetch_preverbs_for_queries(cree_queries) if cree_queries else {}
+    for user_query in cree_queries:
+        for preverb_wf in preverbs[user_query]:
+            results[user_query].cree_results.add(
+                CreeResult(
+                    ConcatAnalysis(preverb_wf.analysis),
+                    preverb_wf,
+                    Lemma(preverb_wf),
+                )
             )
-        )
 
     # Words/phrases with spaces in CW dictionary can not be analyzed by fst and are labeled "as_is".
     # However we do want to show them. We trust CW dictionary here and filter those lemmas that has any definition
@@ -605,28 +927,48 @@ def _fetch_results(
     # todo: remind user "are you searching in cree/english?"
     # todo: allow inflected forms to be searched through English. (requires database migration
     #  since now EnglishKeywords are bound to lemmas)
-    for stemmed_keyword in stem_keywords(user_query):
-
-        lemma_ids = EnglishKeyword.objects.filter(text__iexact=stemmed_keyword).values(
-            "lemma__id"
-        )
-
-        for wordform in Wordform.objects.filter(id__in=lemma_ids):
-            english_results.add(
-                EnglishResult(MatchedEnglish(user_query), wordform, Lemma(wordform))
-            )  # will become  (user_query, inflection.text, inflection.lemma)
-
-        # explained above, preverbs should be presented
-        for wordform in Wordform.objects.filter(
-            Q(pos="IPV") | Q(inflectional_category="IPV") | Q(pos="PRON"),
-            id__in=lemma_ids,
-            as_is=True,
+    # (only the keywords that are in the dictionary: see QueryClassifier)
+    stemmed_keywords = {
+        user_query: routes[user_query].english_keywords for user_query in user_queries
+    }
+    # keyword -> the wordforms it belongs to
+    keyword_wordforms: Dict[str, List[Wordform]] = defaultdict(list)
+    all_keywords = set(chain.from_iterable(stemmed_keywords.values()))
+    if all_keywords:
+        # Keywords are stored lowercased (as are stemmed keywords), so this is a plain
+        # IN query that can use the index on EnglishKeyword.text.
+        #
+        # Note: this includes the preverbs and pronouns labelled as_is, which should
+        # be presented too (explained above)
+        for wordform in (
+            Wordform.objects.filter(english_keyword__text__in=all_keywords)
+            .annotate(keyword=F("english_keyword__text"))
+            .select_related("lemma")
+        ):
+            keyword_wordforms[wordform.keyword].append(wordform)
+
+    for user_query in user_queries:
+        matched_english_keyword = False
+        for keyword in stemmed_keywords[user_query]:
+            for wordform in keyword_wordforms[keyword]:
+                matched_english_keyword = True
+                results[user_query].english_results.add(
+                    EnglishResult(MatchedEnglish(user_query), wordform, Lemma(wordform))
+                )  # will become  (user_query, inflection.text, inflection.lemma)
+
+        # Probably misspelled Cree that the FST can't make sense of (English keywords
+        # aren't misspelled Cree!): fall back to the closest lemmas.
+        if (
+            fuzzy_search
+            and routes[user_query].cree
+            and not fst_analyses[user_query]
+            and not matched_english_keyword
+            and not query_would_return_too_many_results(user_query)
         ):
-            english_results.add(
-                EnglishResult(MatchedEnglish(user_query), wordform, Lemma(wordform))
-            )  # will become  (user_query, inflection.text, wordform)
+            with timing.span("fuzzy"):
+                do_cree_fuzzy_search(user_query, results[user_query].cree_results)
 
-    return CreeAndEnglish(cree_results, english_results)
+    return results
 
 
 def do_english_affix_search(query, english_results):
@@ -647,25 +989,63 @@ def do_cree_affix_seach(query, cree_results):
         cree_results.add(CreeResult.from_wordform(word))
 
 
+def do_english_infix_search(query, english_results):
+    english_keywords_matching_infix = do_infix_search(
+        query,
+        infix_searcher_for_english(),
+    )
+    for word in english_keywords_matching_infix:
+        english_results.add(EnglishResult(MatchedEnglish(query), word, word.lemma))
+
+
+def do_cree_infix_search(query, cree_results):
+    cree_words_matching_infix = do_infix_search(
+        query,
+        infix_searcher_for_cree(),
+    )
+    for word in cree_words_matching_infix:
+        cree_results.add(CreeResult.from_wordform(word))
+
+
+def do_cree_fuzzy_search(query, cree_results):
+    nearest_lemma_ids = affix_searcher_for_cree().search_nearest(
+        query,
+        k=settings.FUZZY_SEARCH_MAX_RESULTS,
+        max_distance=settings.FUZZY_SEARCH_MAX_DISTANCE,
+    )
+    for word in Wordform.objects.filter(id__in=nearest_lemma_ids).select_related(
+        "lemma"
+    ):
+        cree_results.add(CreeResult.from_wordform(word))
+
+
 def query_would_return_too_many_results(query: InternalForm) -> bool:
     """
-    If we do an search on too short an affix, the tries will match
+    If we do an search on too short an infix, the tries will match
     WAY too many results.
     """
-    return len(query) <= settings.AFFIX_SEARCH_THRESHOLD
+    return len(query) <= settings.INFIX_SEARCH_THRESHOLD
 
 
 def do_affix_search(query: InternalForm, affixes: AffixSearcher) -> Iterable[Wordform]:
     """
-    Augments the given set with results from performing both a suffix and prefix search on the wordforms.
+    Returns the best wordforms (see settings.AFFIX_SEARCH_MAX_RESULTS) that start or
+    end with the query.
+    """
+    matched_ids = affixes.search(query, k=settings.AFFIX_SEARCH_MAX_RESULTS)
+    return Wordform.objects.filter(id__in=matched_ids).select_related("lemma")
+
+
+def do_infix_search(query: InternalForm, infixes: InfixSearcher) -> Iterable[Wordform]:
+    """
+    Returns the wordforms that contain the query anywhere.
     """
-    matched_ids = set(affixes.search_by_prefix(query))
-    matched_ids |= set(affixes.search_by_suffix(query))
-    return Wordform.objects.filter(id__in=matched_ids)
+    matched_ids = infixes.search_by_infix(query)
+    return Wordform.objects.filter(id__in=matched_ids).select_related("lemma")
 
 
 def replace_user_friendly_tags(fst_tags: List[FSTTag]) -> List[Label]:
-    """ replace fst-tags to cute ones"""
+    """replace fst-tags to cute ones"""
     return LABELS.english.get_full_relabelling(fst_tags)
 
 
@@ -682,79 +1062,78 @@ def safe_partition_analysis(analysis: ConcatAnalysis):
     return linguistic_breakdown_head, linguistic_breakdown_tail
 
 
-def sort_search_result(
-    res_a: "SearchResult", res_b: SearchResult, user_query: str
-) -> float:
-    """
-    determine how we sort search results.
-
-    :return:   0: does not matter;
-              >0: res_a should appear after res_b;
-              <0: res_a should appear before res_b.
-    """
-
-    if res_a.matched_by is Language.CREE and res_b.matched_by is Language.CREE:
-        # both from cree
-        a_dis = get_modified_distance(user_query, res_a.matched_cree)
-        b_dis = get_modified_distance(user_query, res_b.matched_cree)
-        difference = a_dis - b_dis
-        if difference:
-            return difference
-
-        # Both results are EXACTLY the same form!
-        # Further disambiguate by checking if one is the lemma.
-        if res_a.is_lemma and res_b.is_lemma:
-            return 0
-        elif res_a.is_lemma:
-            return -1
-        elif res_b.is_lemma:
-            return 1
-        else:
-            # Somehow, both forms exactly match the user query and neither
-            # is a lemma?
-            return 0
-
-    # todo: better English sort
-    elif res_a.matched_by is Language.CREE:
-        # a from cree, b from English
-        return -1
-    elif res_b.matched_by is Language.CREE:
-        # a from English, b from Cree
-        return 1
-    else:
-        from .models import Wordform
-
-        # both from English
-        a_in_rankings = res_a.matched_cree in Wordform.MORPHEME_RANKINGS
-        b_in_rankings = res_b.matched_cree in Wordform.MORPHEME_RANKINGS
-
-        if a_in_rankings and not b_in_rankings:
-            return -1
-        elif not a_in_rankings and b_in_rankings:
-            return 1
-        elif not a_in_rankings and not b_in_rankings:
-            return 0
-        else:  # both in rankings
-            return (
-                Wordform.MORPHEME_RANKINGS[res_a.matched_cree]
-                - Wordform.MORPHEME_RANKINGS[res_b.matched_cree]
-            )
+# Search results are sorted by a tuple of:
+#  - language bucket: Cree matches come before English matches
+#  - for Cree matches: the modified distance between the user query and the match
+#  - for Cree matches: lemmas come before other forms that are spelled the same
+#  - for English matches: the morpheme ranking; unranked matches come last
+#  - finally, so that ties always come out in the same order (e.g., "ôma" the
+#    pronoun and "ôma" the particle): the match, whether it's a lemma, the ID of
+#    its lemma, and its tags
+SearchResultSortKey = Tuple[int, float, int, float, str, int, int, Tuple[FSTTag, ...]]
+
+# English matches that are not in Wordform.MORPHEME_RANKINGS sort after ranked ones:
+UNRANKED = float("inf")
 
 
-def sort_by_user_query(user_query: InternalForm) -> Callable[[Any], Any]:
+def sort_by_user_query(
+    user_query: InternalForm, ranked: Iterable[SearchResult] = ()
+) -> Callable[[SearchResult], SearchResultSortKey]:
     """
     Returns a key function that sorts search results ranked by their distance
     to the user query.
+
+    The key is computed exactly once per search result -- SortedSet asks for the
+    same key several times, but the (relatively expensive) modified distance is
+    never recomputed. The modified distances of the Cree results in `ranked` are
+    computed up front, all in one batch.
     """
-    # mypy doesn't really know how to handle partial(), so we tell it the
-    # correct type with cast()
-    # See: https://github.com/python/mypy/issues/1484
-    return cmp_to_key(
-        cast(
-            Callable[[Any, Any], Any],
-            partial(sort_search_result, user_query=user_query),
+    from .models import Wordform
+
+    computed_keys: Dict[SearchResult, SearchResultSortKey] = {}
+
+    def tie_breaker(
+        result: SearchResult,
+    ) -> Tuple[str, int, int, Tuple[FSTTag, ...]]:
+        return (
+            result.matched_cree,
+            0 if result.is_lemma else 1,
+            result.lemma_wordform.id,
+            result.raw_suffix_tags,
         )
+
+    def cree_key(result: SearchResult, distance: float) -> SearchResultSortKey:
+        return (0, distance, 0 if result.is_lemma else 1, 0.0, *tie_breaker(result))
+
+    cree_results = [r for r in ranked if r.matched_by is Language.CREE]
+    distances = get_modified_distances(
+        user_query, [r.matched_cree for r in cree_results]
     )
+    for result, distance in zip(cree_results, distances):
+        computed_keys[result] = cree_key(result, distance)
+
+    def compute_key(result: SearchResult) -> SearchResultSortKey:
+        if result.matched_by is Language.CREE:
+            return cree_key(
+                result, get_modified_distance(user_query, result.matched_cree)
+            )
+
+        # todo: better English sort
+        return (
+            1,
+            0.0,
+            0,
+            Wordform.MORPHEME_RANKINGS.get(result.matched_cree, UNRANKED),
+            *tie_breaker(result),
+        )
+
+    def sort_key(result: SearchResult) -> SearchResultSortKey:
+        key = computed_keys.get(result)
+        if key is None:
+            key = computed_keys[result] = compute_key(result)
+        return key
+
+    return sort_key
 
 
 def clean_query_text(user_query: str) -> str:
@@ -791,11 +1170,46 @@ def to_sro_circumflex(text: str) -> str:
     return syllabics2sro(text)
 
 
+def query_classifier() -> QueryClassifier:
+    """
+    Returns the classifier that tells whether queries could be Cree or English.
+    """
+    return APIConfig.active_instance().dictionary_resources().query_classifier
+
+
+# How many queries this process has routed to each search
+_query_routes = QueryRoutes()
+
+
+def classify_query(query: InternalForm) -> QueryRoute:
+    """
+    Whether the query could be Cree, English, or both. Counted in
+    query_routing_stats().
+    """
+    route = query_classifier().classify(query)
+    _query_routes.count(route)
+    return route
+
+
+def query_routing_stats() -> Dict[str, Union[int, float]]:
+    """
+    How many queries have skipped the Cree search or the English search, so far.
+    """
+    return _query_routes.stats()
+
+
+def full_form_index() -> FullFormIndex:
+    """
+    Returns the full form index for the current dictionary.
+    """
+    return APIConfig.active_instance().dictionary_resources().full_form_index
+
+
 def affix_searcher_for_cree() -> AffixSearcher:
     """
     Returns the affix searcher that matches Cree lemmas
     """
-    return APIConfig.active_instance().cree_affix_searcher
+    return APIConfig.active_instance().dictionary_resources().cree_affix_searcher
 
 
 def affix_searcher_for_english() -> AffixSearcher:
@@ -803,4 +1217,18 @@ def affix_searcher_for_english() -> AffixSearcher:
     Returns the affix searcher that matches English keywords (mined from the dictionary
     definitions
     """
-    return APIConfig.active_instance().english_affix_searcher
+    return APIConfig.active_instance().dictionary_resources().english_affix_searcher
+
+
+def infix_searcher_for_cree() -> InfixSearcher:
+    """
+    Returns the infix searcher that matches substrings of Cree lemmas
+    """
+    return APIConfig.active_instance().dictionary_resources().cree_infix_searcher
+
+
+def infix_searcher_for_english() -> InfixSearcher:
+    """
+    Returns the infix searcher that matches substrings of English keywords
+    """
+    return APIConfig.active_instance().dictionary_resources().english_infix_searcher
@@ -0,0 +1,371 @@
+"""
+Caches serialized search results.
+
+The dictionary is read-only between imports, so the results of a search depend only
+on the query, the kind of search, and the version of the dictionary. Searching is
+expensive (the FST, several database queries, affix searches, sorting...), so we
+remember the serialized results, namespaced by the dictionary version that
+import_xmls() stamps.
+
+The default backend keeps results within the process; alternatively, results can be
+kept in any Django cache so that all gunicorn workers share them. See
+SEARCH_RESULT_CACHE in settings.py.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from CreeDictionary import timing
+
+from .schema import SerializedSearchResult
+from .search import (
+    InternalForm,
+    SearchResult,
+    clean_query_text,
+    search_many_with_exact_match,
+    to_internal_form,
+)
+
+logger = logging.getLogger(__name__)
+
+SerializedResults = List[SerializedSearchResult]
+
+
+class SearchMode(Enum):
+    """
+    Which kind of search produced the results.
+    """
+
+    # Wordform.search_with_affixes()
+    AFFIX = "affix"
+    # Wordform.simple_search()
+    EXACT = "exact"
+    # Wordform.search_with_infixes()
+    INFIX = "infix"
+
+
+class InProcessBackend:
+    """
+    A least-recently used cache within this process, bounded by both the number of
+    entries and their total (approximate) size in bytes.
+
+    Callers get their own copy of the cached results, so that changing them can't
+    change what every other request gets.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[SerializedResults, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[SerializedResults]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(entry[0])
+
+    def set(self, key: str, results: SerializedResults, size: int) -> None:
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry is not None:
+                self._total_bytes -= old_entry[1]
+
+            self._entries[key] = (copy.deepcopy(results), size)
+            self._total_bytes += size
+
+            # evict the least recently used entries:
+            while self._entries and (
+                len(self._entries) > self.max_entries
+                or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+
+class DjangoCacheBackend:
+    """
+    Keeps results in one of the caches configured in settings.CACHES.
+
+    The Django cache is responsible for its own eviction (e.g., its MAX_ENTRIES
+    option). Results expire after a while, since nothing ever reads the results of
+    previous dictionary versions again.
+    """
+
+    def __init__(self, alias: str, timeout: int):
+        """
+        :param timeout: how many seconds results are kept
+        """
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    def get(self, key: str) -> Optional[SerializedResults]:
+        return self._cache.get(key)
+
+    def set(self, key: str, results: SerializedResults, size: int) -> None:
+        self._cache.set(key, results, timeout=self.timeout)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class SearchResultCache:
+    """
+    Remembers the serialized results of searches for the current dictionary version.
+    """
+
+    # prefix for all cache keys, in case the Django cache is shared with other stuff
+    KEY_PREFIX = "search-results"
+
+    def __init__(
+        self,
+        backend,
+        max_entry_bytes: int,
+        get_dictionary_version: Callable[[], str],
+    ):
+        self.backend = backend
+        self.max_entry_bytes = max_entry_bytes
+        self.get_dictionary_version = get_dictionary_version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get_or_search(
+        self,
+        query: InternalForm,
+        mode: SearchMode,
+        search: Callable[[], SerializedResults],
+    ) -> SerializedResults:
+        """
+        Returns the cached results for the query, or calls search() and caches
+        whatever it returns.
+        """
+        key = self.key_for(query, mode)
+
+        results = self.backend.get(key)
+        if results is not None:
+            self._count(hits=1)
+            timing.annotate(cache="hit")
+            return results
+
+        self._count(misses=1)
+        timing.annotate(cache="miss")
+        results = search()
+        self._store(key, query, results)
+        return results
+
+    def get_many_or_search(
+        self,
+        queries: Iterable[InternalForm],
+        mode: SearchMode,
+        search_many: Callable[
+            [List[InternalForm]], Dict[InternalForm, SerializedResults]
+        ],
+    ) -> Dict[InternalForm, SerializedResults]:
+        """
+        Like get_or_search(), but for many queries: search_many() is called once, with
+        all of the queries whose results aren't cached.
+        """
+        version = self.get_dictionary_version()
+        keys = {query: self._key(version, query, mode) for query in queries}
+
+        results: Dict[InternalForm, SerializedResults] = {}
+        for query, key in keys.items():
+            cached = self.backend.get(key)
+            if cached is not None:
+                results[query] = cached
+
+        misses = [query for query in keys if query not in results]
+        self._count(hits=len(results), misses=len(misses))
+        timing.annotate(cache_hits=len(results), cache_misses=len(misses))
+        if misses:
+            for query, query_results in search_many(misses).items():
+                self._store(keys[query], query, query_results)
+                results[query] = query_results
+
+        return results
+
+    def _count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _store(self, key: str, query: InternalForm, results: SerializedResults) -> None:
+        size = len(json.dumps(results, ensure_ascii=False).encode("UTF-8"))
+        if size <= self.max_entry_bytes:
+            self.backend.set(key, results, size)
+        else:
+            logger.debug("not caching %d bytes of results for %r", size, query)
+
+    def key_for(self, query: InternalForm, mode: SearchMode) -> str:
+        """
+        Keys are namespaced by the dictionary version, so a re-import makes all
+        previous results unreachable.
+
+        The query is hashed, as not all cache backends accept arbitrary text in keys.
+        """
+        return self._key(self.get_dictionary_version(), query, mode)
+
+    def _key(self, version: str, query: InternalForm, mode: SearchMode) -> str:
+        digest = hashlib.sha256(query.encode("UTF-8")).hexdigest()
+        return f"{self.KEY_PREFIX}:{version}:{mode.value}:{digest}"
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters describing how useful the cache has been in this process.
+        """
+        with self._lock:
+            stats: Dict[str, Any] = {"hits": self.hits, "misses": self.misses}
+        if isinstance(self.backend, InProcessBackend):
+            stats["entries"] = len(self.backend)
+            stats["bytes"] = self.backend.total_bytes
+        return stats
+
+
+_search_result_cache: Optional[SearchResultCache] = None
+
+
+def get_search_result_cache() -> SearchResultCache:
+    """
+    The search result cache configured by settings.SEARCH_RESULT_CACHE.
+    """
+    global _search_result_cache
+
+    if _search_result_cache is None:
+        _search_result_cache = create_search_result_cache(settings.SEARCH_RESULT_CACHE)
+    return _search_result_cache
+
+
+def create_search_result_cache(config: Dict[str, Any]) -> SearchResultCache:
+    from .apps import APIConfig
+
+    backend: Any
+    if config["BACKEND"] == "in-process":
+        backend = InProcessBackend(
+            max_entries=config["MAX_ENTRIES"], max_bytes=config["MAX_BYTES"]
+        )
+    else:
+        # anything else is the alias of a Django cache:
+        backend = DjangoCacheBackend(config["BACKEND"], timeout=config["TIMEOUT"])
+
+    return SearchResultCache(
+        backend,
+        # a single entry should never fill the entire cache
+        max_entry_bytes=config["MAX_BYTES"] // 8,
+        # (during a request, the searches reuse this check)
+        get_dictionary_version=lambda: (
+            APIConfig.active_instance().check_dictionary_version().version
+        ),
+    )
+
+
+def search_with_affixes_serialized(query: str) -> SerializedResults:
+    """
+    Like Wordform.search_with_affixes(), but the results are serialized and cached.
+    """
+    from .models import Wordform
+
+    return get_search_result_cache().get_or_search(
+        to_internal_form(clean_query_text(query)),
+        SearchMode.AFFIX,
+        lambda: _serialize(Wordform.search_with_affixes(query)),
+    )
+
+
+def simple_search_serialized(query: str) -> SerializedResults:
+    """
+    Like Wordform.simple_search(), but the results are serialized and cached.
+    """
+    from .models import Wordform
+
+    return get_search_result_cache().get_or_search(
+        to_internal_form(clean_query_text(query)),
+        SearchMode.EXACT,
+        lambda: _serialize(Wordform.simple_search(query)),
+    )
+
+
+def simple_search_many_serialized(
+    queries: Iterable[str],
+) -> Dict[str, SerializedResults]:
+    """
+    Like simple_search_serialized() for every query, but the queries that aren't
+    cached are searched all at once (see search_many_with_exact_match()).
+
+    :return: the results of each distinct query, keyed by the query as given
+    """
+    internal_forms = {
+        query: to_internal_form(clean_query_text(query)) for query in queries
+    }
+
+    def search_many(
+        misses: List[InternalForm],
+    ) -> Dict[InternalForm, SerializedResults]:
+        return {
+            query: _serialize(results)
+            for query, results in search_many_with_exact_match(misses).items()
+        }
+
+    results = get_search_result_cache().get_many_or_search(
+        set(internal_forms.values()), SearchMode.EXACT, search_many
+    )
+    return {query: results[internal_forms[query]] for query in internal_forms}
+
+
+def search_with_infixes_serialized(query: str) -> SerializedResults:
+    """
+    Like Wordform.search_with_infixes(), but the results are serialized and cached.
+    """
+    from .models import Wordform
+
+    return get_search_result_cache().get_or_search(
+        to_internal_form(clean_query_text(query)),
+        SearchMode.INFIX,
+        lambda: _serialize(Wordform.search_with_infixes(query)),
+    )
+
+
+def search_with_affixes_or_infixes_serialized(query: str) -> SerializedResults:
+    """
+    Like search_with_affixes_serialized(), but when that finds nothing, falls back to
+    search_with_infixes_serialized(), e.g., for a fragment from the middle of a long
+    word, like "pimohtê" in "kî-pimohtêw".
+    """
+    results = search_with_affixes_serialized(query)
+    if not results:
+        timing.annotate(fallback="infix")
+        results = search_with_infixes_serialized(query)
+    return results
+
+
+def _serialize(results: Iterable[SearchResult]) -> SerializedResults:
+    with timing.span("serialize"):
+        return [result.serialize() for result in results]
@@ -0,0 +1,166 @@
+"""
+Saves resources derived from the dictionary (e.g., the affix searchers) to files, so
+that every process can load them instead of building them from the database.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Generic, Optional, Sequence, Tuple, TypeVar
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class VersionedFiles(Generic[T]):
+    """
+    The files of one kind of resource, saved next to the SQLite database file and
+    named after the dictionary version that the resource was built from, e.g.,
+
+        db.cree-affixes.<version>.top10.prefixes.dawg
+
+    Saving the files of a version removes the files of all other versions.
+
+    Nothing is saved for in-memory databases, nor for dictionaries without a version.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        build: Optional[Callable[[], T]],
+        load: Callable[..., T],
+        save: Callable[..., None],
+        names: Callable[[], Sequence[str]] = lambda: ("",),
+        if_missing: Optional[Callable[[], T]] = None,
+    ):
+        """
+        :param kind: what the files have, e.g., "cree-affixes"
+        :param build: builds the resource from the database; None when it can only be
+            saved when the dictionary is imported
+        :param load: loads the resource from its paths
+        :param save: saves the resource (its first argument) to its paths
+        :param names: what tells apart each file of the resource (e.g., "prefixes"),
+            and the things it was built from besides the dictionary (e.g., the hash of
+            the FST); "" for nothing
+        :param if_missing: what to use instead when the files haven't been saved, for
+            resources that can't (or shouldn't) be built while serving a request
+        """
+        assert build is not None or if_missing is not None
+        self.kind = kind
+        self._build = build
+        self._load = load
+        self._save = save
+        self.names = names
+        self._if_missing = if_missing
+
+    def paths(self, version: str) -> Optional[Tuple[Path, ...]]:
+        """
+        Where the files of the version are saved, or None when they can't be saved.
+        """
+        from .models import DictionaryVersion
+
+        database = database_file()
+        if database is None or version == DictionaryVersion.UNVERSIONED:
+            return None
+
+        prefix = f"{database.stem}.{self.kind}.{version}"
+        return tuple(
+            database.with_name(
+                ".".join(part for part in (prefix, name, "dawg") if part)
+            )
+            for name in self.names()
+        )
+
+    def build(self) -> T:
+        """
+        Builds the resource from the database.
+        """
+        if self._build is None:
+            raise NotImplementedError(f"{self.kind} can only be saved at import")
+        return self._build()
+
+    def load_or_build(self, version: str) -> T:
+        """
+        Loads the resource saved for the version. If it hasn't been saved yet, builds it
+        from the database, and saves it for next time -- or, with if_missing, falls
+        back to that instead.
+        """
+        paths = self.paths(version)
+
+        if paths is not None and all(path.exists() for path in paths):
+            try:
+                return self._load(*paths)
+            except Exception:
+                logger.exception("could not load %s from %s", self.kind, paths[0])
+
+        if self._if_missing is not None:
+            if paths is not None:
+                logger.warning(
+                    "%s has not been saved to %s; it's saved at import",
+                    self.kind,
+                    paths[0],
+                )
+            return self._if_missing()
+
+        resource = self.build()
+
+        if paths is not None:
+            try:
+                self._save_to(resource, paths)
+            except OSError:
+                logger.exception("could not save %s to %s", self.kind, paths[0])
+
+        return resource
+
+    def save(self, resource: T, version: str) -> None:
+        """
+        Saves the resource built from the version (unless it can't be saved).
+        """
+        paths = self.paths(version)
+        if paths is not None:
+            self._save_to(resource, paths)
+
+    def build_and_save(self, version: str) -> None:
+        """
+        Builds the resource from the database, and saves it for the version (unless it
+        can't be saved, in which case, nothing is built).
+        """
+        paths = self.paths(version)
+        if paths is not None:
+            self._save_to(self.build(), paths)
+
+    def _save_to(self, resource: T, paths: Tuple[Path, ...]) -> None:
+        self._save(resource, *paths)
+
+        # Remove the files of previous versions:
+        database = database_file()
+        assert database is not None
+        for path in database.parent.glob(f"{database.stem}.{self.kind}.*.dawg"):
+            if path not in paths:
+                path.unlink()
+
+
+def save_dawg(trie, path: Path) -> None:
+    """
+    Saves a DAWG to the path. The file is replaced atomically, so that other processes
+    never load a partially written file.
+    """
+    temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    trie.save(os.fspath(temporary_path))
+    os.replace(temporary_path, path)
+
+
+def database_file() -> Optional[Path]:
+    """
+    The path to the SQLite database file, if there is one.
+    """
+    if connection.vendor != "sqlite":
+        return None
+
+    name = str(connection.settings_dict["NAME"])
+    if name == ":memory:" or name.startswith("file:"):
+        return None
+    return Path(name)
@@ -1,8 +1,20 @@
-from typing import List
+import json
+import re
+from typing import Any, Dict, List, Tuple
 
 from API.schema import SerializedSearchResult
 from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
-from .models import Wordform
+from django.views.decorators.csrf import csrf_exempt
+
+from CreeDictionary import timing
+
+from .search_cache import simple_search_many_serialized, simple_search_serialized
+
+# The bulk click-in-text API analyzes at most this many tokens per request
+MAX_BULK_TOKENS = 1000
+
+# A word, possibly with internal hyphens or apostrophes, e.g., "kî-nipâw", "tân'si"
+TOKEN_PATTERN = re.compile(r"\w+(?:[-'’]\w+)*")
 
 
 def click_in_text(request) -> HttpResponse:
@@ -17,12 +29,86 @@ def click_in_text(request) -> HttpResponse:
     elif q == "":
         return HttpResponseBadRequest("query param q is an empty string")
 
-    results: List[SerializedSearchResult] = []
-    for result in Wordform.simple_search(q):
-        results.append(result.serialize())
+    results: List[SerializedSearchResult] = simple_search_serialized(q)
+    timing.annotate(query=q, results=len(results))
 
     response = {"results": results}
 
-    json_response = JsonResponse(response)
+    with timing.span("json"):
+        json_response = JsonResponse(response)
     json_response["Access-Control-Allow-Origin"] = "*"
     return json_response
+
+
+@csrf_exempt
+def click_in_text_bulk(request) -> HttpResponse:
+    """
+    click-in-text api for many words at once
+
+    POST a JSON object with either:
+     - "text": a passage, which is split into words, or
+     - "tokens": a list of words
+
+    The response has one entry in "tokens" per word, in order, each with the results
+    that the click-in-text api would return for that word. Words taken from "text" also
+    have their "start" and "end" offsets within the text.
+    """
+    if request.method == "OPTIONS":
+        # CORS preflight: JSON requests from other origins ask for permission first
+        response = HttpResponse()
+        response["Access-Control-Allow-Methods"] = "POST, OPTIONS"
+        response["Access-Control-Allow-Headers"] = "Content-Type"
+    elif request.method != "POST":
+        response = HttpResponse(status=405)
+        response["Allow"] = "POST, OPTIONS"
+    else:
+        response = _click_in_text_bulk_response(request)
+
+    response["Access-Control-Allow-Origin"] = "*"
+    return response
+
+
+def _click_in_text_bulk_response(request) -> HttpResponse:
+    try:
+        body = json.loads(request.body)
+    except ValueError:
+        return HttpResponseBadRequest("request body must be JSON")
+    if not isinstance(body, dict):
+        return HttpResponseBadRequest("request body must be a JSON object")
+
+    tokens: List[Dict[str, Any]]
+    if isinstance(body.get("text"), str):
+        tokens = [
+            {"text": text, "start": start, "end": end}
+            for text, start, end in tokenize(body["text"])
+        ]
+    elif isinstance(body.get("tokens"), list) and all(
+        isinstance(token, str) for token in body["tokens"]
+    ):
+        tokens = [{"text": token} for token in body["tokens"]]
+    else:
+        return HttpResponseBadRequest('expected "text" or a list of "tokens"')
+
+    if len(tokens) > MAX_BULK_TOKENS:
+        return HttpResponseBadRequest(f"at most {MAX_BULK_TOKENS} tokens are allowed")
+
+    results = simple_search_many_serialized(
+        {token["text"] for token in tokens if token["text"].strip()}
+    )
+    for position, token in enumerate(tokens):
+        token["position"] = position
+        token["results"] = results.get(token["text"], [])
+    timing.annotate(tokens=len(tokens), distinct_tokens=len(results))
+
+    with timing.span("json"):
+        return JsonResponse({"tokens": tokens})
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    """
+    Splits a passage into words, with their start and end offsets.
+
+    >>> tokenize("Tânisi, kî-nipâw cî?")
+    [('Tânisi', 0, 6), ('kî-nipâw', 8, 16), ('cî', 17, 19)]
+    """
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_PATTERN.finditer(text)]
@@ -0,0 +1,288 @@
+"""
+Benchmarks of searches, paradigms, and the analysis utilities they depend on.
+
+They run against the test database (test_db.sqlite3), with the words listed in
+res/test_db_words.txt as search queries, so that results are reproducible from one
+machine (and one commit) to another. Run them with:
+
+    USE_TEST_DB=True python manage.py benchmark --output benchmark.json
+
+Searches are measured twice: "cold" benchmarks empty the search result cache and
+the other memoized lookups before every round; "warm" benchmarks measure rounds after
+everything has been cached.
+
+Pass --compare with an earlier output file to flag benchmarks that got slower than
+the --threshold.
+"""
+
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from API.models import EnglishKeyword, Wordform
+from API.search import (
+    breakdown_analysis,
+    breakdown_tags,
+    relevant_tags_from_suffix_tags,
+)
+from API.search_cache import (
+    get_search_result_cache,
+    search_with_affixes_serialized,
+    simple_search_serialized,
+)
+from shared import expensive
+from utils import ParadigmSize, WordClass, get_modified_distance, shared_res_dir
+from utils.fst_analysis_parser import LABELS, partition_analysis
+
+from CreeDictionary import hfstol
+
+# How many English keywords, lemmas, and analyses the benchmarks use as inputs
+ENGLISH_QUERIES = 50
+LEMMAS_PER_QUERY = 20
+ANALYSES = 1000
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # does all of the operations once, and returns how many operations it did
+    run: Callable[[], int]
+    # cold benchmarks empty the caches before every round
+    cold: bool = False
+
+
+def clear_caches() -> None:
+    """
+    Empties the search result cache, the memoized FST lookups, and the memoized
+    analysis breakdowns.
+    """
+    get_search_result_cache().backend.clear()
+    hfstol.clear_lookup_caches()
+    breakdown_analysis.cache_clear()
+    breakdown_tags.cache_clear()
+    relevant_tags_from_suffix_tags.cache_clear()
+
+
+def collect_benchmarks() -> List[Benchmark]:
+    """
+    All of the benchmarks, with their inputs read from the database.
+    """
+    queries = read_test_db_words()
+    english_queries = _english_queries()
+    lemmas = list(
+        Wordform.objects.filter(is_lemma=True).order_by("id").only("text", "analysis")
+    )
+
+    benchmarks: List[Benchmark] = []
+    for cold in True, False:
+        suffix = "cold" if cold else "warm"
+        benchmarks += [
+            Benchmark(
+                f"search-exact-{suffix}",
+                _each(simple_search_serialized, queries),
+                cold,
+            ),
+            Benchmark(
+                f"search-affix-{suffix}",
+                _each(search_with_affixes_serialized, queries),
+                cold,
+            ),
+            Benchmark(
+                f"search-english-{suffix}",
+                _each(search_with_affixes_serialized, english_queries),
+                cold,
+            ),
+        ]
+
+    for word_class in WordClass:
+        if not word_class.has_inflections():
+            continue
+        lemma = (
+            Wordform.objects.filter(is_lemma=True, fst_word_class=word_class.value)
+            .order_by("id")
+            .first()
+        )
+        if lemma is None:
+            continue
+        for size in ParadigmSize:
+            benchmarks.append(
+                Benchmark(
+                    f"paradigm-{word_class.value}-{size.value}".lower(),
+                    _fill_paradigm(lemma.text, word_class, size),
+                )
+            )
+
+    pairs = [
+        (query, lemma.text) for query in queries for lemma in lemmas[:LEMMAS_PER_QUERY]
+    ]
+    analyses = _parsable_analyses(w.analysis for w in lemmas)[:ANALYSES]
+    tags = [
+        prefixes + suffixes
+        for prefixes, _, suffixes in map(partition_analysis, analyses)
+    ]
+    benchmarks += [
+        Benchmark(
+            "modified-distance",
+            _each(lambda pair: get_modified_distance(*pair), pairs),
+        ),
+        Benchmark("partition-analysis", _each(partition_analysis, analyses)),
+        Benchmark("full-relabelling", _each(LABELS.english.get_full_relabelling, tags)),
+    ]
+    return benchmarks
+
+
+def measure(benchmark: Benchmark, rounds: int) -> Dict[str, Any]:
+    """
+    Times rounds of the benchmark, and summarizes the time per round.
+    """
+    if not benchmark.cold:
+        # fill whatever caches there are, so that every round is warm
+        benchmark.run()
+
+    seconds: List[float] = []
+    operations = 0
+    for _ in range(rounds):
+        if benchmark.cold:
+            clear_caches()
+        start = time.perf_counter()
+        operations = benchmark.run()
+        seconds.append(time.perf_counter() - start)
+
+    median = statistics.median(seconds)
+    return {
+        "rounds": rounds,
+        "operations": operations,
+        "min": min(seconds),
+        "max": max(seconds),
+        "mean": statistics.mean(seconds),
+        "median": median,
+        "stdev": statistics.stdev(seconds) if rounds > 1 else 0.0,
+        "median_per_operation": median / operations if operations else median,
+    }
+
+
+def run_benchmarks(
+    benchmarks: Iterable[Benchmark],
+    rounds: int,
+    progress: Callable[[str, Dict[str, Any]], None] = lambda name, result: None,
+) -> Dict[str, Any]:
+    """
+    Measures every benchmark. Returns the results, ready to be saved as JSON.
+    """
+    results = {}
+    for benchmark in benchmarks:
+        results[benchmark.name] = measure(benchmark, rounds)
+        progress(benchmark.name, results[benchmark.name])
+
+    return {"metadata": _metadata(), "benchmarks": results}
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def is_regression(self, threshold: float) -> bool:
+        return self.ratio > 1 + threshold
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Comparison]:
+    """
+    Compares the median time per operation of the benchmarks found in both results.
+
+    >>> old = {"benchmarks": {"a": {"median_per_operation": 2.0}}}
+    >>> new = {"benchmarks": {"a": {"median_per_operation": 3.0}, "b": {}}}
+    >>> [c] = compare(old, new)
+    >>> c.ratio, c.is_regression(threshold=0.2)
+    (1.5, True)
+    """
+    return [
+        Comparison(
+            name,
+            baseline["benchmarks"][name]["median_per_operation"],
+            result["median_per_operation"],
+        )
+        for name, result in current["benchmarks"].items()
+        if name in baseline["benchmarks"]
+    ]
+
+
+def read_test_db_words() -> List[str]:
+    """
+    The words that the test database was built from.
+    """
+    with (shared_res_dir / "test_db_words.txt").open(encoding="UTF-8") as words_file:
+        lines = (line.strip() for line in words_file)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+def _each(operation: Callable[[Any], object], inputs: List[Any]) -> Callable[[], int]:
+    def run() -> int:
+        for argument in inputs:
+            operation(argument)
+        return len(inputs)
+
+    return run
+
+
+def _fill_paradigm(
+    lemma: str, word_class: WordClass, size: ParadigmSize
+) -> Callable[[], int]:
+    def run() -> int:
+        expensive.paradigm_filler.fill_paradigm(lemma, word_class, size)
+        return 1
+
+    return run
+
+
+def _english_queries() -> List[str]:
+    """
+    Keywords spread evenly across the alphabet.
+    """
+    keywords = list(
+        EnglishKeyword.objects.order_by("text")
+        .values_list("text", flat=True)
+        .distinct()
+    )
+    step = max(1, len(keywords) // ENGLISH_QUERIES)
+    return keywords[::step][:ENGLISH_QUERIES]
+
+
+def _parsable_analyses(analyses: Iterable[str]) -> List[str]:
+    parsable = []
+    for analysis in analyses:
+        try:
+            partition_analysis(analysis)
+        except ValueError:
+            continue
+        parsable.append(analysis)
+    return parsable
+
+
+def _metadata() -> Dict[str, Optional[str]]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
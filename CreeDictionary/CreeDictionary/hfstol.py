@@ -2,20 +2,362 @@
 
 """
 Run finite-state transducer analyzer and generator
+
+Lookups are memoized: the same queries are analyzed -- and the same analyses are
+generated -- over and over again, so each lookup is remembered (see
+MemoizedTransducer and settings.FST_LOOKUP_CACHE).
 """
 
-from typing import Generator, Iterable, List, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
-from shared.expensive import relaxed_analyzer, strict_generator
+from django.conf import settings
+from django.utils.functional import cached_property
+from hfst_optimized_lookup import TransducerFile
+from shared import expensive
 from utils.data_classes import Analysis
 
 
 def analyze(wordform: str) -> Iterable[Analysis]:
-    return parse_analyses(relaxed_analyzer.lookup(wordform))
+    return parse_analyses(_memoized("relaxed_analyzer").lookup(wordform))
+
+
+def analyze_many(wordforms: Iterable[str]) -> Dict[str, List[Analysis]]:
+    """
+    Analyzes every wordform with a single bulk lookup.
+    """
+    return {
+        wordform: list(parse_analyses(raw_analyses))
+        for wordform, raw_analyses in _memoized("relaxed_analyzer")
+        .bulk_lookup(wordforms)
+        .items()
+    }
+
+
+def analyze_uncached(wordforms: Iterable[str]) -> Dict[str, List[Analysis]]:
+    """
+    Like analyze_many(), but bypasses the memoized lookups, e.g., to analyze every
+    wordform in the dictionary once without flushing them.
+    """
+    return {
+        wordform: list(parse_analyses(raw_analyses))
+        for wordform, raw_analyses in expensive.relaxed_analyzer.bulk_lookup(
+            wordforms
+        ).items()
+    }
+
+
+def analyzer_hash() -> str:
+    """
+    Content hash of the analyzer FST, to tell apart anything derived from its
+    analyses.
+    """
+    return _memoized("relaxed_analyzer").fst_hash
+
+
+def generator_hash() -> str:
+    """
+    Content hash of the generator FST, to tell apart anything derived from the forms
+    it generates.
+    """
+    return _memoized("strict_generator").fst_hash
+
+
+def analyzer_input_symbols() -> FrozenSet[str]:
+    """
+    Every symbol that the analyzer FST accepts as input: it can't analyze a string
+    that isn't made of these.
+    """
+    return _memoized("relaxed_analyzer").input_symbols
 
 
 def generate(analysis: str) -> Iterable[str]:
-    return strict_generator.lookup(analysis)
+    return _memoized("strict_generator").lookup(analysis)
+
+
+def lookup_stats() -> Dict[str, Dict[str, Union[int, float]]]:
+    """
+    Hit rates of the memoized FSTs used so far.
+    """
+    return {name: transducer.stats() for name, transducer in _memoized_fsts.items()}
+
+
+def clear_lookup_caches() -> None:
+    """
+    Forgets the remembered lookups of all memoized FSTs, e.g., to measure cold lookups.
+    """
+    for transducer in _memoized_fsts.values():
+        transducer.clear()
+
+
+class PersistentLookupStore:
+    """
+    Remembers lookups in an SQLite file, so that they survive restarts.
+
+    Lookups are namespaced by the content hash of the FST, so an updated FST never
+    reuses old lookups.
+
+    SQLite connections must not be used by a forked process (e.g., a gunicorn worker),
+    so each process opens its own connection, on first use.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._open_connection: Optional[sqlite3.Connection] = None
+        # the process that opened the connection:
+        self._connection_pid: Optional[int] = None
+        with self._lock, self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS lookup (
+                    fst_hash TEXT NOT NULL,
+                    input TEXT NOT NULL,
+                    outputs TEXT NOT NULL,
+                    PRIMARY KEY (fst_hash, input)
+                )
+                """
+            )
+
+    @property
+    def _connection(self) -> sqlite3.Connection:
+        """
+        This process's connection. Must be used with the lock held.
+        """
+        if self._open_connection is None or self._connection_pid != os.getpid():
+            self._open_connection = sqlite3.connect(
+                str(self.path), timeout=10, check_same_thread=False
+            )
+            self._connection_pid = os.getpid()
+        return self._open_connection
+
+    def close(self) -> None:
+        """
+        Closes this process's connection. The next lookup opens a new one.
+        """
+        with self._lock:
+            if (
+                self._open_connection is not None
+                and self._connection_pid == os.getpid()
+            ):
+                self._open_connection.close()
+            self._open_connection = None
+            self._connection_pid = None
+
+    def get(self, fst_hash: str, string: str) -> Optional[Tuple[str, ...]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT outputs FROM lookup WHERE fst_hash = ? AND input = ?",
+                (fst_hash, string),
+            ).fetchone()
+        if row is None:
+            return None
+        return tuple(json.loads(row[0]))
+
+    def put(self, fst_hash: str, string: str, outputs: Tuple[str, ...]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO lookup (fst_hash, input, outputs) "
+                "VALUES (?, ?, ?)",
+                (fst_hash, string, json.dumps(outputs, ensure_ascii=False)),
+            )
+
+
+class MemoizedTransducer:
+    """
+    Wraps a TransducerFile and remembers its most recent lookups, so that a repeated
+    lookup costs a dictionary access instead of a transducer traversal.
+
+    It has the same lookup() and bulk_lookup() methods as TransducerFile.
+    """
+
+    def __init__(
+        self,
+        create_transducer: Callable[[], TransducerFile],
+        fst_path: Path,
+        max_entries: int,
+        store: Optional[PersistentLookupStore] = None,
+    ):
+        self._create_transducer = create_transducer
+        self.fst_path = fst_path
+        self.max_entries = max_entries
+        self.store = store
+
+        self._lookups: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+
+    @cached_property
+    def transducer(self) -> TransducerFile:
+        return self._create_transducer()
+
+    @cached_property
+    def fst_hash(self) -> str:
+        """
+        Content hash of the FST file.
+        """
+        sha256 = hashlib.sha256()
+        with open(self.fst_path, "rb") as fst_file:
+            for chunk in iter(lambda: fst_file.read(1 << 20), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    @cached_property
+    def input_symbols(self) -> FrozenSet[str]:
+        """
+        The input symbols of the FST, without flag diacritics.
+        """
+        return read_input_symbols(self.fst_path)
+
+    def lookup(self, string: str) -> List[str]:
+        with self._lock:
+            outputs = self._lookups.get(string)
+            if outputs is not None:
+                self._lookups.move_to_end(string)
+                self.hits += 1
+                return list(outputs)
+
+        outputs = self._lookup_uncached(string)
+
+        with self._lock:
+            self._lookups[string] = outputs
+            while len(self._lookups) > self.max_entries:
+                self._lookups.popitem(last=False)
+
+        return list(outputs)
+
+    def bulk_lookup(self, strings: Iterable[str]) -> Dict[str, Set[str]]:
+        # This is exactly what TransducerFile.bulk_lookup() does:
+        return {string: set(self.lookup(string)) for string in strings}
+
+    def _lookup_uncached(self, string: str) -> Tuple[str, ...]:
+        if self.store is not None:
+            outputs = self.store.get(self.fst_hash, string)
+            if outputs is not None:
+                with self._lock:
+                    self.store_hits += 1
+                return outputs
+
+        outputs = tuple(self.transducer.lookup(string))
+        with self._lock:
+            self.misses += 1
+
+        if self.store is not None:
+            self.store.put(self.fst_hash, string, outputs)
+        return outputs
+
+    def clear(self) -> None:
+        """
+        Forgets the remembered lookups (but not the ones in the persistent store).
+        """
+        with self._lock:
+            self._lookups.clear()
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "entries": len(self._lookups),
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.store_hits) / lookups if lookups else 0.0,
+        }
+
+
+def read_input_symbols(fst_path: Path) -> FrozenSet[str]:
+    """
+    Reads the input symbols from the header of an optimized lookup (.hfstol) file.
+
+    See: https://github.com/hfst/hfst/wiki/HfstOptimizedLookupFormat
+    """
+    with open(fst_path, "rb") as fst_file:
+        header = fst_file.read(1 << 20)
+
+    offset = 0
+    # HFST 3 files start with their own header, before the optimized lookup one:
+    if header.startswith(b"HFST\0"):
+        (hfst_header_length,) = struct.unpack_from("<H", header, 5)
+        offset = 8 + hfst_header_length
+
+    # input symbols, symbols, (and four sizes that we don't need)...
+    input_symbol_count, symbol_count = struct.unpack_from("<HH", header, offset)
+    # ...followed by nine boolean properties, as 32-bit integers:
+    offset += 20 + 9 * 4
+
+    symbols = []
+    for _ in range(symbol_count):
+        end = header.index(b"\0", offset)
+        symbols.append(header[offset:end].decode("UTF-8"))
+        offset = end + 1
+
+    # The input symbols come first; flag diacritics look like @P.FEATURE.VALUE@:
+    return frozenset(
+        symbol
+        for symbol in symbols[:input_symbol_count]
+        if symbol and not symbol.startswith("@")
+    )
+
+
+_memoized_fsts: Dict[str, MemoizedTransducer] = {}
+_memoized_fsts_lock = threading.Lock()
+# shared by all memoized FSTs:
+_persistent_store: Optional[PersistentLookupStore] = None
+
+
+def _memoized(name: str) -> MemoizedTransducer:
+    """
+    Returns the memoized version of the FST in shared.expensive with the given name.
+    """
+    transducer = _memoized_fsts.get(name)
+    if transducer is not None:
+        return transducer
+
+    global _persistent_store
+
+    with _memoized_fsts_lock:
+        if name not in _memoized_fsts:
+            config = settings.FST_LOOKUP_CACHE
+            if config["PERSISTENT_STORE"] and _persistent_store is None:
+                _persistent_store = PersistentLookupStore(
+                    Path(config["PERSISTENT_STORE"])
+                )
+            _memoized_fsts[name] = MemoizedTransducer(
+                lambda: getattr(expensive, name),
+                expensive.fst_paths[name],
+                max_entries=config["MAX_ENTRIES"],
+                store=_persistent_store,
+            )
+        return _memoized_fsts[name]
+
+
+def close_persistent_store() -> None:
+    """
+    Closes the connection to the persistent lookup store, if it's open, e.g., before
+    forking worker processes.
+    """
+    if _persistent_store is not None:
+        _persistent_store.close()
 
 
 def parse_analyses(raw_analyses: Iterable[str]) -> Generator[Analysis, None, None]:
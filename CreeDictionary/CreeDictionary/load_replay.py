@@ -0,0 +1,227 @@
+"""
+Replays requests against a running server, to measure how much load it can take.
+
+Requests come from a gunicorn access log (see gunicorn.conf.py) or from a list of
+queries. Only the routes that do real work are replayed:
+
+    /search?q=...               the search page
+    /_search_results/<q>/       the search results, fetched by the search page
+    /word/<lemma>/              the word detail page
+    /_lemma_details/?...        the paradigm, fetched by the search page
+    /click-in-text/?q=...       the click-in-text API
+
+Each route gets its own throughput, latency percentiles, and error rate.
+
+Run it with `manage.py replayload`.
+"""
+
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO
+from urllib.parse import quote, urlencode, urlsplit
+
+# On Sapir, every path may be prefixed with the script name
+SCRIPT_NAME_PATTERN = r"(?:/cree-dictionary)?"
+
+ROUTES = {
+    "search": re.compile(SCRIPT_NAME_PATTERN + r"/search/?$"),
+    "search-results": re.compile(SCRIPT_NAME_PATTERN + r"/_search_results/[^/]+/$"),
+    "word": re.compile(SCRIPT_NAME_PATTERN + r"/word/[^/]+/$"),
+    "lemma-details": re.compile(SCRIPT_NAME_PATTERN + r"/_lemma_details/$"),
+    "click-in-text": re.compile(SCRIPT_NAME_PATTERN + r"/click-in-text/$"),
+}
+
+# gunicorn's default access_log_format, which is Apache's "combined" log format:
+#   %(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"
+ACCESS_LOG_LINE = re.compile(
+    r"^\S+ \S+ \S+ \[[^\]]*\] "
+    r'"(?P<method>[A-Z]+) (?P<target>\S+) [^"]*" (?P<status>\d{3}) '
+)
+
+
+class Request(NamedTuple):
+    route: str
+    # the path and the query string, e.g., "/search?q=nip%C3%A2w"
+    target: str
+
+
+class Response(NamedTuple):
+    route: str
+    seconds: float
+    # None when the server could not be reached at all
+    status: Optional[int]
+
+    @property
+    def is_error(self) -> bool:
+        return self.status is None or self.status >= 500
+
+
+def route_of(target: str) -> Optional[str]:
+    """
+    The name of the route that the request target goes to, if it is replayed at all.
+
+    >>> route_of("/_search_results/n%C3%AEpaw/")
+    'search-results'
+    >>> route_of("/cree-dictionary/search?q=nipaw")
+    'search'
+    >>> route_of("/static/CreeDictionary/favicon.ico") is None
+    True
+    """
+    path = urlsplit(target).path
+    for route, pattern in ROUTES.items():
+        if pattern.match(path):
+            return route
+    return None
+
+
+def parse_access_log(lines: Iterable[str]) -> Iterator[Request]:
+    """
+    The GET requests to replayable routes in a gunicorn access log.
+
+    >>> log = [
+    ...     '127.0.0.1 - - [18/Oct/2026:10:00:00 +0000] "GET /search?q=nipaw HTTP/1.1" 200 '
+    ...     '5120 "-" "Mozilla/5.0"',
+    ...     '127.0.0.1 - - [18/Oct/2026:10:00:01 +0000] "GET /static/app.js HTTP/1.1" 200 '
+    ...     '10 "-" "Mozilla/5.0"',
+    ...     'a line that is not from the access log',
+    ... ]
+    >>> list(parse_access_log(log))
+    [Request(route='search', target='/search?q=nipaw')]
+    """
+    for line in lines:
+        match = ACCESS_LOG_LINE.match(line)
+        if match is None or match.group("method") != "GET":
+            continue
+        target = match.group("target")
+        route = route_of(target)
+        if route is not None:
+            yield Request(route, target)
+
+
+def requests_for_queries(
+    queries: Iterable[str], lemma_ids: Dict[str, List[int]]
+) -> Iterator[Request]:
+    """
+    The requests that searching for each query makes, in the order that the search
+    page would make them.
+
+    :param lemma_ids: the ids of the lemmas whose text is the query, so that their
+        details and paradigms are requested too.
+    """
+    for query in queries:
+        yield Request("search", "/search?" + urlencode({"q": query}))
+        yield Request("search-results", f"/_search_results/{quote(query)}/")
+        if query in lemma_ids:
+            yield Request("word", f"/word/{quote(query)}/")
+        for lemma_id in lemma_ids.get(query, []):
+            yield Request(
+                "lemma-details",
+                "/_lemma_details/?"
+                + urlencode({"lemma-id": lemma_id, "paradigm-size": "BASIC"}),
+            )
+        yield Request("click-in-text", "/click-in-text/?" + urlencode({"q": query}))
+
+
+def read_queries(query_file: TextIO) -> List[str]:
+    """
+    One query per line; blank lines and comments (#) are skipped.
+    """
+    lines = (line.strip() for line in query_file)
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def replay(
+    requests: Iterable[Request],
+    base_url: str,
+    concurrency: int,
+    rate: Optional[float] = None,
+    timeout: float = 30.0,
+) -> List[Response]:
+    """
+    Sends every request to the server at base_url, from `concurrency` threads.
+
+    :param rate: the most requests to start per second, across all threads. With no
+        rate, each thread sends its next request as soon as the previous one finishes.
+    """
+    base_url = base_url.rstrip("/")
+    # at most `concurrency` requests in flight:
+    slots = threading.Semaphore(concurrency)
+    responses: List[Response] = []
+
+    def send(request: Request) -> None:
+        try:
+            responses.append(
+                _timed_get(request.route, base_url + request.target, timeout)
+            )
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        start = time.perf_counter()
+        for n, request in enumerate(requests):
+            if rate:
+                delay = start + n / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            slots.acquire()
+            executor.submit(send, request)
+
+    return responses
+
+
+def summarize(responses: List[Response], seconds: float) -> Dict[str, Dict[str, float]]:
+    """
+    Throughput (requests per second), latency percentiles (in milliseconds), and error
+    rate of each route, and of all routes together ("total").
+    """
+    by_route: Dict[str, List[Response]] = {}
+    for response in responses:
+        by_route.setdefault(response.route, []).append(response)
+    by_route["total"] = responses
+
+    summary = {}
+    for route, route_responses in by_route.items():
+        if not route_responses:
+            continue
+        latencies = sorted(response.seconds * 1000 for response in route_responses)
+        errors = sum(response.is_error for response in route_responses)
+        summary[route] = {
+            "requests": len(route_responses),
+            "throughput": len(route_responses) / seconds if seconds else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "error_rate": errors / len(route_responses),
+        }
+    return summary
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    The nearest-rank percentile of values that are already sorted.
+
+    >>> percentile(list(range(1, 101)), 95)
+    95
+    >>> percentile([3.0], 99)
+    3.0
+    """
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _timed_get(route: str, url: str, timeout: float) -> Response:
+    start = time.perf_counter()
+    status: Optional[int]
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return Response(route, time.perf_counter() - start, status)
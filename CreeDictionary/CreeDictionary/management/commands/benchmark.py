@@ -0,0 +1,102 @@
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from CreeDictionary.benchmarks import collect_benchmarks, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = """Benchmark searches, paradigms, and analysis utilities.
+
+    Runs against the test database, so set USE_TEST_DB=True. See
+    CreeDictionary/benchmarks.py for what is measured.
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        parser.add_argument(
+            "--rounds", type=int, default=5, help="times to run each benchmark"
+        )
+        parser.add_argument(
+            "-k",
+            "--filter",
+            action="append",
+            default=[],
+            help="only run benchmarks whose name contains this (may be repeated)",
+        )
+        parser.add_argument(
+            "--list", action="store_true", help="list the benchmarks and exit"
+        )
+        parser.add_argument(
+            "-o", "--output", type=Path, help="write the results to this JSON file"
+        )
+        parser.add_argument(
+            "--compare",
+            type=Path,
+            metavar="BASELINE",
+            help="compare the results against an earlier JSON file",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="fraction of slow-down that counts as a regression (default: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.USE_TEST_DB:
+            raise CommandError(
+                "benchmarks must run against the test database; set USE_TEST_DB=True"
+            )
+        if options["rounds"] < 1:
+            raise CommandError("--rounds must be at least 1")
+
+        baseline = None
+        if options["compare"]:
+            baseline = json.loads(options["compare"].read_text(encoding="UTF-8"))
+
+        benchmarks = [
+            benchmark
+            for benchmark in collect_benchmarks()
+            if not options["filter"]
+            or any(pattern in benchmark.name for pattern in options["filter"])
+        ]
+        if options["list"]:
+            for benchmark in benchmarks:
+                self.stdout.write(benchmark.name)
+            return
+
+        def progress(name, result):
+            self.stdout.write(
+                f"{name:<32} {result['median_per_operation'] * 1000:>10.3f} ms/op"
+                f" ({result['operations']} ops, median of {result['rounds']} rounds)"
+            )
+
+        results = run_benchmarks(benchmarks, options["rounds"], progress)
+
+        if options["output"]:
+            options["output"].write_text(
+                json.dumps(results, indent=2, ensure_ascii=False), encoding="UTF-8"
+            )
+
+        if baseline is None:
+            return
+
+        threshold = options["threshold"]
+        regressions = []
+        self.stdout.write(f"\nCompared with {options['compare']}:")
+        for comparison in compare(baseline, results):
+            if comparison.is_regression(threshold):
+                regressions.append(comparison.name)
+                style = self.style.ERROR
+            else:
+                style = self.style.SUCCESS
+            self.stdout.write(style(f"{comparison.name:<32} {comparison.ratio:>8.2f}x"))
+
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} benchmark(s) are more than {threshold:.0%} "
+                f"slower: {', '.join(regressions)}"
+            )
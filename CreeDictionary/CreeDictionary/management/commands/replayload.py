@@ -0,0 +1,130 @@
+import json
+import time
+from argparse import ArgumentParser
+from itertools import islice
+from pathlib import Path
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+
+from API.models import Wordform
+from CreeDictionary.load_replay import (
+    ROUTES,
+    parse_access_log,
+    read_queries,
+    replay,
+    requests_for_queries,
+    summarize,
+)
+
+
+class Command(BaseCommand):
+    help = """Replay searches and word lookups against a running server.
+
+    Requests come from a gunicorn access log, or from a list of queries (one per
+    line). Reports the throughput, latency percentiles, and error rate of each route.
+    """
+
+    def add_arguments(self, parser: ArgumentParser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            "--access-log", type=Path, help="replay the requests in this access log"
+        )
+        source.add_argument(
+            "--queries",
+            type=Path,
+            help="replay the requests that searching for each query in this file makes",
+        )
+        parser.add_argument(
+            "--base-url",
+            default="http://127.0.0.1:8000",
+            help="the server to send requests to (default: %(default)s)",
+        )
+        parser.add_argument(
+            "-c",
+            "--concurrency",
+            type=int,
+            default=3,
+            help="requests in flight at once (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            help="requests started per second (default: as fast as possible)",
+        )
+        parser.add_argument("--limit", type=int, help="send at most this many requests")
+        parser.add_argument(
+            "--route",
+            action="append",
+            choices=list(ROUTES),
+            help="only replay requests to this route (may be repeated)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30.0,
+            help="seconds to wait for each response (default: %(default)s)",
+        )
+        parser.add_argument(
+            "--json", type=Path, help="also write the summary to this JSON file"
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        if options["access_log"]:
+            with options["access_log"].open(encoding="UTF-8", errors="replace") as log:
+                requests = list(parse_access_log(log))
+        else:
+            with options["queries"].open(encoding="UTF-8") as query_file:
+                queries = read_queries(query_file)
+            requests = list(requests_for_queries(queries, _lemma_ids(queries)))
+
+        if options["route"]:
+            requests = [r for r in requests if r.route in options["route"]]
+        requests = list(islice(requests, options["limit"]))
+        if not requests:
+            raise CommandError("there are no requests to replay")
+
+        self.stdout.write(
+            f"Replaying {len(requests)} requests against {options['base_url']} "
+            f"with concurrency {options['concurrency']}..."
+        )
+        start = time.perf_counter()
+        responses = replay(
+            requests,
+            options["base_url"],
+            options["concurrency"],
+            rate=options["rate"],
+            timeout=options["timeout"],
+        )
+        summary = summarize(responses, time.perf_counter() - start)
+
+        self.stdout.write(
+            f"{'route':<16}{'requests':>10}{'req/s':>10}"
+            f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>10}"
+        )
+        for route, stats in summary.items():
+            self.stdout.write(
+                f"{route:<16}{stats['requests']:>10}{stats['throughput']:>10.1f}"
+                f"{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}"
+                f"{stats['error_rate']:>10.1%}"
+            )
+
+        if options["json"]:
+            options["json"].write_text(json.dumps(summary, indent=2), encoding="UTF-8")
+
+
+def _lemma_ids(queries: List[str]) -> Dict[str, List[int]]:
+    """
+    The ids of the lemmas spelled exactly like each query.
+    """
+    lemma_ids: Dict[str, List[int]] = {}
+    for text, lemma_id in (
+        Wordform.objects.filter(is_lemma=True, text__in=queries)
+        .order_by("id")
+        .values_list("text", "id")
+    ):
+        lemma_ids.setdefault(text, []).append(lemma_id)
+    return lemma_ids
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from API.apps import save_full_form_index
+
+
+class Command(BaseCommand):
+    help = """Build and save the full form index of the current dictionary.
+
+    Importing a dictionary already does this. Run it after upgrading the analyzer
+    FST: until then, searches analyze every query with the FST.
+    """
+
+    def handle(self, *args, **options):
+        save_full_form_index()
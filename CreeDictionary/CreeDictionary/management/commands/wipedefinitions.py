@@ -3,7 +3,13 @@ from argparse import ArgumentParser
 from django.core.management.base import BaseCommand
 from django.db import connection
 
-from API.models import Definition, DictionarySource, EnglishKeyword, Wordform
+from API.models import (
+    Definition,
+    DictionarySource,
+    DictionaryVersion,
+    EnglishKeyword,
+    Wordform,
+)
 
 
 class Command(BaseCommand):
@@ -37,3 +43,7 @@ class Command(BaseCommand):
                 # SQLite does not have truncate; it would potentially be
                 # faster to drop and recreate these tables.
                 cursor.execute(f"DELETE FROM {model._meta.db_table}")
+
+        if options["yes_really"]:
+            # Anything derived from the wiped dictionary is now out of date:
+            DictionaryVersion.stamp_new_version()
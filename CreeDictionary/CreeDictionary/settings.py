@@ -62,6 +62,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Server-Timing headers and per-request timing logs
+    "CreeDictionary.timing.server_timing_middleware",
+    # reads the dictionary version once per request
+    "API.apps.dictionary_version_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -277,8 +281,41 @@ USE_TZ = True
 
 ############################## API app settings ###############################
 
-# We only apply affix search for user queries longer than the threshold length
-AFFIX_SEARCH_THRESHOLD = 4
+# Affix searches find (at most) this many of the best matches -- exact matches, then
+# lemmas, most frequent first -- in each of Cree and English
+AFFIX_SEARCH_MAX_RESULTS = 10
+
+# We only apply infix search (and fuzzy search) for user queries longer than the
+# threshold length
+INFIX_SEARCH_THRESHOLD = 4
+
+# When the FST can't analyze a (probably misspelled) Cree query, we suggest up to this
+# many of the closest lemmas, within this edit distance (see cree_lev_dist.py)
+FUZZY_SEARCH_MAX_RESULTS = 5
+FUZZY_SEARCH_MAX_DISTANCE = 2
+
+# Serialized search results are cached until the next dictionary import.
+# The BACKEND is either "in-process" -- a least-recently used cache in each
+# process, bounded by MAX_ENTRIES and MAX_BYTES -- or the alias of a cache in
+# CACHES, so that all gunicorn workers can share results.
+SEARCH_RESULT_CACHE = {
+    "BACKEND": env("SEARCH_RESULT_CACHE_BACKEND", default="in-process"),
+    "MAX_ENTRIES": env.int("SEARCH_RESULT_CACHE_MAX_ENTRIES", default=4096),
+    "MAX_BYTES": env.int("SEARCH_RESULT_CACHE_MAX_BYTES", default=64 * 1024 * 1024),
+    # how long (in seconds) a Django cache keeps results
+    "TIMEOUT": env.int("SEARCH_RESULT_CACHE_TIMEOUT", default=24 * 60 * 60),
+}
+
+# The results of FST lookups (see CreeDictionary/hfstol.py) are memoized.
+# Optionally, lookups are also kept in an SQLite file, so that they survive restarts.
+FST_LOOKUP_CACHE = {
+    "MAX_ENTRIES": env.int("FST_LOOKUP_CACHE_MAX_ENTRIES", default=65536),
+    "PERSISTENT_STORE": env("FST_LOOKUP_CACHE_STORE", default=None),
+}
+
+# How many analyses to remember the linguistic breakdown of (see
+# API.search.breakdown_analysis)
+ANALYSIS_BREAKDOWN_CACHE_SIZE = env.int("ANALYSIS_BREAKDOWN_CACHE_SIZE", default=16384)
 
 ############################## staticfiles app ###############################
 
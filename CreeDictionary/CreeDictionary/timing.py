@@ -0,0 +1,153 @@
+"""
+Per-stage timing of requests.
+
+Code marks its expensive stages with spans:
+
+    with timing.span("fst"):
+        analyses = hfstol.analyze(query)
+
+The middleware collects the spans of each request -- along with the number of SQL
+queries and the time spent running them -- and reports them in a Server-Timing
+response header (visible in the network tab of browser developer tools) and in one
+structured (JSON) log line.
+
+Spans with the same name add up, and spans can be nested (e.g., "fst" happens during
+"fetch"), so the stages don't necessarily add up to the total.
+
+Outside of a request (e.g., in management commands and tests), spans do nothing.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, Optional
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    """
+    The time spent in each stage of one request.
+    """
+
+    def __init__(self):
+        # stage name -> seconds
+        self.stages: Dict[str, float] = {}
+        self.sql_queries = 0
+        self.sql_seconds = 0.0
+        # extra fields for the log line, e.g., the query and number of results
+        self.fields: Dict[str, Any] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count_sql(self, execute, sql, params, many, context):
+        """
+        A database execute wrapper; see
+        https://docs.djangoproject.com/en/2.2/topics/db/instrumentation/
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.sql_queries += 1
+
+    def server_timing(self, total_seconds: float) -> str:
+        """
+        The value of the Server-Timing header.
+
+        See: https://www.w3.org/TR/server-timing/
+        """
+        metrics = [
+            f"{name};dur={_ms(seconds)}" for name, seconds in self.stages.items()
+        ]
+        metrics.append(
+            f'sql;dur={_ms(self.sql_seconds)};desc="{self.sql_queries} queries"'
+        )
+        metrics.append(f"total;dur={_ms(total_seconds)}")
+        return ", ".join(metrics)
+
+
+_current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Times the enclosed block as the named stage of the current request.
+    """
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def annotate(**fields: Any) -> None:
+    """
+    Adds fields (e.g., query="nipâw", results=3) to the log line of the current request.
+    """
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.fields.update(fields)
+
+
+def server_timing_middleware(get_response):
+    """
+    Times every request, adds a Server-Timing header to the response, and logs the
+    timings of requests that recorded any stages or fields.
+    """
+
+    def middleware(request):
+        timings = RequestTimings()
+        token = _current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timings.count_sql):
+                response = get_response(request)
+        finally:
+            _current_timings.reset(token)
+        total_seconds = time.perf_counter() - start
+
+        response["Server-Timing"] = timings.server_timing(total_seconds)
+
+        if timings.stages or timings.fields:
+            logger.info(
+                json.dumps(
+                    {
+                        "path": request.path,
+                        "status": response.status_code,
+                        **timings.fields,
+                        "sql_queries": timings.sql_queries,
+                        "ms": {
+                            **{
+                                name: _ms(seconds)
+                                for name, seconds in timings.stages.items()
+                            },
+                            "sql": _ms(timings.sql_seconds),
+                            "total": _ms(total_seconds),
+                        },
+                    },
+                    ensure_ascii=False,
+                )
+            )
+
+        return response
+
+    return middleware
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
@@ -121,6 +121,14 @@ _urlpatterns = [
         api_views.click_in_text,
         "cree-dictionary-word-click-in-text-api",
     ),
+    # click-in-text for a whole passage at once
+    (
+        "click-in-text/bulk/",
+        api_views.click_in_text_bulk,
+        "cree-dictionary-word-click-in-text-bulk-api",
+    ),
+    # for health checks: whether expensive resources are loaded
+    ("_ready/", views.readiness, "cree-dictionary-readiness"),
     ("admin/", admin.site.urls, "admin"),
     (
         "",
@@ -2,11 +2,22 @@ from http import HTTPStatus
 from typing import Any, Dict, Literal
 
 from API.models import Wordform
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotFound
+from API.search import query_routing_stats
+from API.search_cache import (
+    get_search_result_cache,
+    search_with_affixes_or_infixes_serialized,
+)
+from django.http import (
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseNotFound,
+    JsonResponse,
+)
 from django.shortcuts import redirect, render
 from django.views.decorators.http import require_GET
 from utils import ParadigmSize
 
+from CreeDictionary import timing, warmup
 from CreeDictionary.forms import WordSearchForm
 
 from .utils import url_for_query
@@ -79,10 +90,8 @@ def index(request):  # pragma: no cover
     user_query = request.GET.get("q", None)
 
     if user_query:
-        search_results = [
-            search_result.serialize()
-            for search_result in Wordform.search_with_affixes(user_query)
-        ]
+        search_results = search_with_affixes_or_infixes_serialized(user_query)
+        timing.annotate(query=user_query, results=len(search_results))
         did_search = True
     else:
         search_results = []
@@ -101,22 +110,23 @@ def index(request):  # pragma: no cover
         search_results=search_results,
         did_search=did_search,
     )
-    return HttpResponse(render(request, "CreeDictionary/index.html", context))
+    with timing.span("render"):
+        return HttpResponse(render(request, "CreeDictionary/index.html", context))
 
 
 def search_results(request, query_string: str):  # pragma: no cover
     """
     returns rendered boxes of search results according to user query
     """
-    results = Wordform.search_with_affixes(query_string)
-    return render(
-        request,
-        "CreeDictionary/search-results.html",
-        {
-            "query_string": query_string,
-            "search_results": [r.serialize() for r in results],
-        },
-    )
+    search_results = search_with_affixes_or_infixes_serialized(query_string)
+    timing.annotate(query=query_string, results=len(search_results))
+
+    with timing.span("render"):
+        return render(
+            request,
+            "CreeDictionary/search-results.html",
+            {"query_string": query_string, "search_results": search_results},
+        )
 
 
 @require_GET
@@ -205,6 +215,29 @@ def redirect_search(request, query_string: str):
     return redirect(url_for_query(query_string), permanent=True)
 
 
+@require_GET
+def readiness(request):
+    """
+    Reports which expensive resources are loaded, and how long each took to load.
+
+    Responds with 503 Service Unavailable until all of them are loaded, so that load
+    balancers and health checks can wait for a worker to be warm.
+
+    Also reports how this worker's searches are doing, e.g., search result cache hits,
+    and how many queries skipped the Cree search.
+    """
+    resources = warmup.readiness()
+    ready = all(status["loaded"] for status in resources.values())
+    metrics = {
+        "search_result_cache": get_search_result_cache().stats(),
+        "query_routing": query_routing_stats(),
+    }
+    return JsonResponse(
+        {"ready": ready, "resources": resources, "metrics": metrics},
+        status=HTTPStatus.OK if ready else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
+
+
 def styles(request):
     """
     Display ALL of the styles.
@@ -0,0 +1,136 @@
+"""
+Loads the expensive, read-only resources that searches and paradigms need.
+
+Everything here is loaded lazily by default, so the first few requests to every
+worker pay for it. Calling warm_up() loads everything up front. With gunicorn's
+preload_app (see gunicorn.conf.py), warm_up() runs once in the master process, and
+the forked workers share the loaded resources copy-on-write.
+
+readiness() reports which resources are loaded, and how long each one took.
+"""
+
+import importlib
+import logging
+import sys
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Union
+
+from shared import expensive
+
+logger = logging.getLogger(__name__)
+
+
+class Resource(NamedTuple):
+    # loads the resource, if it isn't loaded already
+    load: Callable[[], object]
+    # whether the resource has been loaded, by warm_up() or otherwise
+    is_loaded: Callable[[], bool]
+
+
+def _expensive_instance(name: str) -> Resource:
+    return Resource(
+        load=lambda: getattr(expensive, name),
+        is_loaded=lambda: name in vars(expensive),
+    )
+
+
+def _affix_searcher(name: str) -> Resource:
+    return _dictionary_resource(f"{name}_affix_searcher")
+
+
+def _load_morpheme_rankings():
+    from API.apps import read_morpheme_rankings
+    from API.models import Wordform
+
+    if not Wordform.MORPHEME_RANKINGS:
+        read_morpheme_rankings()
+
+
+def _morpheme_rankings_are_loaded():
+    from API.models import Wordform
+
+    return bool(Wordform.MORPHEME_RANKINGS)
+
+
+def _dictionary_resource(attribute: str) -> Resource:
+    """
+    One of the resources derived from the current dictionary (see
+    APIConfig.dictionary_resources()).
+    """
+
+    def load():
+        from API.apps import APIConfig
+
+        return getattr(APIConfig.active_instance().dictionary_resources(), attribute)
+
+    def is_loaded():
+        from API.apps import APIConfig
+
+        resources = APIConfig.active_instance()._dictionary_resources
+        # it's a cached_property, so it ends up in the instance's __dict__:
+        return resources is not None and attribute in vars(resources)
+
+    return Resource(load, is_loaded)
+
+
+def _read_at_import(module_name: str, attribute: str) -> Resource:
+    """
+    A resource that its module reads when it's imported, e.g., LABELS.
+    """
+
+    def load():
+        return getattr(importlib.import_module(module_name), attribute)
+
+    return Resource(load, is_loaded=lambda: module_name in sys.modules)
+
+
+# In the order that warm_up() loads them:
+RESOURCES: Dict[str, Resource] = {
+    "relaxed_analyzer": _expensive_instance("relaxed_analyzer"),
+    "strict_generator": _expensive_instance("strict_generator"),
+    "paradigm_filler": _expensive_instance("paradigm_filler"),
+    "labels": _read_at_import("utils.fst_analysis_parser", "LABELS"),
+    # read into ParadigmFiller._frequency
+    "paradigm_frequencies": _read_at_import("utils.paradigm_filler", "ParadigmFiller"),
+    "morpheme_rankings": Resource(
+        load=_load_morpheme_rankings, is_loaded=_morpheme_rankings_are_loaded
+    ),
+    "cree_affix_searcher": _affix_searcher("cree"),
+    "english_affix_searcher": _affix_searcher("english"),
+    # (used when the affix search finds nothing)
+    "cree_infix_searcher": _dictionary_resource("cree_infix_searcher"),
+    "english_infix_searcher": _dictionary_resource("english_infix_searcher"),
+    "full_form_index": _dictionary_resource("full_form_index"),
+    "generated_forms": _dictionary_resource("generated_forms"),
+    "query_classifier": _dictionary_resource("query_classifier"),
+    "preverb_index": _dictionary_resource("preverb_index"),
+}
+
+# How long (in seconds) warm_up() took to load each resource
+_load_times: Dict[str, float] = {}
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Loads all of the expensive resources. Returns how long each one took, in seconds.
+    """
+    for name, resource in RESOURCES.items():
+        if name in _load_times:
+            continue
+        start = time.perf_counter()
+        resource.load()
+        _load_times[name] = time.perf_counter() - start
+        logger.info("warm-up: loaded %s in %.3fs", name, _load_times[name])
+
+    return dict(_load_times)
+
+
+def readiness() -> Dict[str, Dict[str, Union[bool, Optional[float]]]]:
+    """
+    Whether each resource is loaded, and how many seconds it took to load. The time is
+    None when the resource was not loaded by warm_up() (e.g., on first use).
+    """
+    return {
+        name: {"loaded": resource.is_loaded(), "seconds": _load_times.get(name)}
+        for name, resource in RESOURCES.items()
+    }
@@ -6,7 +6,19 @@ from typing import DefaultDict, Dict, List, NamedTuple, Set, Tuple, Optional
 from colorama import init
 from django.conf import settings
 
-from API.models import Definition, DictionarySource, EnglishKeyword, Wordform
+from API.apps import (
+    save_affix_searchers,
+    save_full_form_index,
+    save_generated_forms,
+    save_query_classifier,
+)
+from API.models import (
+    Definition,
+    DictionarySource,
+    DictionaryVersion,
+    EnglishKeyword,
+    Wordform,
+)
 from DatabaseManager import xml_entry_lemma_finder
 from DatabaseManager.cree_inflection_generator import expand_inflections
 from DatabaseManager.log import DatabaseManagerLogger
@@ -184,7 +196,8 @@ def import_xmls(crkeng_file_path: Path, verbose=True):
         nonlocal keyword_counter
 
         keywords = [
-            EnglishKeyword(id=unique_id, text=english_keyword, lemma=wordform)
+            # keywords are always stored lowercased (see EnglishKeyword.text)
+            EnglishKeyword(id=unique_id, text=english_keyword.lower(), lemma=wordform)
             for unique_id, english_keyword in enumerate(
                 stem_keywords(translation.text), start=keyword_counter
             )
@@ -224,14 +237,18 @@ def import_xmls(crkeng_file_path: Path, verbose=True):
         db_inflections.append(db_wordform)
 
         for str_definition, source_strings in entry.translations:
+            source_ids = set(source_strings)
 
             db_definition = Definition(
-                id=definition_counter, text=str_definition, wordform=db_wordform
+                id=definition_counter,
+                text=str_definition,
+                wordform=db_wordform,
+                raw_source_ids=Definition.join_source_ids(source_ids),
             )
 
             # Figure out what citations we should be making.
             assert definition_counter not in citations
-            citations[definition_counter] = set(source_strings)
+            citations[definition_counter] = source_ids
 
             definition_counter += 1
             db_definitions.append(db_definition)
@@ -326,13 +343,15 @@ def import_xmls(crkeng_file_path: Path, verbose=True):
                 for entry_with_translation in entries_with_translations:
 
                     for translation in entry_with_translation.translations:
+                        source_ids = set(translation.sources)
                         db_definition = Definition(
                             id=definition_counter,
                             text=translation.text,
                             wordform=db_wordform,
+                            raw_source_ids=Definition.join_source_ids(source_ids),
                         )
                         assert definition_counter not in citations
-                        citations[definition_counter] = set(translation.sources)
+                        citations[definition_counter] = source_ids
 
                         definition_counter += 1
                         db_definitions.append(db_definition)
@@ -345,6 +364,10 @@ def import_xmls(crkeng_file_path: Path, verbose=True):
         for wordform in db_wordforms_for_analysis:
             wordform.lemma = db_lemma
 
+    for wordform in db_inflections:
+        wordform.parse_analysis()
+    Wordform.disambiguate_homographs(db_inflections)
+
     logger.info("Inserting %d inflections to database..." % len(db_inflections))
     Wordform.objects.bulk_create(db_inflections)
     logger.info("Done inserting.")
@@ -371,11 +394,27 @@ def import_xmls(crkeng_file_path: Path, verbose=True):
     EnglishKeyword.objects.bulk_create(db_keywords)
     logger.info("Done inserting.")
 
-    # Convert the sources (stored as a string) to citations
-    # The reason why this is not done in the first place and there is a conversion:
-    #   django's efficient `bulk_create` method we use above doesn't play well with ManyToManyField
-    for dfn in Definition.objects.all():
-        source_ids = sorted(source.abbrv for source in dfn.citations.all())
-        for source_id in source_ids:
-            dfn.citations.add(source_id)
-        dfn.save()
+    # Anything derived from the previous dictionary is now out of date:
+    version = DictionaryVersion.stamp_new_version()
+    logger.info("Stamped dictionary version: %s", version)
+
+    logger.info("Saving affix search tries...")
+    save_affix_searchers()
+    logger.info("Done saving.")
+
+    logger.info("Saving full form index...")
+    save_full_form_index()
+    logger.info("Done saving.")
+
+    logger.info("Saving query classifier...")
+    save_query_classifier()
+    logger.info("Done saving.")
+
+    logger.info("Saving generated forms...")
+    save_generated_forms(
+        (generated_analysis, form)
+        for generated in expanded.values()
+        for generated_analysis, forms in generated
+        for form in forms
+    )
+    logger.info("Done saving.")
@@ -13,16 +13,19 @@ strict_generator: TransducerFile
 relaxed_analyzer: TransducerFile
 strict_analyzer: TransducerFile
 
+# Where the FSTs above 👆🏼 are loaded from
+fst_paths = dict(
+    strict_generator=_fst_dir / "crk-strict-generator.hfstol",
+    relaxed_analyzer=_fst_dir / "crk-relaxed-analyzer-for-dictionary.hfstol",
+    strict_analyzer=_fst_dir / "crk-strict-analyzer-for-dictionary.hfstol",
+)
+
 # How to create one of the above 👆🏼 instances
 _instance_factory = dict(
     paradigm_filler=lambda: pf.ParadigmFiller.default_filler(),
-    strict_generator=lambda: TransducerFile(_fst_dir / "crk-strict-generator.hfstol"),
-    relaxed_analyzer=lambda: TransducerFile(
-        _fst_dir / "crk-relaxed-analyzer-for-dictionary.hfstol"
-    ),
-    strict_analyzer=lambda: TransducerFile(
-        _fst_dir / "crk-strict-analyzer-for-dictionary.hfstol"
-    ),
+    strict_generator=lambda: TransducerFile(fst_paths["strict_generator"]),
+    relaxed_analyzer=lambda: TransducerFile(fst_paths["relaxed_analyzer"]),
+    strict_analyzer=lambda: TransducerFile(fst_paths["strict_analyzer"]),
 )
 
 
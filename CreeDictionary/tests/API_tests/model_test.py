@@ -2,14 +2,23 @@ import json
 from typing import List
 
 import pytest
-from API.models import Wordform
-from API.search import fetch_cree_and_english_results, to_internal_form
+from API.apps import APIConfig
+from API.models import DictionaryVersion, Wordform
+from API.search import (
+    breakdown_analysis,
+    fetch_cree_and_english_results,
+    search_many_with_exact_match,
+    to_internal_form,
+)
+from django.core.management import call_command
+from django.db.models import Q
 from hypothesis import assume, given
 from paradigm import EmptyRowType, InflectionCell, Layout, TitleRow
 from tests.conftest import lemmas
-from utils.enums import Language
+from utils import fst_analysis_parser
+from utils.enums import Language, WordClass
 
-from CreeDictionary import settings
+from CreeDictionary import hfstol, settings
 
 
 @pytest.fixture(scope="module")
@@ -37,9 +46,9 @@ def test_when_linguistic_breakdown_absent():
     query = "pe-"
     search_results = Wordform.search_with_affixes(query)
 
-    assert len(search_results) == 1
-
+    # (affix search also finds the words that start with pê-)
     result = search_results[0]
+    assert result.matched_cree == "pê-"
     assert (
         result.linguistic_breakdown_head == ()
         and result.linguistic_breakdown_tail == ()
@@ -143,6 +152,39 @@ def test_compare_simple_vs_affix_search() -> None:
     assert results_contains_wordform(lemma, general_results)
 
 
+@pytest.mark.django_db
+def test_compare_affix_vs_infix_search() -> None:
+    """
+    Infix search finds everything that affix search finds, plus words that contain the
+    query in the middle.
+    """
+    query = "wâpam"
+    infixed = "kanawâpamêw"
+
+    affix_results = Wordform.search_with_affixes(query)
+    infix_results = Wordform.search_with_infixes(query)
+
+    assert {r.matched_cree for r in affix_results} <= {
+        r.matched_cree for r in infix_results
+    }
+    assert not results_contains_wordform(infixed, affix_results)
+    assert results_contains_wordform(infixed, infix_results)
+
+
+@pytest.mark.django_db
+def test_misspelled_cree_falls_back_to_closest_lemmas() -> None:
+    """
+    The FST can't analyze "wapmew", but "wâpamêw" is close enough.
+    """
+    assert results_contains_wordform("wâpamêw", Wordform.search_with_affixes("wapmew"))
+
+
+@pytest.mark.django_db
+def test_english_keywords_are_not_treated_as_misspelled_cree() -> None:
+    results = Wordform.search_with_affixes("sleep")
+    assert all(result.matched_by == Language.ENGLISH for result in results)
+
+
 @pytest.mark.django_db
 def test_search_for_pronoun() -> None:
     """
@@ -245,6 +287,120 @@ def test_search_serialization_json_parsable(query):
             pytest.fail("SearchResult.serialized method failed to be json compatible")
 
 
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["wâpamêw", "maskwa", "sleep", "nitawi-nipâw"])
+def test_search_issues_a_bounded_number_of_queries(
+    query, django_assert_max_num_queries, django_assert_num_queries
+):
+    """
+    The number of queries should not grow with the number of search results.
+    See: API.search.prefetch_definitions()
+    """
+    with django_assert_max_num_queries(10):
+        results = Wordform.search_with_affixes(query)
+    assert len(results) >= 1
+
+    # Everything needed for serialization should already be loaded:
+    with django_assert_num_queries(0):
+        for result in results:
+            result.serialize()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query,num_analyses,num_queries",
+    [
+        # every analysis matches wordforms exactly (N and V)
+        ("pipon", 2, 2),
+        # the analysis is outside of the paradigm tables (initial change)
+        ("nêpât", 1, 3),
+        # pronouns are handled specially
+        ("ôma", 3, 4),
+    ],
+)
+def test_cree_search_queries_do_not_grow_with_analyses(
+    query, num_analyses, num_queries, django_assert_num_queries
+):
+    """
+    All of the FST analyses are matched with one query, and all of their lemmas are
+    matched with another. None of these are English keywords, so the keywords aren't
+    queried.
+    """
+    user_query = to_internal_form(query)
+    assert len(set(hfstol.analyze(user_query))) == num_analyses
+    APIConfig.active_instance().check_dictionary_version().preverb_index
+    APIConfig.active_instance().dictionary_resources().query_classifier
+
+    with django_assert_num_queries(num_queries):
+        cree_results, _ = fetch_cree_and_english_results(user_query, affix_search=False)
+    assert len(cree_results) >= 1
+
+
+@pytest.fixture
+def saved_full_form_index(monkeypatch):
+    """
+    Saves the full form index, as importing the dictionary does, and loads it.
+    """
+    call_command("savefullformindex")
+    monkeypatch.setattr(APIConfig.active_instance(), "_dictionary_resources", None)
+
+
+@pytest.mark.django_db
+def test_wordforms_in_the_database_skip_the_fst(saved_full_form_index, monkeypatch):
+    analyzed = []
+    analyze_many = hfstol.analyze_many
+
+    def spy(wordforms):
+        wordforms = list(wordforms)
+        analyzed.extend(wordforms)
+        return analyze_many(wordforms)
+
+    monkeypatch.setattr(hfstol, "analyze_many", spy)
+
+    # in a paradigm table, and outside of one (initial change):
+    for query in "nipâwak", "nêpât":
+        cree_results, _ = fetch_cree_and_english_results(
+            to_internal_form(query), affix_search=False
+        )
+        assert {result.lemma.text for result in cree_results} == {"nipâw"}
+
+    assert analyzed == ["nêpât"]
+
+
+@pytest.mark.django_db
+def test_missing_full_form_index_is_not_built(monkeypatch):
+    monkeypatch.setattr(hfstol, "analyzer_hash", lambda: "unsaved-analyzer")
+    monkeypatch.setattr(APIConfig.active_instance(), "_dictionary_resources", None)
+    monkeypatch.setattr(hfstol, "analyze_uncached", None)
+
+    cree_results, _ = fetch_cree_and_english_results(
+        to_internal_form("nipâwak"), affix_search=False
+    )
+    assert {result.lemma.text for result in cree_results} == {"nipâw"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["sleep", "he sleeps and walks"])
+def test_english_keywords_are_matched_in_one_query(query, django_assert_num_queries):
+    APIConfig.active_instance().dictionary_resources().query_classifier
+    # "l" isn't Cree, so the Cree search is skipped: one query for all keywords.
+    with django_assert_num_queries(1):
+        _, english_results = fetch_cree_and_english_results(
+            to_internal_form(query), affix_search=False
+        )
+    assert "nipâw" in {result.matched_cree.text for result in english_results}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["wâp", "ni"])
+def test_affix_search_on_short_queries_is_bounded(query):
+    results = Wordform.search_with_affixes(query)
+
+    assert len(results) >= 1
+    # (at most that many Cree matches, and as many English ones)
+    assert len(results) <= 2 * settings.AFFIX_SEARCH_MAX_RESULTS
+
+
 @pytest.mark.django_db
 def test_search_words_with_preverbs():
     """
@@ -258,6 +414,57 @@ def test_search_words_with_preverbs():
     assert search_result.preverbs[0].text == "nitawi-"
 
 
+@pytest.mark.django_db
+def test_preverb_index_leaves_out_md_only_preverbs():
+    index = APIConfig.active_instance().dictionary_resources().preverb_index
+
+    preverbs = Wordform.objects.filter(Q(inflectional_category="IPV") | Q(pos="IPV"))
+    assert len(index) == sum(not preverb.md_only for preverb in preverbs)
+    assert [text for text, _ in index.search("nitawi")] == ["nitawi-"]
+
+
+@pytest.mark.django_db
+def test_dictionary_resources_are_reloaded_for_a_new_dictionary(monkeypatch):
+    config = APIConfig.active_instance()
+    resources = config.check_dictionary_version()
+    index = resources.preverb_index
+    assert config.check_dictionary_version() is resources
+
+    breakdown_analysis("PV/nitawi+nipâw+V+AI+Ind+3Sg")
+    monkeypatch.setattr(DictionaryVersion, "current", lambda: "new-version")
+
+    new_resources = config.check_dictionary_version()
+    assert new_resources is not resources
+    assert config.dictionary_resources() is new_resources
+    assert new_resources.preverb_index is not index
+    assert new_resources.preverb_index.version == "new-version"
+    # the old breakdowns refer to the old preverbs:
+    assert breakdown_analysis.cache_info().currsize == 0
+
+    # the rest of the tests should use the resources of the test dictionary:
+    monkeypatch.undo()
+    config.check_dictionary_version()
+
+
+@pytest.mark.django_db
+def test_searches_and_paradigms_check_the_dictionary_version_once(monkeypatch):
+    checks = []
+    check_dictionary_version = APIConfig.check_dictionary_version
+
+    def spy(self):
+        checks.append(1)
+        return check_dictionary_version(self)
+
+    monkeypatch.setattr(APIConfig, "check_dictionary_version", spy)
+
+    Wordform.search_with_affixes("nipâw")
+    assert len(checks) == 1
+    search_many_with_exact_match(["nipâw", "sleep"])
+    assert len(checks) == 2
+    Wordform.objects.filter(text="nipâw", is_lemma=True)[0].get_paradigm_layouts()
+    assert len(checks) == 3
+
+
 @pytest.mark.django_db
 def test_search_text_with_ambiguous_word_classes():
     """
@@ -359,3 +566,100 @@ def results_contains_wordform(wordform: str, search_results) -> bool:
         return True
     except AssertionError:
         return False
+
+
+def test_parse_analysis():
+    wordform = Wordform(text="ê-nêpât", analysis="PV/e+IC+nipâw+V+AI+Cnj+3Sg")
+    wordform.parse_analysis()
+
+    assert wordform.fst_lemma == "nipâw"
+    assert wordform.fst_word_class == "VAI"
+    assert wordform.prefix_tags == "PV/e+IC"
+    assert wordform.suffix_tags == "V+AI+Cnj+3Sg"
+    assert wordform.word_class is WordClass.VAI
+
+
+def test_parse_unparsable_analysis():
+    wordform = Wordform(text="pê-", analysis="pê-", pos="IPV")
+    wordform.parse_analysis()
+
+    assert wordform.fst_lemma == wordform.fst_word_class == ""
+    assert wordform.prefix_tags == wordform.suffix_tags == ""
+    # falls back to the part of speech:
+    assert wordform.word_class is WordClass.IPV
+
+
+def test_parse_analysis_with_unknown_word_class(monkeypatch, caplog):
+    monkeypatch.setattr(fst_analysis_parser, "extract_word_class", lambda _: None)
+    wordform = Wordform(text="nipâw", analysis="nipâw+V+AI+Ind+3Sg", pos="V")
+    wordform.parse_analysis()
+
+    assert wordform.fst_lemma == "nipâw"
+    assert wordform.fst_word_class == ""
+    assert wordform.suffix_tags == "V+AI+Ind+3Sg"
+    assert "nipâw+V+AI+Ind+3Sg" in caplog.text
+
+
+@pytest.mark.django_db
+@given(wordform=lemmas())
+def test_imported_wordforms_have_their_analysis_parsed(wordform: Wordform):
+    parsed = Wordform(analysis=wordform.analysis)
+    parsed.parse_analysis()
+
+    assert wordform.fst_lemma == parsed.fst_lemma
+    assert wordform.fst_word_class == parsed.fst_word_class
+    assert wordform.prefix_tags == parsed.prefix_tags
+    assert wordform.suffix_tags == parsed.suffix_tags
+
+
+def test_disambiguate_homographs():
+    def lemma(id, text="ôma", **fields):
+        return Wordform(id=id, text=text, is_lemma=True, lemma_id=id, **fields)
+
+    pronoun = lemma(1, pos="PRON", inflectional_category="PrA", analysis="ôma+Pron")
+    particle = lemma(2, pos="IPC", inflectional_category="IPC", analysis="ôma+Ipc")
+    duplicate = lemma(3, pos="IPC", inflectional_category="IPC", analysis="ôma+Ipc")
+    inflection = Wordform(id=4, text="ôma", lemma=pronoun, analysis="ôma+Pron+Pl")
+    unique = lemma(5, text="nipâw", pos="V", analysis="nipâw+V+AI+Ind+3Sg")
+
+    Wordform.disambiguate_homographs([pronoun, particle, duplicate, inflection, unique])
+
+    assert pronoun.homograph_disambiguator == "pos"
+    assert pronoun.lemma_url == "word/%C3%B4ma/?pos=PRON"
+    assert duplicate.homograph_disambiguator == "id"
+    assert duplicate.lemma_url == "word/%C3%B4ma/?id=3"
+    assert inflection.homograph_disambiguator == inflection.lemma_url == ""
+    assert unique.homograph_disambiguator == ""
+    assert unique.get_absolute_url() == "/word/nip%C3%A2w/"
+
+
+@pytest.mark.django_db
+def test_saving_a_wordform_leaves_its_homographs_alone(django_assert_num_queries):
+    wordform = Wordform(text="maskwa", analysis="maskwa+N+A+Sg", pos="N", is_lemma=True)
+    # the next ID, the (attempted) update, and the insert, in a savepoint:
+    with django_assert_num_queries(5):
+        wordform.save()
+
+    assert wordform.lemma_url == ""
+    # worked out when needed, with the imported maskwa as a homograph:
+    assert wordform.get_absolute_url().startswith("/word/maskwa/?")
+    field = wordform.homograph_disambiguator
+    homographs = Wordform.objects.filter(text="maskwa", is_lemma=True)
+    assert homographs.filter(**{field: getattr(wordform, field)}).get() == wordform
+
+
+@pytest.mark.django_db
+def test_imported_lemma_url_needs_no_queries(django_assert_num_queries):
+    lemmas = list(Wordform.objects.filter(text="maskwa", is_lemma=True))
+    assert lemmas
+
+    with django_assert_num_queries(0):
+        urls = [lemma.get_absolute_url() for lemma in lemmas]
+
+    for lemma, url in zip(lemmas, urls):
+        assert url.startswith("/word/maskwa/")
+        # the URL is enough to find the lemma:
+        field = lemma.homograph_disambiguator
+        if field:
+            homographs = Wordform.objects.filter(text="maskwa", is_lemma=True)
+            assert homographs.filter(**{field: getattr(lemma, field)}).get() == lemma
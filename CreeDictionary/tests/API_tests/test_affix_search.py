@@ -0,0 +1,123 @@
+import pytest
+from API.affix_search import AffixSearcher, InfixSearcher
+
+
+@pytest.fixture
+def searcher():
+    return AffixSearcher(
+        [
+            ("wâpamêw", 1),
+            ("wâpahtam", 2),
+            ("asawâpamêw", 3),
+            ("wapamew", 4),  # same simplified form as 1
+            ("", 5),  # not indexed
+        ]
+    )
+
+
+def test_search_by_prefix(searcher):
+    assert sorted(searcher.search_by_prefix("wâpa")) == [1, 2, 4]
+    assert sorted(searcher.search_by_prefix("wâpam")) == [1, 4]
+    assert list(searcher.search_by_prefix("nipâw")) == []
+
+
+def test_search_by_suffix(searcher):
+    assert sorted(searcher.search_by_suffix("pamew")) == [1, 3, 4]
+    assert sorted(searcher.search_by_suffix("tam")) == [2]
+
+
+def test_save_and_load(searcher, tmp_path):
+    prefixes_path = tmp_path / "prefixes.dawg"
+    suffixes_path = tmp_path / "suffixes.dawg"
+    searcher.save(prefixes_path, suffixes_path)
+
+    loaded = AffixSearcher.load(prefixes_path, suffixes_path)
+
+    for affix in ["w", "wâpa", "asa", "nipâw"]:
+        assert sorted(loaded.search_by_prefix(affix)) == sorted(
+            searcher.search_by_prefix(affix)
+        )
+        assert sorted(loaded.search_by_suffix(affix)) == sorted(
+            searcher.search_by_suffix(affix)
+        )
+    # no temporary files left behind:
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "prefixes.dawg",
+        "suffixes.dawg",
+    ]
+
+
+@pytest.fixture
+def infix_searcher():
+    return InfixSearcher(
+        [
+            ("kî-pimohtêw", 1),
+            ("pimohtêw", 2),
+            ("pimohtêskanawan", 3),
+            ("nipâw", 4),
+            ("", 5),  # not indexed
+        ]
+    )
+
+
+def test_search_by_infix(infix_searcher):
+    # closest matches first:
+    assert infix_searcher.search_by_infix("pimohtê") == [2, 1, 3]
+    assert infix_searcher.search_by_infix("PIMOHTE") == [2, 1, 3]
+    assert infix_searcher.search_by_infix("ipâ") == [4]
+    assert infix_searcher.search_by_infix("sleep") == []
+    assert infix_searcher.search_by_infix("") == []
+
+
+def test_infix_searcher_save_and_load(infix_searcher, tmp_path):
+    path = tmp_path / "infixes.dawg"
+    infix_searcher.save(path)
+
+    loaded = InfixSearcher.load(path)
+
+    for infix in ["w", "mohtê", "nipâw", "kanawan"]:
+        assert loaded.search_by_infix(infix) == infix_searcher.search_by_infix(infix)
+    assert [p.name for p in tmp_path.iterdir()] == ["infixes.dawg"]
+
+
+def test_search_nearest(searcher):
+    # wâpamêw and wapamew simplify to the same word:
+    assert searcher.search_nearest("wapamiw", k=2, max_distance=2) == [1, 4]
+    assert searcher.search_nearest("wâpahtam", k=1, max_distance=2) == [2]
+    assert searcher.search_nearest("nipâw", k=5, max_distance=2) == []
+
+
+def test_search_nearest_keeps_the_k_closest(searcher):
+    # k counts words, and wâpamêw and wapamew simplify to the same word:
+    assert sorted(searcher.search_nearest("wapamew", k=1, max_distance=4)) == [1, 4]
+
+    # asawâpamêw is 3 insertions away; wâpahtam is 3.5 away
+    closest = searcher.search_nearest("wapamew", k=2, max_distance=4)
+    assert sorted(closest[:2]) == [1, 4]
+    assert closest[2:] == [3]
+
+
+def test_search_finds_the_best_matches():
+    searcher = AffixSearcher(
+        [
+            ("nipâw", 1),
+            ("nipâwin", 2),
+            ("nipiy", 3),
+            ("nîpin", 4),
+            ("pê-nipâw", 5),
+        ],
+        # (lemma status, frequency):
+        scores={1: (1, 10), 2: (1, 50), 3: (1, 100), 4: (0, 1000), 5: (1, 5)},
+        max_results=3,
+    )
+
+    # the best scores first; lemma status outranks frequency:
+    assert searcher.search_by_prefix("nip") == [3, 2, 1]
+    assert searcher.search_by_prefix("n", k=2) == [3, 2]
+    # exact matches first:
+    assert searcher.search_by_prefix("nipâw") == [1, 2]
+    assert searcher.search("nipâw") == [1, 2, 5]
+    assert searcher.search("nipâw", k=2) == [1, 2]
+    # the best of both the prefix and the suffix matches:
+    assert searcher.search("n", k=4) == [3, 2, 1, 4]
+    assert searcher.search("") == []
@@ -0,0 +1,49 @@
+import pytest
+from API.full_form_index import FullFormIndex
+
+
+@pytest.fixture
+def index():
+    return FullFormIndex.build(
+        [
+            (1, "nipâw", "nipâw+V+AI+Ind+3Sg"),
+            (2, "nipâwak", "nipâw+V+AI+Ind+3Pl"),
+            (3, "ôma", "ôma+Ipc+Foc"),
+            (4, "ôma", "ôma+Pron+Dem+Prox+I+Sg"),
+            # same analysis, different spelling:
+            (5, "ôhma", "ôma+Ipc+Foc"),
+        ],
+        {
+            "nipâw": {"nipâw+V+AI+Ind+3Sg"},
+            # the imperative is not in the database:
+            "nipâwak": {"nipâw+V+AI+Ind+3Pl", "nipâw+V+AI+Imp+2Pl"},
+            "ôma": {"ôma+Ipc+Foc", "ôma+Pron+Dem+Prox+I+Sg"},
+            # not analyzable:
+            "nipa": set(),
+        },
+    )
+
+
+def test_get(index):
+    assert index.get("nipâw") == [(1, "nipâw+V+AI+Ind+3Sg")]
+    assert sorted(index.get("ôma")) == [
+        (3, "ôma+Ipc+Foc"),
+        (4, "ôma+Pron+Dem+Prox+I+Sg"),
+        (5, "ôma+Ipc+Foc"),
+    ]
+
+
+@pytest.mark.parametrize("text", ["nipâwak", "nipa", "nipaw", "ôhma"])
+def test_texts_that_need_the_fst(index, text):
+    assert text not in index
+    assert index.get(text) is None
+
+
+def test_save_and_load(index, tmp_path):
+    path = tmp_path / "full-forms.dawg"
+    index.save(path)
+
+    loaded = FullFormIndex.load(path)
+
+    for text in ["nipâw", "ôma", "nipâwak"]:
+        assert loaded.get(text) == index.get(text)
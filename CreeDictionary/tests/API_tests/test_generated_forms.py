@@ -0,0 +1,23 @@
+from API.generated_forms import GeneratedForms
+
+
+def test_generated_forms(tmp_path):
+    forms = GeneratedForms(
+        [
+            ("nipâw+V+AI+Ind+3Sg", "nipâw"),
+            # some analyses have more than one spelling:
+            ("ôma+Pron+Dem+Prox+I+Sg", "ôma"),
+            ("ôma+Pron+Dem+Prox+I+Sg", "ôhi"),
+            # the same form can be generated more than once:
+            ("nipâw+V+AI+Ind+3Sg", "nipâw"),
+        ]
+    )
+
+    assert forms["nipâw+V+AI+Ind+3Sg"] == {"nipâw"}
+    assert forms["ôma+Pron+Dem+Prox+I+Sg"] == {"ôma", "ôhi"}
+    assert "IC+nipâw+V+AI+Cnj+3Sg" not in forms
+    assert len(forms) == 2
+
+    path = tmp_path / "generated-forms.dawg"
+    forms.save(path)
+    assert dict(GeneratedForms.load(path)) == dict(forms)
@@ -0,0 +1,111 @@
+import pytest
+from API import search
+from API.apps import APIConfig
+from API.models import Wordform
+from API.query_classifier import QueryClassifier, QueryRoutes
+from API.search import query_routing_stats, to_internal_form
+from django.conf import settings
+
+from CreeDictionary import hfstol
+
+
+@pytest.fixture(scope="module")
+def django_db_setup():
+    """
+    Use the existing test_db.sqlite3 (see USE_TEST_DB in settings.py)
+    """
+    assert settings.USE_TEST_DB
+
+
+@pytest.fixture
+def classifier():
+    return QueryClassifier(
+        cree_characters="acehikmnopstwyâêîô-' ",
+        english_keywords=["sit", "sleep", "walk", "bear"],
+    )
+
+
+@pytest.mark.parametrize(
+    "query,cree,english_keywords",
+    [
+        ("nipâw", True, set()),
+        ("sleep", False, {"sleep"}),
+        # keywords are stemmed:
+        ("walks", False, {"walk"}),
+        ("he sleeps and walks", False, {"sleep", "walk"}),
+        # spelled with Cree letters, and an English keyword:
+        ("sit", True, {"sit"}),
+        # preverbs are matched without diacritics:
+        ("pē", True, set()),
+        ("xyz", False, set()),
+    ],
+)
+def test_classify(classifier, query, cree, english_keywords):
+    route = classifier.classify(query)
+    assert route.cree == cree
+    assert route.english_keywords == english_keywords
+
+
+def test_save_and_load(classifier, tmp_path):
+    cree_characters_path = tmp_path / "cree-characters.dawg"
+    english_keywords_path = tmp_path / "english-keywords.dawg"
+    classifier.save(cree_characters_path, english_keywords_path)
+
+    loaded = QueryClassifier.load(cree_characters_path, english_keywords_path)
+
+    assert loaded.cree_characters == classifier.cree_characters
+    for query in "nipâw", "walks", "sit", "pē", "xyz":
+        assert loaded.classify(query) == classifier.classify(query)
+
+
+def test_stats(classifier):
+    routes = QueryRoutes()
+    for query in "nipâw", "walk", "sit", "xyz":
+        routes.count(classifier.classify(query))
+
+    stats = routes.stats()
+    assert stats["queries"] == 4
+    assert stats["skipped_cree"] == 2
+    assert stats["skipped_english_rate"] == 0.5
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["ᓂᐱᐚ", "êkota", "kî-ayâw.", "tân'si"])
+def test_cree_queries_are_never_skipped(query):
+    classifier = APIConfig.active_instance().dictionary_resources().query_classifier
+    assert classifier.classify(to_internal_form(query)).cree
+
+
+@pytest.mark.django_db
+def test_english_queries_skip_the_fst(monkeypatch):
+    analyzed = []
+    analyze_many = hfstol.analyze_many
+
+    def spy(wordforms):
+        wordforms = list(wordforms)
+        analyzed.extend(wordforms)
+        return analyze_many(wordforms)
+
+    monkeypatch.setattr(hfstol, "analyze_many", spy)
+
+    skipped_cree = query_routing_stats()["skipped_cree"]
+
+    results = Wordform.search_with_affixes("sleep")
+    assert results
+    assert analyzed == []
+    assert query_routing_stats()["skipped_cree"] == skipped_cree + 1
+
+
+@pytest.mark.django_db
+def test_english_typos_get_no_fuzzy_cree_matches(monkeypatch):
+    fuzzy_searches = []
+    monkeypatch.setattr(
+        search, "do_cree_fuzzy_search", lambda *args: fuzzy_searches.append(args)
+    )
+
+    # "l" isn't Cree:
+    Wordform.search_with_affixes("sleeeeepl")
+    assert fuzzy_searches == []
+
+    Wordform.search_with_affixes("nipâââwww")
+    assert len(fuzzy_searches) == 1
@@ -0,0 +1,123 @@
+"""
+Unit tests for API.search that do not need the test database.
+"""
+
+from itertools import count
+
+import pytest
+from API import search
+from API.models import Wordform
+from API.search import SearchResult, sort_by_user_query, to_internal_form
+from sortedcontainers import SortedSet
+from utils.enums import Language
+
+
+_wordform_ids = count()
+
+
+def make_result(matched_cree: str, matched_by: Language, is_lemma=False):
+    # Wordforms must have a primary key to be hashable
+    wordform = Wordform(id=next(_wordform_ids), text=matched_cree, is_lemma=True)
+    return SearchResult(
+        matched_cree=matched_cree,
+        is_lemma=is_lemma,
+        matched_by=matched_by,
+        lemma_wordform=wordform,
+        linguistic_breakdown_head=(),
+        linguistic_breakdown_tail=(),
+        raw_suffix_tags=(),
+        preverbs=(),
+        reduplication_tags=(),
+        initial_change_tags=(),
+        definitions=(),
+    )
+
+
+@pytest.fixture
+def morpheme_rankings(monkeypatch):
+    rankings = {"nipâw": 3.0, "pimohtêw": 5.0}
+    monkeypatch.setattr(Wordform, "MORPHEME_RANKINGS", rankings)
+    return rankings
+
+
+@pytest.mark.parametrize("rank_up_front", [False, True])
+def test_sort_order(morpheme_rankings, rank_up_front):
+    query = to_internal_form("nipâw")
+    unranked_english = make_result("kawisimow", Language.ENGLISH)
+    worse_english = make_result("pimohtêw", Language.ENGLISH)
+    best_english = make_result("nipâw", Language.ENGLISH)
+    distant_cree = make_result("ninipân", Language.CREE)
+    non_lemma_cree = make_result("nipâw", Language.CREE)
+    lemma_cree = make_result("nipâw", Language.CREE, is_lemma=True)
+
+    cree_results = [distant_cree, non_lemma_cree, lemma_cree]
+    english_results = [unranked_english, worse_english, best_english]
+
+    ranked = cree_results + english_results if rank_up_front else []
+    results = SortedSet(key=sort_by_user_query(query, ranked=ranked))
+    results |= cree_results
+    results |= english_results
+
+    assert list(results) == [
+        lemma_cree,
+        non_lemma_cree,
+        distant_cree,
+        best_english,
+        worse_english,
+        unranked_english,
+    ]
+
+
+def test_modified_distance_is_computed_once_per_result(monkeypatch):
+    """
+    A large affix search used to compute the modified distance for both sides of
+    every comparison.
+    """
+    calls = 0
+    original_get_modified_distance = search.get_modified_distance
+
+    def counting_get_modified_distance(*args):
+        nonlocal calls
+        calls += 1
+        return original_get_modified_distance(*args)
+
+    monkeypatch.setattr(search, "get_modified_distance", counting_get_modified_distance)
+
+    query = to_internal_form("wâpam")
+    results = [
+        make_result(f"wâpam{'ê' * (i % 7)}{'w' * (i % 11)}{i}", Language.CREE)
+        for i in range(500)
+    ]
+    sorted_results = SortedSet(results, key=sort_by_user_query(query))
+
+    assert len(sorted_results) == len(results)
+    assert calls == len(results)
+
+
+def test_analysis_breakdown_is_computed_once_per_analysis(monkeypatch):
+    calls = 0
+    original_partition_analysis = search.partition_analysis
+
+    def counting_partition_analysis(analysis):
+        nonlocal calls
+        calls += 1
+        return original_partition_analysis(analysis)
+
+    monkeypatch.setattr(search, "partition_analysis", counting_partition_analysis)
+    search.breakdown_analysis.cache_clear()
+
+    analysis = "IC+nipâw+V+AI+Cnj+3Sg"
+    breakdown = search.breakdown_analysis(analysis)
+    assert search.breakdown_analysis(analysis) is breakdown
+    assert calls == 1
+
+    assert breakdown.raw_suffix_tags == ("V", "AI", "Cnj", "3Sg")
+    assert breakdown.linguistic_breakdown_tail == tuple(
+        search.replace_user_friendly_tags(["V", "AI", "Cnj", "3Sg"])
+    )
+    assert breakdown.preverbs == ()
+
+
+def test_unparsable_analysis_has_an_empty_breakdown():
+    breakdown = search.breakdown_analysis("not an analysis")
+    assert breakdown == ((), (), (), ())
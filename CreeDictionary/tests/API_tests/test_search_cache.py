@@ -0,0 +1,170 @@
+import pytest
+from API.search import InternalForm
+from API.search_cache import (
+    DjangoCacheBackend,
+    InProcessBackend,
+    SearchMode,
+    SearchResultCache,
+    create_search_result_cache,
+    search_with_affixes_or_infixes_serialized,
+    search_with_affixes_serialized,
+)
+from django.conf import settings
+
+
+class FakeSearch:
+    """
+    Returns canned results, and remembers how many times it was called.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.results
+
+
+@pytest.fixture
+def version():
+    return ["v1"]
+
+
+@pytest.fixture
+def cache(version):
+    return SearchResultCache(
+        InProcessBackend(max_entries=2, max_bytes=1024),
+        max_entry_bytes=512,
+        get_dictionary_version=lambda: version[0],
+    )
+
+
+def test_caches_results(cache):
+    search = FakeSearch([{"matched_cree": "nipâw"}])
+    query = InternalForm("nipâw")
+
+    first = cache.get_or_search(query, SearchMode.AFFIX, search)
+    second = cache.get_or_search(query, SearchMode.AFFIX, search)
+
+    assert first == second == search.results
+    assert search.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_changing_results_does_not_change_the_cache(cache):
+    search = FakeSearch([{"matched_cree": "nipâw"}])
+    query = InternalForm("nipâw")
+
+    cache.get_or_search(query, SearchMode.AFFIX, search)[0]["matched_cree"] = "x"
+    cached = cache.get_or_search(query, SearchMode.AFFIX, search)
+
+    assert cached == [{"matched_cree": "nipâw"}]
+    assert search.calls == 1
+
+
+def test_search_modes_are_cached_separately(cache):
+    search = FakeSearch([])
+    query = InternalForm("nipâw")
+
+    cache.get_or_search(query, SearchMode.AFFIX, search)
+    cache.get_or_search(query, SearchMode.EXACT, search)
+
+    assert search.calls == 2
+
+
+def test_new_dictionary_version_invalidates_results(cache, version):
+    search = FakeSearch([])
+    query = InternalForm("nipâw")
+
+    cache.get_or_search(query, SearchMode.AFFIX, search)
+    version[0] = "v2"
+    cache.get_or_search(query, SearchMode.AFFIX, search)
+
+    assert search.calls == 2
+
+
+def test_evicts_least_recently_used_entry(cache):
+    search = FakeSearch([])
+    for query in ["a", "b", "a", "c"]:
+        cache.get_or_search(InternalForm(query), SearchMode.AFFIX, search)
+    assert search.calls == 3
+
+    # "b" was least recently used when "c" was added:
+    cache.get_or_search(InternalForm("a"), SearchMode.AFFIX, search)
+    assert search.calls == 3
+    cache.get_or_search(InternalForm("b"), SearchMode.AFFIX, search)
+    assert search.calls == 4
+
+
+def test_bounded_by_bytes():
+    backend = InProcessBackend(max_entries=100, max_bytes=100)
+    backend.set("a", [], 60)
+    backend.set("b", [], 30)
+    backend.set("c", [], 30)
+
+    assert backend.get("a") is None
+    assert backend.get("b") == backend.get("c") == []
+    assert backend.total_bytes == 60
+
+
+def test_does_not_cache_huge_results(cache):
+    search = FakeSearch([{"text": "x" * 1024}])
+    for _ in range(2):
+        cache.get_or_search(InternalForm("x"), SearchMode.AFFIX, search)
+
+    assert search.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_django_cache_backend(version):
+    cache = SearchResultCache(
+        DjangoCacheBackend("default", timeout=60),
+        max_entry_bytes=512,
+        get_dictionary_version=lambda: version[0],
+    )
+    cache.backend.clear()
+    search = FakeSearch([{"matched_cree": "nipâw"}])
+
+    for _ in range(2):
+        cache.get_or_search(InternalForm("nipâw"), SearchMode.AFFIX, search)
+
+    assert search.calls == 1
+
+
+def test_django_cache_backend_expires_results():
+    cache = create_search_result_cache(
+        {"BACKEND": "default", "MAX_BYTES": 1024, "TIMEOUT": 60}
+    )
+    assert cache.backend.timeout == 60
+
+
+@pytest.fixture(scope="module")
+def django_db_setup():
+    """
+    Use the existing test_db.sqlite3 (see USE_TEST_DB in settings.py)
+    """
+    assert settings.USE_TEST_DB
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query", ["wâpamêw", "Wapamew "])
+def test_serialized_search_is_cached(query, django_assert_num_queries):
+    results = search_with_affixes_serialized(query)
+    assert len(results) >= 1
+
+    # Only the version stamp is read the second time:
+    with django_assert_num_queries(1):
+        assert search_with_affixes_serialized(query) == results
+
+
+@pytest.mark.django_db
+def test_search_falls_back_to_infixes():
+    # a fragment from the middle of a word, so affix search finds nothing:
+    query = "kwêhtawastê"
+    assert search_with_affixes_serialized(query) == []
+
+    results = search_with_affixes_or_infixes_serialized(query)
+
+    assert "ahkwêhtawastêwa" in {result["matched_cree"] for result in results}
@@ -0,0 +1,94 @@
+import pytest
+from API import versioned_files
+from API.apps import GENERATED_FORMS_FILES
+from API.generated_forms import GeneratedForms
+from API.models import DictionaryVersion
+from API.versioned_files import VersionedFiles
+from CreeDictionary import hfstol
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    database = tmp_path / "db.sqlite3"
+    monkeypatch.setattr(versioned_files, "database_file", lambda: database)
+    return database
+
+
+@pytest.fixture
+def builds():
+    return []
+
+
+@pytest.fixture
+def files(builds):
+    def build():
+        builds.append(1)
+        return GeneratedForms([("nipâw+V+AI+Ind+3Sg", "nipâw")])
+
+    return VersionedFiles(
+        "generated-forms",
+        build=build,
+        load=GeneratedForms.load,
+        save=GeneratedForms.save,
+        names=lambda: ("fst-hash",),
+    )
+
+
+def test_load_or_build_saves_what_it_builds(files, builds, database):
+    built = files.load_or_build("v1")
+    loaded = files.load_or_build("v1")
+
+    assert len(builds) == 1
+    assert dict(loaded) == dict(built)
+    assert files.paths("v1") == (
+        database.with_name("db.generated-forms.v1.fst-hash.dawg"),
+    )
+
+
+def test_saving_a_version_removes_the_others(files, database):
+    other_kind = database.with_name("db.full-forms.v1.dawg")
+    other_kind.touch()
+    files.load_or_build("v1")
+
+    files.save(files.build(), "v2")
+
+    assert sorted(path.name for path in database.parent.iterdir()) == [
+        "db.full-forms.v1.dawg",
+        "db.generated-forms.v2.fst-hash.dawg",
+    ]
+
+
+def test_unversioned_dictionaries_are_not_saved(files, builds, database):
+    files.load_or_build(DictionaryVersion.UNVERSIONED)
+    files.load_or_build(DictionaryVersion.UNVERSIONED)
+
+    assert len(builds) == 2
+    assert list(database.parent.iterdir()) == []
+
+
+def test_missing_files_fall_back_without_building(builds, database):
+    files = VersionedFiles(
+        "generated-forms",
+        build=None,
+        load=GeneratedForms.load,
+        save=GeneratedForms.save,
+        names=lambda: ("fst-hash",),
+        if_missing=lambda: GeneratedForms([]),
+    )
+
+    assert len(files.load_or_build("v1")) == 0
+    assert list(database.parent.iterdir()) == []
+
+    files.save(GeneratedForms([("nipâw+V+AI+Ind+3Sg", "nipâw")]), "v1")
+    assert dict(files.load_or_build("v1")) == {"nipâw+V+AI+Ind+3Sg": {"nipâw"}}
+
+
+def test_forms_of_another_generator_are_not_used(database, monkeypatch):
+    monkeypatch.setattr(hfstol, "generator_hash", lambda: "old-generator")
+    GENERATED_FORMS_FILES.save(GeneratedForms([("nipâw+V+AI+Ind+3Sg", "nipâw")]), "v1")
+
+    monkeypatch.setattr(hfstol, "generator_hash", lambda: "new-generator")
+    assert len(GENERATED_FORMS_FILES.load_or_build("v1")) == 0
+    assert [path.name for path in database.parent.iterdir()] == [
+        "db.generated-forms.v1.old-generator.dawg"
+    ]
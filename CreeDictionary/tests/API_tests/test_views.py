@@ -1,5 +1,11 @@
+import json
+
 import pytest
+from API.models import DictionaryVersion
+from API.search_cache import get_search_result_cache
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 ASCII_WAPAMEW = "wapamew"
@@ -68,3 +74,106 @@ def test_click_in_text_disables_affix_search(client):
         reverse("cree-dictionary-word-click-in-text-api") + f"?q={ASCII_WAPAMEW}"
     ).content.decode("utf-8")
     assert EXPECTED_SUFFIX_SEARCH_RESULT not in click_in_text_response
+
+
+PASSAGE = "Tânisi! Niskak, maskwa êkwa atim kî-wâpamêw pipon. Nipâw ôma atim."
+
+
+def post_bulk(client, body):
+    return client.post(
+        reverse("cree-dictionary-word-click-in-text-bulk-api"),
+        data=json.dumps(body),
+        content_type="application/json",
+    )
+
+
+@pytest.fixture
+def empty_search_result_cache():
+    get_search_result_cache().backend.clear()
+
+
+@pytest.mark.django_db
+def test_click_in_text_bulk_matches_click_in_text(client, empty_search_result_cache):
+    response = post_bulk(client, {"text": PASSAGE})
+
+    assert response.status_code == 200
+    assert response["Access-Control-Allow-Origin"] == "*"
+    tokens = response.json()["tokens"]
+    assert [token["text"] for token in tokens] == [
+        "Tânisi",
+        "Niskak",
+        "maskwa",
+        "êkwa",
+        "atim",
+        "kî-wâpamêw",
+        "pipon",
+        "Nipâw",
+        "ôma",
+        "atim",
+    ]
+    for position, token in enumerate(tokens):
+        assert token["position"] == position
+        assert PASSAGE[token["start"] : token["end"]] == token["text"]
+
+        # not from the cache:
+        get_search_result_cache().backend.clear()
+        single_response = client.get(
+            reverse("cree-dictionary-word-click-in-text-api"), {"q": token["text"]}
+        )
+        assert token["results"] == single_response.json()["results"]
+
+
+@pytest.mark.django_db
+def test_click_in_text_bulk_uses_a_constant_number_of_queries(
+    client, empty_search_result_cache, django_assert_max_num_queries
+):
+    with django_assert_max_num_queries(10):
+        response = post_bulk(client, {"text": PASSAGE})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_click_in_text_bulk_with_tokens(client):
+    response = post_bulk(client, {"tokens": ["niskak", "", "niskak"]})
+
+    tokens = response.json()["tokens"]
+    assert [token["position"] for token in tokens] == [0, 1, 2]
+    assert tokens[1]["results"] == []
+    assert tokens[0]["results"] == tokens[2]["results"] != []
+    assert "start" not in tokens[0]
+
+
+@pytest.mark.parametrize(
+    "body", ["not json", "[]", '{"tokens": [1, 2]}', '{"text": null}']
+)
+def test_click_in_text_bulk_bad_requests(client, body):
+    response = client.post(
+        reverse("cree-dictionary-word-click-in-text-bulk-api"),
+        data=body,
+        content_type="application/json",
+    )
+    assert response.status_code == 400
+
+
+def test_click_in_text_bulk_allows_cross_origin_requests(client):
+    response = client.options(reverse("cree-dictionary-word-click-in-text-bulk-api"))
+
+    assert response.status_code == 200
+    assert response["Access-Control-Allow-Origin"] == "*"
+    assert "POST" in response["Access-Control-Allow-Methods"]
+
+    assert (
+        client.get(reverse("cree-dictionary-word-click-in-text-bulk-api")).status_code
+        == 405
+    )
+
+
+@pytest.mark.django_db
+def test_search_reads_the_dictionary_version_once(client, empty_search_result_cache):
+    # affix search finds nothing, so this falls back to infix search:
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse("cree-dictionary-search") + "?q=kwêhtawastê")
+
+    assert "ahkwêhtawastêwa" in response.content.decode("utf-8")
+    version_table = DictionaryVersion._meta.db_table
+    assert sum(version_table in query["sql"] for query in queries) == 1
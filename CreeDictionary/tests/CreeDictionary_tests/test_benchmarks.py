@@ -0,0 +1,64 @@
+import json
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from CreeDictionary.benchmarks import Comparison, read_test_db_words
+
+
+@pytest.fixture(scope="module")
+def django_db_setup():
+    """
+    Use the existing test_db.sqlite3 (see USE_TEST_DB in settings.py)
+    """
+    assert settings.USE_TEST_DB
+
+
+def test_read_test_db_words():
+    words = read_test_db_words()
+    assert "wâpamêw" in words
+    assert not any(word.startswith("#") for word in words)
+
+
+def test_comparison():
+    assert Comparison("a", baseline=1.0, current=1.1).is_regression(threshold=0.05)
+    assert not Comparison("a", baseline=1.0, current=1.1).is_regression(threshold=0.2)
+    # faster is never a regression:
+    assert not Comparison("a", baseline=1.0, current=0.5).is_regression(threshold=0)
+
+
+@pytest.mark.django_db
+def test_benchmark_command(tmp_path):
+    output = tmp_path / "benchmark.json"
+    call_command(
+        "benchmark", "--rounds=2", "-k", "search-exact", "-k", "partition", "-o", output
+    )
+
+    results = json.loads(output.read_text(encoding="UTF-8"))
+    assert set(results["benchmarks"]) == {
+        "search-exact-cold",
+        "search-exact-warm",
+        "partition-analysis",
+    }
+    for result in results["benchmarks"].values():
+        assert result["rounds"] == 2
+        assert result["operations"] > 0
+        assert result["min"] <= result["median"] <= result["max"]
+
+    # no regressions against itself:
+    call_command(
+        "benchmark",
+        "--rounds=1",
+        "-k",
+        "partition",
+        "--compare",
+        output,
+        "--threshold=10",
+    )
+
+    # ...but a much faster baseline makes this run a regression:
+    results["benchmarks"]["partition-analysis"]["median_per_operation"] /= 1000
+    output.write_text(json.dumps(results), encoding="UTF-8")
+    with pytest.raises(CommandError, match="partition-analysis"):
+        call_command("benchmark", "--rounds=1", "-k", "partition", "--compare", output)
@@ -1,9 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: UTF-8 -*-
 
-import pytest
+import os
 
-from CreeDictionary.hfstol import analyze, generate
+import pytest
+from shared import expensive
+
+from CreeDictionary.hfstol import (
+    MemoizedTransducer,
+    PersistentLookupStore,
+    analyze,
+    generate,
+    read_input_symbols,
+)
 
 
 @pytest.mark.parametrize(
@@ -87,3 +96,98 @@ def test_analyses_do_not_contain_err_frag():
         "+Err/Frag" not in analysis.raw_suffixes
         for analysis in analyze(possible_fragment)
     )
+
+
+class CountingTransducer:
+    """
+    A fake TransducerFile that counts its lookups.
+    """
+
+    def __init__(self):
+        self.lookups = 0
+
+    def lookup(self, string):
+        self.lookups += 1
+        return [string.upper(), string]
+
+
+@pytest.fixture
+def fst_file(tmp_path):
+    path = tmp_path / "fake.hfstol"
+    path.write_bytes(b"not really an FST")
+    return path
+
+
+def test_memoized_transducer_looks_up_once(fst_file):
+    fake = CountingTransducer()
+    memoized = MemoizedTransducer(lambda: fake, fst_file, max_entries=2)
+
+    assert memoized.lookup("a") == memoized.lookup("a") == ["A", "a"]
+    assert fake.lookups == 1
+    assert memoized.stats()["hit_rate"] == 0.5
+
+    # evicts the least recently used lookup:
+    memoized.lookup("b")
+    memoized.lookup("c")
+    memoized.lookup("a")
+    assert fake.lookups == 4
+
+
+def test_persistent_store_connects_in_each_process(tmp_path, monkeypatch):
+    store = PersistentLookupStore(tmp_path / "lookups.sqlite3")
+    store.put("fst-hash", "a", ("A",))
+    with store._lock:
+        parent_connection = store._connection
+
+    # e.g., in a forked gunicorn worker:
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    with store._lock:
+        assert store._connection is not parent_connection
+    assert store.get("fst-hash", "a") == ("A",)
+
+    store.close()
+    assert store.get("fst-hash", "a") == ("A",)
+
+
+def test_memoized_transducer_persists_lookups(tmp_path, fst_file):
+    store = PersistentLookupStore(tmp_path / "lookups.sqlite3")
+    first_fake = CountingTransducer()
+    MemoizedTransducer(lambda: first_fake, fst_file, 8, store).lookup("a")
+
+    # e.g., after a worker restart:
+    second_fake = CountingTransducer()
+    memoized = MemoizedTransducer(lambda: second_fake, fst_file, 8, store)
+    assert memoized.lookup("a") == ["A", "a"]
+    assert second_fake.lookups == 0
+    assert memoized.stats()["store_hits"] == 1
+
+    # a different FST must not reuse the old lookups:
+    fst_file.write_bytes(b"an updated FST")
+    updated = MemoizedTransducer(lambda: second_fake, fst_file, 8, store)
+    updated.lookup("a")
+    assert second_fake.lookups == 1
+
+
+def test_memoized_bulk_lookup_is_the_same_as_the_fst():
+    analyses = [
+        "wâpamêw+V+TA+Ind+3Sg+4Sg/PlO",
+        "IC+nipâw+V+AI+Cnj+3Sg",
+        "pîpîpôpô+Ipc",
+    ]
+    memoized = MemoizedTransducer(
+        lambda: expensive.strict_generator,
+        expensive.fst_paths["strict_generator"],
+        max_entries=8,
+    )
+    assert memoized.bulk_lookup(analyses) == expensive.strict_generator.bulk_lookup(
+        analyses
+    )
+
+
+def test_read_input_symbols():
+    symbols = read_input_symbols(expensive.fst_paths["relaxed_analyzer"])
+
+    assert set("nipâw-") <= symbols
+    # there's no "l" in Plains Cree, and flag diacritics aren't input:
+    assert "l" not in symbols
+    assert not any(symbol.startswith("@") for symbol in symbols)
@@ -0,0 +1,102 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from CreeDictionary.load_replay import (
+    Request,
+    Response,
+    parse_access_log,
+    replay,
+    requests_for_queries,
+    summarize,
+)
+
+
+def test_parse_access_log():
+    log = [
+        '10.0.0.1 - - [18/Oct/2026:10:00:00 +0000] "GET /_search_results/n%C3%AEpaw/ '
+        'HTTP/1.1" 200 5120 "https://itwewina.altlab.app/" "Mozilla/5.0"',
+        '10.0.0.1 - - [18/Oct/2026:10:00:01 +0000] "GET /_lemma_details/?lemma-id=1'
+        '&paradigm-size=BASIC HTTP/1.1" 200 4000 "-" "Mozilla/5.0"',
+        '10.0.0.1 - - [18/Oct/2026:10:00:02 +0000] "POST /click-in-text/bulk/ '
+        'HTTP/1.1" 200 40 "-" "curl/7.68.0"',
+        '10.0.0.1 - - [18/Oct/2026:10:00:03 +0000] "GET /about HTTP/1.1" 200 40 "-" '
+        '"curl/7.68.0"',
+    ]
+    assert list(parse_access_log(log)) == [
+        Request("search-results", "/_search_results/n%C3%AEpaw/"),
+        Request("lemma-details", "/_lemma_details/?lemma-id=1&paradigm-size=BASIC"),
+    ]
+
+
+def test_requests_for_queries():
+    requests = list(requests_for_queries(["nipâw", "sleep"], {"nipâw": [3, 4]}))
+    assert [r.route for r in requests] == [
+        "search",
+        "search-results",
+        "word",
+        "lemma-details",
+        "lemma-details",
+        "click-in-text",
+        "search",
+        "search-results",
+        "click-in-text",
+    ]
+    assert requests[0].target == "/search?q=nip%C3%A2w"
+
+
+def test_summarize():
+    responses = [
+        Response("search", 0.010, 200),
+        Response("search", 0.030, 500),
+        Response("word", 0.020, None),
+        Response("word", 0.040, 404),
+    ]
+    summary = summarize(responses, seconds=2.0)
+
+    assert summary["search"]["requests"] == 2
+    assert summary["search"]["error_rate"] == 0.5
+    # a 404 is not an error, but not reaching the server is:
+    assert summary["word"]["error_rate"] == 0.5
+    assert summary["total"]["throughput"] == 2.0
+    assert summary["total"]["p50"] == pytest.approx(20.0)
+    assert summary["total"]["p99"] == pytest.approx(40.0)
+
+
+@pytest.fixture
+def server_url():
+    """
+    A server that is fine, except for click-in-text, which always fails.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(500 if self.path.startswith("/click-in-text/") else 200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_replay(server_url):
+    requests = list(requests_for_queries(["wâpamêw"], {"wâpamêw": [1]})) * 3
+    responses = replay(requests, server_url, concurrency=2, rate=200)
+
+    assert len(responses) == len(requests)
+    summary = summarize(responses, seconds=1.0)
+    assert summary["search"]["requests"] == 3
+    assert summary["search"]["error_rate"] == 0.0
+    assert summary["click-in-text"]["error_rate"] == 1.0
+
+
+def test_replay_to_nowhere():
+    responses = replay([Request("search", "/search?q=a")], "http://127.0.0.1:9", 1)
+    assert [response.status for response in responses] == [None]
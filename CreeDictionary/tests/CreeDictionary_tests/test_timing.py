@@ -0,0 +1,56 @@
+import json
+import logging
+
+import pytest
+from API.search_cache import get_search_result_cache
+from django.conf import settings
+from django.urls import reverse
+
+from CreeDictionary import timing
+
+
+@pytest.fixture(scope="module")
+def django_db_setup():
+    """
+    Use the existing test_db.sqlite3 (see USE_TEST_DB in settings.py)
+    """
+    assert settings.USE_TEST_DB
+
+
+def test_spans_do_nothing_outside_of_requests():
+    with timing.span("fst"):
+        timing.annotate(query="nipâw")
+
+
+def test_server_timing_header_format():
+    timings = timing.RequestTimings()
+    timings.add("fst", 0.001)
+    timings.add("fst", 0.0005)
+    timings.sql_queries = 2
+
+    assert timings.server_timing(0.01) == (
+        'fst;dur=1.5, sql;dur=0.0;desc="2 queries", total;dur=10.0'
+    )
+
+
+@pytest.mark.django_db
+def test_search_timings(client, caplog):
+    get_search_result_cache().backend.clear()
+
+    with caplog.at_level(logging.INFO, logger="CreeDictionary.timing"):
+        response = client.get(
+            reverse("cree-dictionary-search-results", args=["wâpamêw"])
+        )
+
+    stages = {metric.split(";")[0] for metric in response["Server-Timing"].split(", ")}
+    assert {"fetch", "fst", "affix", "sort", "serialize", "render", "sql", "total"} <= (
+        stages
+    )
+
+    [record] = [r for r in caplog.records if r.name == "CreeDictionary.timing"]
+    log = json.loads(record.getMessage())
+    assert log["query"] == "wâpamêw"
+    assert isinstance(log["results"], int)
+    assert log["cache"] == "miss"
+    assert log["sql_queries"] >= 1
+    assert log["ms"]["total"] >= log["ms"]["fetch"]
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+from CreeDictionary import warmup
+
+
+@pytest.fixture(scope="module")
+def django_db_setup():
+    """
+    Use the existing test_db.sqlite3 (see USE_TEST_DB in settings.py)
+    """
+    assert settings.USE_TEST_DB
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+@pytest.mark.django_db
+def test_warm_up_loads_everything():
+    load_times = warmup.warm_up()
+
+    assert set(load_times) == set(warmup.RESOURCES)
+    assert {"cree_infix_searcher", "english_infix_searcher"} <= set(load_times)
+    assert all(status["loaded"] for status in warmup.readiness().values())
+
+
+@pytest.mark.django_db
+def test_readiness_endpoint(client):
+    warmup.warm_up()
+
+    response = client.get(reverse("cree-dictionary-readiness"))
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert body["ready"] is True
+    assert body["resources"]["relaxed_analyzer"]["loaded"] is True
+    assert body["resources"]["relaxed_analyzer"]["seconds"] >= 0
+    assert {"hits", "misses"} <= set(body["metrics"]["search_result_cache"])
+    assert "skipped_cree_rate" in body["metrics"]["query_routing"]
+
+
+def test_readiness_endpoint_before_warm_up(client, monkeypatch):
+    monkeypatch.setitem(
+        warmup.RESOURCES,
+        "not_loaded",
+        warmup.Resource(load=lambda: None, is_loaded=lambda: False),
+    )
+
+    response = client.get(reverse("cree-dictionary-readiness"))
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    body = response.json()
+    assert body["ready"] is False
+    assert body["resources"]["not_loaded"] == {"loaded": False, "seconds": None}
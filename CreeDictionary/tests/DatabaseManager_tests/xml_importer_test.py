@@ -1,5 +1,5 @@
 import pytest
-from API.models import Wordform
+from API.models import Definition, DictionaryVersion, EnglishKeyword, Wordform
 from DatabaseManager.cree_inflection_generator import expand_inflections
 from DatabaseManager.xml_importer import find_latest_xml_file
 from tests.conftest import migrate_and_import
@@ -17,6 +17,45 @@ def test_import_nice_xml(shared_datadir):
                 assert len(Wordform.objects.filter(text=inflection)) >= 1
 
 
+@pytest.mark.django_db
+def test_import_stores_source_ids_on_definitions(shared_datadir):
+    migrate_and_import(shared_datadir / "crkeng-small-nice-0")
+
+    definitions = Definition.objects.all()
+    assert len(definitions) >= 1
+    for definition in definitions.prefetch_related("citations"):
+        cited = tuple(sorted(source.abbrv for source in definition.citations.all()))
+        assert definition.source_ids == cited == ("CW",)
+
+
+@pytest.mark.django_db
+def test_import_stores_each_source_id_once(shared_datadir):
+    migrate_and_import(shared_datadir / "crkeng-small-duplicate-sources")
+
+    [definition] = Definition.objects.prefetch_related("citations")
+    cited = tuple(sorted(source.abbrv for source in definition.citations.all()))
+    assert definition.source_ids == cited == ("CW", "MD")
+
+
+@pytest.mark.django_db
+def test_import_stores_lowercased_keywords(shared_datadir):
+    migrate_and_import(shared_datadir / "crkeng-small-nice-0")
+
+    keywords = EnglishKeyword.objects.values_list("text", flat=True)
+    assert len(keywords) >= 1
+    assert all(keyword == keyword.lower() for keyword in keywords)
+
+
+@pytest.mark.django_db
+def test_import_stamps_a_new_dictionary_version(shared_datadir):
+    migrate_and_import(shared_datadir / "crkeng-small-nice-0")
+
+    version = DictionaryVersion.current()
+    assert version != DictionaryVersion.UNVERSIONED
+    # a re-import (after wiping) must invalidate anything from the previous import:
+    assert DictionaryVersion.stamp_new_version() != version
+
+
 @pytest.mark.django_db
 @pytest.mark.xfail(
     reason="fst is updated. Need a new example that generates multiple spellings"
@@ -80,3 +80,30 @@ def test_chunks_make_full_labels():
         ("Ind",),
         ("3Sg", "4Sg/PlO"),
     ]
+
+
+def test_tags_without_a_relabelling_are_kept_as_is():
+    tag_set = ("V", "AI", "Fake", "3Sg", "4Sg/PlO")
+    assert labels.english.get_full_relabelling(tag_set) == [
+        "Action word - like: mîcisow, nipâw",
+        "Fake",
+        "s/he → him/her/them",
+    ]
+    assert list(labels.english.chunk(tag_set)) == [
+        ("V", "AI"),
+        ("Fake",),
+        ("3Sg", "4Sg/PlO"),
+    ]
+
+
+def test_longest_match_does_not_need_every_prefix_to_be_relabelled():
+    """
+    "3Sg+4Sg/PlO" is relabelled, and so is "3Sg", but "V+TA+Prs" is not: matching
+    stops at the longest prefix that is.
+    """
+    assert labels.english.get_longest(("V", "TA", "Prs")) == (
+        "Action word - like: wîcihêw, itêw"
+    )
+    assert labels.english.get_longest(iter(["3Sg", "4Sg/PlO", "Ind"])) == (
+        "s/he → him/her/them"
+    )
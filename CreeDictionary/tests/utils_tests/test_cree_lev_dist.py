@@ -2,9 +2,17 @@ from string import ascii_letters
 
 import pytest
 from hypothesis import assume, example, given
-from hypothesis.strategies import text
+from hypothesis.strategies import lists, sampled_from, text
 from Levenshtein import distance
-from utils import get_modified_distance
+from utils import (
+    CreeLevenshteinAutomaton,
+    get_modified_distance,
+    get_modified_distances,
+)
+from utils.cree_lev_dist import del_dist, ins_dist, sub_dist
+
+# Letters that exercise every special case: diacritics, vowels, and 'h'
+cree_letters = text(alphabet=sampled_from("aâeêiîoôhHkptwÂ-"), max_size=8)
 
 
 @given(text(alphabet=ascii_letters), text(alphabet=ascii_letters))
@@ -38,3 +46,52 @@ def test_get_distance_basic_lev(spelling: str, normal_form: str):
 )
 def test_get_distance(spelling: str, normal_form: str, expected_distance):
     assert get_modified_distance(spelling, normal_form) == expected_distance
+
+
+def reference_modified_distance(spelling: str, normal_form: str) -> float:
+    """
+    The full-matrix implementation that get_modified_distances() must agree with.
+    """
+    spelling = spelling.lower()
+    normal_form = normal_form.lower()
+    n, m = len(spelling), len(normal_form)
+    d = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        d[i][0] = d[i - 1][0] + del_dist(spelling, i - 1)
+    for j in range(1, m + 1):
+        d[0][j] = d[0][j - 1] + ins_dist(normal_form, normal_form[j - 1], j - 1)
+
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            _del_dist = d[i - 1][j] + del_dist(spelling, i - 1)
+            _ins_dist = d[i][j - 1] + ins_dist(normal_form, normal_form[j - 1], j - 1)
+            _sub_dist = d[i - 1][j - 1] + sub_dist(spelling, normal_form[j - 1], i - 1)
+            d[i][j] = min((_del_dist, _ins_dist, _sub_dist))
+
+    return d[-1][-1]
+
+
+@given(cree_letters, lists(cree_letters))
+@example("wâpam", ["wâpamêw", "wâpamêw", "wâpam", "wâpamew", "", "wâ"])
+@example("ta", ["hka", "hk", "hkâ"])  # 'h' after a vowel... at the end of the word
+def test_get_distances_matches_get_distance(spelling: str, normal_forms):
+    assert get_modified_distances(spelling, normal_forms) == [
+        reference_modified_distance(spelling, normal_form)
+        for normal_form in normal_forms
+    ]
+
+
+@given(cree_letters, cree_letters)
+@example("atâk", "atâhk")
+def test_automaton_matches_get_distance(spelling: str, normal_form: str):
+    # The wraparound in ins_dist() is deliberately not reproduced by the automaton:
+    assume(not normal_form.lower().startswith("h"))
+
+    automaton = CreeLevenshteinAutomaton(spelling)
+    state, previous_char = automaton.start(), ""
+    for char in normal_form:
+        state, previous_char = automaton.step(state, char, previous_char), char
+        # no extension of the normal form can get closer than the lower bound:
+        assert automaton.lower_bound(state) <= automaton.distance(state)
+
+    assert automaton.distance(state) == get_modified_distance(spelling, normal_form)
@@ -84,6 +84,45 @@ def test_inflect_all_with_analyses(paradigm_filler) -> None:
     ), f"could not find stem {stem} in regular inflection {random_form}"
 
 
+def test_fill_paradigm_with_generated_forms(paradigm_filler, monkeypatch) -> None:
+    """
+    Forms that were generated already aren't generated again.
+    """
+    generated = paradigm_filler.fill_paradigm(
+        "maskwa", WordClass.NA, ParadigmSize.BASIC
+    )
+
+    generator = paradigm_filler._generator
+    looked_up = []
+
+    class Spy:
+        def bulk_lookup(self, analyses):
+            looked_up.extend(analyses)
+            return generator.bulk_lookup(analyses)
+
+    monkeypatch.setattr(paradigm_filler, "_generator", Spy())
+    filled = paradigm_filler.fill_paradigm(
+        "maskwa",
+        WordClass.NA,
+        ParadigmSize.BASIC,
+        generated_forms={"maskwa+N+A+Sg": {"maskwa"}, "maskwa+N+A+Pl": {"maskwak"}},
+    )
+
+    assert "maskwa+N+A+Sg" not in looked_up
+    assert "maskwa+N+A+Obv" in looked_up
+    assert [
+        [cell.inflection for cell in row if isinstance(cell, InflectionCell)]
+        for table in filled
+        for row in table
+        if isinstance(row, list)
+    ] == [
+        [cell.inflection for cell in row if isinstance(cell, InflectionCell)]
+        for table in generated
+        for row in table
+        if isinstance(row, list)
+    ]
+
+
 @pytest.fixture
 def paradigm_filler(shared_datadir) -> ParadigmFiller:
     """
@@ -1,4 +1,8 @@
-from .cree_lev_dist import get_modified_distance
+from .cree_lev_dist import (
+    CreeLevenshteinAutomaton,
+    get_modified_distance,
+    get_modified_distances,
+)
 from .enums import *
 from .shared_res_dir import shared_res_dir
 from .vars import *
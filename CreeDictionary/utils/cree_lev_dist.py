@@ -1,5 +1,6 @@
 import string
 import unicodedata
+from typing import Iterable, List
 
 VOWELS = {"a", "e", "i", "o"}
 
@@ -99,26 +100,197 @@ def get_modified_distance(spelling: str, normal_form: str) -> float:
 
     This function neglects letter case
 
+    If you have many normal forms to compare against the same spelling, use
+    get_modified_distances() instead.
+
     :param spelling:
     :param normal_form:
     :return: Our own metric of edit distance
     """
+    return get_modified_distances(spelling, [normal_form])[0]
+
+
+def get_modified_distances(spelling: str, normal_forms: Iterable[str]) -> List[float]:
+    """
+    Compute get_modified_distance(spelling, normal_form) for every normal form, in
+    the same order.
+
+    The spelling is normalized once, and the character classes (diacritics, vowels,
+    and 'h') are computed once per string instead of once per cell. The dynamic
+    programming matrix is computed one column (normal form character) at a time, so
+    normal forms that share a prefix -- like the results of an affix search -- share
+    the columns computed for that prefix.
+
+    >>> get_modified_distances("atâk", ["atâhk", "atak", "atâk"])
+    [0.5, 0.5, 0]
+    """
     # see these slides for "weighted min edit distance"
     # https://web.stanford.edu/class/cs124/lec/med.pdf
     spelling = spelling.lower()
-    normal_form = normal_form.lower()
-    n, m = len(spelling), len(normal_form)
-    d = [[0] * (m + 1) for _ in range(n + 1)]
-    for i in range(1, n + 1):
-        d[i][0] = d[i - 1][0] + del_dist(spelling, i - 1)
-    for j in range(1, m + 1):
-        d[0][j] = d[0][j - 1] + ins_dist(normal_form, normal_form[j - 1], j - 1)
-
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            _del_dist = d[i - 1][j] + del_dist(spelling, i - 1)
-            _ins_dist = d[i][j - 1] + ins_dist(normal_form, normal_form[j - 1], j - 1)
-            _sub_dist = d[i - 1][j - 1] + sub_dist(spelling, normal_form[j - 1], i - 1)
-            d[i][j] = min((_del_dist, _ins_dist, _sub_dist))
-
-    return d[-1][-1]
+    simple_spelling = remove_cree_diacritics(spelling)
+    deletion_costs = [del_dist(spelling, i) for i in range(len(spelling))]
+
+    # The first column: deleting all of the spelling
+    first_column: List[float] = [0]
+    for cost in deletion_costs:
+        first_column.append(first_column[-1] + cost)
+
+    normal_forms = [normal_form.lower() for normal_form in normal_forms]
+    distances: List[float] = [0] * len(normal_forms)
+
+    # columns[j] is the column after j characters of the current normal form:
+    columns = [first_column]
+    previous_form = ""
+    previous_h_initial_after_vowel = False
+    for index in sorted(
+        range(len(normal_forms)),
+        key=lambda k: (_is_h_initial_after_vowel(normal_forms[k]), normal_forms[k]),
+    ):
+        normal_form = normal_forms[index]
+        # ins_dist() of the first character depends on the LAST character, so only
+        # share columns between forms that agree on that:
+        h_initial_after_vowel = _is_h_initial_after_vowel(normal_form)
+        if h_initial_after_vowel == previous_h_initial_after_vowel:
+            shared = _common_prefix_length(previous_form, normal_form)
+        else:
+            shared = 0
+        del columns[shared + 1 :]
+
+        for j in range(shared, len(normal_form)):
+            columns.append(
+                _next_column(
+                    columns[j],
+                    spelling,
+                    simple_spelling,
+                    deletion_costs,
+                    normal_form[j],
+                    ins_dist(normal_form, normal_form[j], j),
+                )
+            )
+
+        distances[index] = columns[len(normal_form)][-1]
+        previous_form = normal_form
+        previous_h_initial_after_vowel = h_initial_after_vowel
+
+    return distances
+
+
+class CreeLevenshteinAutomaton:
+    """
+    Computes the distance (see get_modified_distance()) between a spelling and a normal
+    form one character of the normal form at a time, so that a trie of normal forms
+    can be walked, pruning every branch that is already too far from the spelling.
+
+    A state is a column of the dynamic programming matrix: the distances between
+    every prefix of the spelling and the normal form so far.
+
+    >>> automaton = CreeLevenshteinAutomaton("atâk")
+    >>> state, previous_char = automaton.start(), ""
+    >>> for char in "atâhk":
+    ...     state, previous_char = automaton.step(state, char, previous_char), char
+    >>> automaton.distance(state)
+    0.5
+    """
+
+    def __init__(self, spelling: str):
+        self.spelling = spelling.lower()
+        self.simple_spelling = remove_cree_diacritics(self.spelling)
+        self.deletion_costs = [
+            del_dist(self.spelling, i) for i in range(len(self.spelling))
+        ]
+
+    def start(self) -> List[float]:
+        """
+        The state for an empty normal form.
+        """
+        column: List[float] = [0]
+        for cost in self.deletion_costs:
+            column.append(column[-1] + cost)
+        return column
+
+    def step(self, state: List[float], char: str, previous_char: str) -> List[float]:
+        """
+        The state after appending char to the normal form. previous_char is the last
+        character of the normal form so far ("" if it's empty).
+        """
+        char = char.lower()
+        if char == "h" and remove_cree_diacritics(previous_char.lower()) in VOWELS:
+            insertion_cost = 0.5
+        else:
+            insertion_cost = 1
+        return _next_column(
+            state,
+            self.spelling,
+            self.simple_spelling,
+            self.deletion_costs,
+            char,
+            insertion_cost,
+        )
+
+    @staticmethod
+    def distance(state: List[float]) -> float:
+        """
+        The distance between the spelling and the normal form so far.
+        """
+        return state[-1]
+
+    @staticmethod
+    def lower_bound(state: List[float]) -> float:
+        """
+        No normal form that starts with the normal form so far can be any closer to the
+        spelling than this.
+        """
+        return min(state)
+
+
+def _next_column(
+    column: List[float],
+    spelling: str,
+    simple_spelling: str,
+    deletion_costs: List[float],
+    char: str,
+    insertion_cost: float,
+) -> List[float]:
+    """
+    Given the column of distances for a prefix of the normal form, compute the column
+    after adding one more character to the normal form.
+    """
+    simple_char = remove_cree_diacritics(char)
+    substitution_cost_when_similar = 0 if simple_char == "e" else 0.5
+
+    next_column = [column[0] + insertion_cost]
+    for i in range(1, len(column)):
+        if spelling[i - 1] == char:
+            substitution_cost: float = 0
+        elif simple_spelling[i - 1] == simple_char:
+            substitution_cost = substitution_cost_when_similar
+        else:
+            substitution_cost = 1
+
+        next_column.append(
+            min(
+                (
+                    next_column[i - 1] + deletion_costs[i - 1],
+                    column[i] + insertion_cost,
+                    column[i - 1] + substitution_cost,
+                )
+            )
+        )
+    return next_column
+
+
+def _is_h_initial_after_vowel(normal_form: str) -> bool:
+    """
+    ins_dist() looks at the character before the inserted character -- which, for the
+    first character, wraps around to the last character of the string!
+    """
+    return normal_form[:1] == "h" and remove_cree_diacritics(normal_form[-1:]) in VOWELS
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    length = 0
+    for char_a, char_b in zip(a, b):
+        if char_a != char_b:
+            break
+        length += 1
+    return length
@@ -2,7 +2,17 @@ import csv
 import re
 from enum import IntEnum, auto
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, TextIO, Tuple, TypeVar, Union
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from utils.enums import WordClass
 from utils.types import FSTLemma, FSTTag, Label
@@ -38,18 +48,21 @@ class Relabelling:
         .emoji[tag]             or .emoji.get(tag, default)
     """
 
-    _DataStructure = Dict[Tuple[FSTTag, ...], Dict[LabelFriendliness, Optional[Label]]]
+    _Entry = Dict[LabelFriendliness, Optional[Label]]
+    _DataStructure = Dict[Tuple[FSTTag, ...], _Entry]
 
     def __init__(self, data: _DataStructure) -> None:
         self._data = data
+        self._trie = _TagTrie.from_data(data)
+
+        self.linguistic_short = self._fetcher(LabelFriendliness.LINGUISTIC_SHORT)
+        self.linguistic_long = self._fetcher(LabelFriendliness.LINGUISTIC_LONG)
+        self.english = self._fetcher(LabelFriendliness.ENGLISH)
+        self.cree = self._fetcher(LabelFriendliness.NEHIYAWEWIN)
+        self.emoji = self._fetcher(LabelFriendliness.EMOJI)
 
-        self.linguistic_short = _RelabelFetcher(
-            data, LabelFriendliness.LINGUISTIC_SHORT
-        )
-        self.linguistic_long = _RelabelFetcher(data, LabelFriendliness.LINGUISTIC_LONG)
-        self.english = _RelabelFetcher(data, LabelFriendliness.ENGLISH)
-        self.cree = _RelabelFetcher(data, LabelFriendliness.NEHIYAWEWIN)
-        self.emoji = _RelabelFetcher(data, LabelFriendliness.EMOJI)
+    def _fetcher(self, friendliness: LabelFriendliness) -> "_RelabelFetcher":
+        return _RelabelFetcher(self._data, self._trie, friendliness)
 
     def __contains__(self, key: object) -> bool:
         if isinstance(key, str):
@@ -90,6 +103,48 @@ class Relabelling:
         return cls(res)
 
 
+class _TagTrie:
+    """
+    The relabellings, keyed by their tags one tag at a time, so that the longest
+    relabelled prefix of some tags is found in a single pass.
+    """
+
+    __slots__ = ("children", "entry")
+
+    def __init__(self) -> None:
+        self.children: Dict[FSTTag, "_TagTrie"] = {}
+        # the relabellings of the tags that lead to this node, if there are any
+        self.entry: Optional[Relabelling._Entry] = None
+
+    @classmethod
+    def from_data(cls, data: Relabelling._DataStructure) -> "_TagTrie":
+        root = cls()
+        for tags, entry in data.items():
+            node = root
+            for tag in tags:
+                node = node.children.setdefault(tag, cls())
+            node.entry = entry
+        return root
+
+    def longest_match(
+        self, tags: Sequence[FSTTag], start: int = 0
+    ) -> Tuple[int, Optional[Relabelling._Entry]]:
+        """
+        Returns where the longest relabelled prefix of tags[start:] ends, and its
+        relabellings. Returns (start, None) when no prefix is relabelled.
+        """
+        end, entry = start, None
+        node = self
+        for index in range(start, len(tags)):
+            child = node.children.get(tags[index])
+            if child is None:
+                break
+            node = child
+            if node.entry is not None:
+                end, entry = index + 1, node.entry
+        return end, entry
+
+
 class _RelabelFetcher:
     """
     Makes accessing relabellings for a particular label friendliness easier.
@@ -98,9 +153,11 @@ class _RelabelFetcher:
     def __init__(
         self,
         data: Relabelling._DataStructure,
+        trie: _TagTrie,
         label: LabelFriendliness,
     ):
         self._data = data
+        self._trie = trie
         self._friendliness = label
 
     def __getitem__(self, key: FSTTag) -> Optional[Label]:
@@ -116,23 +173,23 @@ class _RelabelFetcher:
         """
         Get a relabelling for the longest prefix of the given tags.
         """
-        _unmatched, label = self._get_longest(tags)
-        return label
+        _end, entry = self._trie.longest_match(tuple(tags))
+        return None if entry is None else entry[self._friendliness]
 
     def chunk(self, tags: Iterable[FSTTag]) -> Iterable[Tuple[FSTTag, ...]]:
         """
         Chunk FST Labels that match relabellings and yield the tags.
         """
         tag_set = tuple(tags)
-        while tag_set:
-            unmatched, _ = self._get_longest(tag_set)
-            prefix_length = len(tag_set) - len(unmatched)
-            if prefix_length == 0:
+        start = 0
+        while start < len(tag_set):
+            end, _ = self._trie.longest_match(tag_set, start)
+            if end == start:
                 # There was no relabelling found, but we can just return the first tag.
-                prefix_length = 1
+                end = start + 1
 
-            yield tag_set[:prefix_length]
-            tag_set = tag_set[prefix_length:]
+            yield tag_set[start:end]
+            start = end
 
     def get_full_relabelling(self, tags: Iterable[FSTTag]) -> List[Label]:
         """
@@ -141,44 +198,21 @@ class _RelabelFetcher:
 
         labels = []
         tag_set = tuple(tags)
-        while tag_set:
-            unmatched, maybe_label = self._get_longest(tag_set)
+        start = 0
+        while start < len(tag_set):
+            end, entry = self._trie.longest_match(tag_set, start)
+            maybe_label = None if entry is None else entry[self._friendliness]
             if maybe_label is None:
                 # No relabelling available! Just return the tag itself
                 # TODO: raise a warning?
-                label = Label(tag_set[0])
-                tag_set = tag_set[1:]
+                labels.append(Label(tag_set[start]))
+                start += 1
             else:
-                assert len(unmatched) < len(tag_set)
-                label = maybe_label
-                tag_set = unmatched
-            labels.append(label)
+                labels.append(maybe_label)
+                start = end
 
         return labels
 
-    def _get_longest(
-        self, tags: Iterable[FSTTag]
-    ) -> Tuple[Tuple[FSTTag, ...], Optional[Label]]:
-        """
-        Returns the unmatched tags, and the relabelling of the matched tags from the
-        prefix.
-
-        Returns a tuple of all tags if no prefix matched.
-        """
-
-        # TODO: better algorithm than this. Probably a trie
-        try_tags = tuple(tags)
-        end = len(try_tags)
-        while end > 0:
-            try:
-                entry = self._data[try_tags[:end]]
-            except KeyError:
-                end -= 1
-            else:
-                return try_tags[end:], entry[self._friendliness]
-
-        return try_tags, None
-
 
 def read_labels() -> Relabelling:
     with (shared_res_dir / "crk.altlabel.tsv").open(encoding="UTF-8") as csvfile:
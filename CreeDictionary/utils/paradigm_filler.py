@@ -4,7 +4,17 @@ fill a paradigm table according to a lemma
 import logging
 from copy import deepcopy
 from pathlib import Path
-from typing import Dict, List, Sequence, Set, Tuple, cast
+from typing import (
+    Collection,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
 
 from hfst_optimized_lookup import TransducerFile
 from paradigm import (
@@ -97,11 +107,17 @@ class ParadigmFiller:
         return ParadigmFiller(shared_res_dir / "layouts")
 
     def fill_paradigm(
-        self, lemma: str, category: WordClass, paradigm_size: ParadigmSize
+        self,
+        lemma: str,
+        category: WordClass,
+        paradigm_size: ParadigmSize,
+        generated_forms: Optional[Mapping[ConcatAnalysis, Collection[str]]] = None,
     ) -> List[Layout]:
         """
         returns a paradigm table filled with words
 
+        :param generated_forms: forms that were generated already (e.g., when the
+            dictionary was imported); only the other analyses are generated
         :returns: filled paradigm tables
         """
         # We want to lookup all of the inflections in bulk,
@@ -141,7 +157,17 @@ class ParadigmFiller:
                         raise ValueError("Unexpected Cell Type")
 
         # Generate ALL OF THE INFLECTIONS!
-        results = self._generator.bulk_lookup(lookup_strings)
+        results: Dict[ConcatAnalysis, Collection[str]] = {}
+        if generated_forms is not None:
+            for analysis in lookup_strings:
+                forms = generated_forms.get(analysis)
+                if forms is not None:
+                    results[analysis] = forms
+        generated = self._generator.bulk_lookup(
+            [analysis for analysis in lookup_strings if analysis not in results]
+        )
+        for generated_analysis, forms in generated.items():
+            results[ConcatAnalysis(generated_analysis)] = forms
 
         # string_locations and lookup_strings have parallel indices.
         assert len(string_locations) == len(lookup_strings)
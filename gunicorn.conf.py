@@ -22,3 +22,73 @@ disable_redirect_access_to_syslog = True
 loglevel = os.getenv("GUNICORN_LOG_LEVEL", "debug")
 errorlog = "-"
 accesslog = str(os.getenv("GUNICORN_ACCESS_LOG", log_prefix / "access.log"))
+
+# Load the app -- and all of its expensive resources -- once in the master process,
+# so that workers start warm and share the loaded resources copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD_APP", "true").lower() in ("1", "true", "yes")
+
+# Workers whose resident memory exceeds this many MiB are gracefully restarted after
+# their current request. 0 disables recycling.
+max_worker_rss_mb = int(os.getenv("GUNICORN_MAX_WORKER_RSS_MB", 0))
+
+
+def when_ready(server):
+    """
+    Warms up the preloaded app in the master, right before the workers are forked.
+    """
+    if not server.cfg.preload_app:
+        return
+
+    from django.db import connections
+
+    from CreeDictionary import hfstol
+    from CreeDictionary.warmup import warm_up
+
+    load_times = warm_up()
+    server.log.info("Warmed up in %.2fs", sum(load_times.values()))
+
+    # Database connections must not be shared by forked workers:
+    connections.close_all()
+    hfstol.close_persistent_store()
+
+
+def post_worker_init(worker):
+    """
+    Without preload_app, each worker has to warm itself up.
+    """
+    if worker.cfg.preload_app:
+        return
+
+    from CreeDictionary.warmup import warm_up
+
+    warm_up()
+
+
+def post_request(worker, req, environ, resp):
+    """
+    Recycles the worker once its memory use is above the watermark.
+    """
+    if not max_worker_rss_mb:
+        return
+
+    rss_mb = _resident_set_size() / (1024 * 1024)
+    if rss_mb > max_worker_rss_mb:
+        worker.log.info(
+            "Worker %s uses %.0f MiB (limit: %d MiB); restarting",
+            worker.pid,
+            rss_mb,
+            max_worker_rss_mb,
+        )
+        worker.alive = False
+
+
+def _resident_set_size() -> int:
+    """
+    The resident set size of this process, in bytes (Linux only; 0 elsewhere).
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")